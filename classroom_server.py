@@ -0,0 +1,429 @@
+"""
+Classroom server mode: many learners, one local model.
+
+At workshops we have 30-60 learners and only a few machines that can host the
+model. The server accepts learner connections over a plain TCP line protocol;
+every connection gets its own `TutorialSession` (tutorial progress + chat
+history) while all sessions share a single model client.
+
+Protocol: one JSON object per line, UTF-8.
+- client -> server: {"text": "<learner message>"}
+- server -> client: {"kind": "agent" | "system", "markdown": "..."} for each
+  reply, then {"kind": "end"} once the turn is complete.
+
+Model calls from all sessions go through a `ModelScheduler`, so learners are
+served fairly and `/stats` shows the shared queue. `/run` is off unless
+`--run-workers` is given. Learners' snippets then share one pool of workers
+that only limit time and memory: they run as this server's user, so turn
+it on only for learners you'd let use that account (see code_runner.py).
+
+Usage:
+    python classroom_server.py serve --host 0.0.0.0 --port 8765
+    python classroom_server.py connect --host 192.168.1.20 --port 8765
+    python classroom_server.py loadtest --sessions 100
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import statistics
+import time
+from typing import Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from code_runner import CodeRunner, refusal
+from metrics import format_metrics
+from generation_budget import BudgetController
+from model_router import ModelRouter, create_router
+from model_scheduler import ModelScheduler
+from endpoint_pool import endpoint_pool
+from model_watchdog import ModelWatchdog
+from tool_call_stream import ToolCallStats
+from tutorial_api import TutorialAPI
+from tutorial_session import TutorialSession
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Learners paste whole tracebacks, so allow long lines
+LINE_LIMIT = 1024 * 1024
+
+
+def encode(message: dict) -> bytes:
+    return (json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+class ClassroomServer:
+    """Asyncio TCP server giving every connection its own tutorial session."""
+
+    def __init__(
+        self,
+        llm,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        max_sessions: int = 200,
+        max_in_flight: int = 1,
+        batch_size: int = 1,
+        router: Optional[ModelRouter] = None,
+        runner: Optional[CodeRunner] = None,
+    ):
+        self.llm = llm
+        self.runner = runner
+        self.pool = endpoint_pool(llm)
+        self.router = router
+        self.host = host
+        self.port = port
+        self.max_sessions = max_sessions
+        self.scheduler = ModelScheduler(max_in_flight=max_in_flight, batch_size=batch_size)
+        self.tool_call_stats = ToolCallStats()
+        self.budgets = BudgetController()
+        self.watchdog = ModelWatchdog(probe_llm=llm)
+        self.sessions: Dict[str, TutorialSession] = {}
+        self._ids = itertools.count(1)
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port, limit=LINE_LIMIT)
+        # Pick up the real port when started with port=0
+        self.port = self._server.sockets[0].getsockname()[1]
+        if self.runner is not None:
+            await self.runner.start()
+        logger.info("Classroom server listening on %s:%s", self.host, self.port)
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self.runner is not None:
+            await self.runner.close()
+
+    def stats(self) -> str:
+        return format_metrics({
+            "Classroom": {"sessions": len(self.sessions)},
+            "Model queue": self.scheduler.metrics(),
+            "Tool calls": self.tool_call_stats.metrics(),
+            "Generation budget": self.budgets.metrics(),
+            "Model health": self.watchdog.metrics(),
+            **({"Endpoints": self.pool.metrics()} if self.pool is not None else {}),
+            **({"Routing": self.router.metrics()} if self.router is not None else {}),
+            **({"Code runner": self.runner.metrics()} if self.runner is not None else {}),
+        })
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        if len(self.sessions) >= self.max_sessions:
+            writer.write(encode({"kind": "system", "markdown": "The classroom is full, please try again soon."}))
+            writer.write(encode({"kind": "end"}))
+            await writer.drain()
+            writer.close()
+            return
+
+        session_id = f"learner-{next(self._ids)}"
+        session = TutorialSession(
+            self.scheduler.wrap(self.llm, session_id),
+            tutorial=TutorialAPI(),
+            session_id=session_id,
+            tool_call_stats=self.tool_call_stats,
+            router=self.router,
+            budgets=self.budgets,
+            watchdog=self.watchdog,
+            runner=self.runner,
+        )
+        self.sessions[session_id] = session
+        logger.info("%s connected from %s", session_id, writer.get_extra_info("peername"))
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    user_text = json.loads(line).get("text", "").strip()
+                except (json.JSONDecodeError, AttributeError):
+                    user_text = line.decode("utf-8", errors="replace").strip()
+                if not user_text:
+                    writer.write(encode({"kind": "end"}))
+                    await writer.drain()
+                    continue
+                if user_text.lower() == "/stats":
+                    writer.write(encode({"kind": "system", "markdown": self.stats()}))
+                    writer.write(encode({"kind": "end"}))
+                    await writer.drain()
+                    continue
+
+                try:
+                    replies = await session.handle(user_text)
+                except Exception as e:
+                    logger.exception("%s: turn failed", session_id)
+                    writer.write(encode({"kind": "system", "markdown": f"Sorry, something went wrong: {e}"}))
+                else:
+                    for reply in replies:
+                        writer.write(encode({"kind": reply.kind, "markdown": reply.markdown}))
+                writer.write(encode({"kind": "end"}))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            self.sessions.pop(session_id, None)
+            logger.info("%s disconnected", session_id)
+            writer.close()
+
+
+class ClassroomClient:
+    """Minimal client side of the line protocol."""
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        self.host = host
+        self.port = port
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def connect(self) -> None:
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port, limit=LINE_LIMIT)
+
+    async def send(self, text: str) -> List[dict]:
+        """Send one learner message and collect the replies for that turn."""
+        self._writer.write(encode({"text": text}))
+        await self._writer.drain()
+        replies = []
+        while True:
+            line = await self._reader.readline()
+            if not line:
+                raise ConnectionError("Classroom server closed the connection")
+            message = json.loads(line)
+            if message.get("kind") == "end":
+                return replies
+            replies.append(message)
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            await self._writer.wait_closed()
+
+
+async def run_client(host: str, port: int, plain: Optional[bool] = None) -> None:
+    """Thin terminal client: the chat UI locally, the model on the server."""
+    from ui_plain import create_chat_ui
+
+    ui = create_chat_ui(plain)
+    await ui.start()
+
+    client = ClassroomClient(host, port)
+    try:
+        await client.connect()
+    except OSError as e:
+        await ui.add_system_markdown(f"Could not reach the classroom server at {host}:{port} ({e}).")
+        return
+
+    try:
+        while True:
+            try:
+                user_text = (await ui.get_user_input()).strip()
+            except (EOFError, KeyboardInterrupt):
+                await ui.add_system_markdown("Exiting.")
+                break
+
+            if not user_text:
+                continue
+            if user_text.lower() in {"/exit", "/quit"}:
+                await ui.add_system_markdown("Goodbye.")
+                break
+            if user_text.lower().split()[0] == "/history":
+                # Earlier messages, a page at a time: /history, /history 2, ...
+                arg = user_text.split()[1:]
+                await ui.show_history(int(arg[0]) if arg and arg[0].isdigit() else 1)
+                continue
+
+            try:
+                replies = await client.send(user_text)
+            except ConnectionError as e:
+                await ui.add_system_markdown(str(e))
+                break
+            for reply in replies:
+                if reply["kind"] == "system":
+                    await ui.add_system_markdown(reply["markdown"])
+                else:
+                    await ui.add_agent_markdown(reply["markdown"])
+    finally:
+        await client.close()
+
+
+# --------------------------------------------------------------------------------------
+# LOAD TESTING
+# --------------------------------------------------------------------------------------
+
+# What a learner types at each step of the tutorial flow, in order
+LEARNER_SCRIPT = [
+    ("hello", "welcome"),
+    ("teach me python basics", "python_basics"),
+    ("help me setup my environment", "setup"),
+    ("install django", "django_install"),
+    ("create the project", "create_project"),
+    ("create the blog app", "create_app"),
+    ("show me the models", "models"),
+    ("set up the admin", "admin"),
+    ("make the views", "views"),
+    ("let's test it", "test"),
+]
+
+
+class StubModel(BaseChatModel):
+    """Stand-in for the local model: answers with the tutorial call a good model would.
+
+    Sleeps for `latency` seconds per call so the load test exercises
+    concurrency the way a real (much slower) model would.
+    """
+
+    latency: float = 0.05
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _answer(self, messages) -> str:
+        text = messages[-1].content.lower()
+        if "next" in text:
+            return "tutorial.next_step()"
+        for phrase, topic in reversed(LEARNER_SCRIPT):
+            if phrase in text:
+                return f"```python\ntutorial.show('{topic}')\n```"
+        return "I'm not sure, try asking about a tutorial step!"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self.calls += 1
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._answer(messages)))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._answer(messages)))])
+
+
+async def _simulated_learner(host: str, port: int, index: int, latencies: List[float]) -> bool:
+    # Each learner gets a different amount of progress, so a leak of tutorial
+    # state between sessions shows up as a wrong "next step" answer.
+    steps = 1 + index % (len(LEARNER_SCRIPT) - 1)
+    client = ClassroomClient(host, port)
+    await client.connect()
+    try:
+        for phrase, _ in LEARNER_SCRIPT[:steps]:
+            start = time.perf_counter()
+            await client.send(phrase)
+            latencies.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        replies = await client.send("what's next?")
+        latencies.append(time.perf_counter() - start)
+    finally:
+        await client.close()
+    expected = LEARNER_SCRIPT[steps][1]
+    return any(f"tutorial.show('{expected}')" in reply["markdown"] for reply in replies)
+
+
+async def run_load_test(
+    sessions: int = 100, latency: float = 0.05, max_in_flight: int = 8, llm=None
+) -> Dict[str, float]:
+    """Run `sessions` simulated learners concurrently against a local server.
+
+    Uses the stub model unless `llm` is given. Returns throughput and latency
+    percentiles, how many sessions saw the tutorial state they expected, and
+    the model queue metrics.
+    """
+    model = llm or StubModel(latency=latency)
+    server = ClassroomServer(model, host="127.0.0.1", port=0, max_sessions=sessions, max_in_flight=max_in_flight)
+    await server.start()
+    latencies: List[float] = []
+    start = time.perf_counter()
+    try:
+        results = await asyncio.gather(
+            *(_simulated_learner(server.host, server.port, i, latencies) for i in range(sessions)),
+            return_exceptions=True,
+        )
+    finally:
+        await server.close()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "sessions": sessions,
+        "turns": len(latencies),
+        "elapsed_s": elapsed,
+        "turns_per_s": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0.0,
+        "isolated_sessions": sum(1 for r in results if r is True),
+        "failed_sessions": sum(1 for r in results if isinstance(r, BaseException)),
+        **{f"queue_{name}": value for name, value in server.scheduler.metrics().items()},
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Django Girls classroom server")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve = sub.add_parser("serve", help="host the tutorial for a whole classroom")
+    serve.add_argument("--host", default=DEFAULT_HOST)
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument("--max-sessions", type=int, default=200)
+    serve.add_argument("--max-in-flight", type=int, default=1, help="concurrent requests sent to the model")
+    serve.add_argument("--batch-size", type=int, default=1, help="compatible requests released together")
+    serve.add_argument("--run-workers", type=int, default=0,
+                       help="workers for /run; snippets run as this server's user (default 0: off)")
+
+    connect = sub.add_parser("connect", help="join a classroom server as a learner")
+    connect.add_argument("--host", default=DEFAULT_HOST)
+    connect.add_argument("--port", type=int, default=DEFAULT_PORT)
+    ui_choice = connect.add_mutually_exclusive_group()
+    ui_choice.add_argument("--plain", dest="plain", action="store_const", const=True,
+                           help="plain text output, for slow links (default over SSH)")
+    ui_choice.add_argument("--rich", dest="plain", action="store_const", const=False)
+
+    load = sub.add_parser("loadtest", help="simulate many learners against a stub model")
+    load.add_argument("--sessions", type=int, default=100)
+    load.add_argument("--latency", type=float, default=0.05, help="stub model latency in seconds")
+    load.add_argument("--max-in-flight", type=int, default=8)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        from tutorial_session import create_llm
+
+        if args.run_workers and refusal() is not None:
+            parser.error(f"--run-workers: {refusal()}")
+
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+        llm = create_llm()
+        # At least one request in flight per model endpoint
+        pool = endpoint_pool(llm)
+        max_in_flight = max(args.max_in_flight, len(pool)) if pool else args.max_in_flight
+        server = ClassroomServer(
+            llm, args.host, args.port, args.max_sessions, max_in_flight, args.batch_size,
+            router=create_router(),
+            runner=CodeRunner(workers=args.run_workers) if args.run_workers else None,
+        )
+        try:
+            asyncio.run(server.serve_forever())
+        except KeyboardInterrupt:
+            pass
+    elif args.command == "connect":
+        asyncio.run(run_client(args.host, args.port, args.plain))
+    else:
+        report = asyncio.run(run_load_test(args.sessions, args.latency, args.max_in_flight))
+        for key, value in report.items():
+            print(f"{key:>24}: {value:.1f}" if isinstance(value, float) else f"{key:>24}: {value}")
+
+
+if __name__ == "__main__":
+    main()
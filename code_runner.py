@@ -0,0 +1,480 @@
+"""
+Python runner for the Python basics exercises: `/run 2 + 3`.
+
+The Python basics step used to send learners to a second terminal and a
+`python3` prompt. `/run <code>` runs the snippet right in the chat and shows
+what it printed, or the error together with the tutorial's help for it.
+
+Starting an interpreter costs tens of milliseconds per snippet, so
+`CodeRunner` keeps a small pool of worker processes started ahead of time.
+Each worker has already imported the modules exercises use and forks a
+child per snippet (about a millisecond). The child, before running anything:
+
+- points stdin/stdout/stderr at /dev/null (output is captured in memory);
+- gets rlimits: CPU seconds, address space, file size 0, no new processes
+  and no new file descriptors;
+- is killed by a wall-clock alarm if it sleeps or waits.
+
+These limits catch a beginner's accidents: an endless loop, a huge list, a
+flood of output. They do not isolate the snippet. It runs as the same user
+as the tutorial, so it can delete that user's files, signal their
+processes, and make any system call that needs no new descriptor or
+process. Only offer `/run` to people who may run code as that user anyway,
+i.e. the learner on their own machine. `classroom_server.py` leaves it off
+unless `--run-workers` is given. Root ignores the limit on new processes
+and can do anything else besides, so the runner refuses to start as root.
+
+The expression on the last line is echoed like at the `>>>` prompt, and
+`>>>`/`...` prompts pasted from the tutorial are stripped. Each learner's
+earlier snippets are replayed (output discarded) before a new one, so
+`name = "Ola"` and then `print(name)` work as in one interpreter session.
+
+Windows has no fork or rlimits: there the worker runs the snippet itself,
+and a snippet that runs too long gets its worker replaced.
+
+`python code_runner.py` runs the tutorial exercises and a few snippets the
+limits stop through the pool, and compares with a fresh interpreter per
+snippet.
+"""
+import ast
+import asyncio
+import io
+import json
+import logging
+import os
+import sys
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Imported by every worker before forking, so snippets importing them pay nothing
+WORKER_MODULES = (
+    "math", "random", "string", "datetime", "collections", "itertools", "functools",
+    "json", "re", "statistics", "textwrap", "decimal", "fractions",
+)
+SNIPPET = "<snippet>"
+MAX_CODE_CHARS = 10_000
+CAN_FORK = hasattr(os, "fork")
+
+TIMEOUT_MESSAGE = (
+    "Your code was stopped because it ran for too long. "
+    "Is there a loop that never ends, like `while True:` without a `break`?"
+)
+KILLED_MESSAGE = "Your code was stopped: it used more memory or resources than the runner allows."
+ROOT_MESSAGE = (
+    "`/run` is turned off because the tutorial is running as root (the administrator account), "
+    "where your code could change anything on this computer. Start the tutorial as a regular user to use `/run`."
+)
+RUN_USAGE = (
+    "Type `/run` followed by Python code to run it here, for example `/run 2 + 3` or "
+    "`/run for friend in [\"Alice\", \"Bob\"]: print(\"Hello \" + friend)`. "
+    "Variables you create stay around for your next `/run`."
+)
+# Earlier snippets replayed before a new one
+MAX_SNIPPETS = 30
+
+
+@dataclass
+class RunResult:
+    output: str = ""
+    error: str = ""          # traceback of the learner's code, when it failed
+    status: str = "ok"       # "ok", "error", "timeout", "killed" or "disabled"
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+    def markdown(self) -> str:
+        parts = []
+        if self.output.strip():
+            parts.append(f"```text\n{self.output.rstrip()}\n```")
+        if self.error:
+            parts.append(f"```text\n{self.error.rstrip()}\n```")
+        return "\n\n".join(parts) or "*(no output)*"
+
+
+def refusal() -> Optional[str]:
+    """Why snippets must not run in this process (it runs as root), or None."""
+    if hasattr(os, "geteuid") and os.geteuid() == 0:
+        return "the code runner refuses to run snippets as root"
+    return None
+
+
+def parse_run_command(text: str) -> Optional[str]:
+    """The code of a `/run <code>` message ("" for a bare `/run`), or None for other messages."""
+    text = text.strip()
+    if text[:4].lower() != "/run" or (len(text) > 4 and not text[4].isspace()):
+        return None
+    code = text[4:].strip()
+    if code.startswith("```"):
+        # A fenced block: drop the fence lines
+        code = "\n".join(code.split("\n")[1:]).rstrip().removesuffix("```")
+    return code.strip("\n")
+
+
+def strip_prompts(code: str) -> str:
+    """Remove `>>> ` and `... ` prompts copied from the tutorial."""
+    lines = code.strip("\n").split("\n")
+    prompted = [line for line in lines if line.strip()]
+    if not prompted or not all(line.lstrip().startswith((">>>", "...")) for line in prompted):
+        return code
+    stripped = []
+    for line in lines:
+        line = line.lstrip()
+        for prompt in (">>> ", "... ", ">>>", "..."):
+            if line.startswith(prompt):
+                line = line[len(prompt):]
+                break
+        stripped.append(line)
+    return "\n".join(stripped)
+
+
+class CodeRunner:
+    """Pool of pre-started worker processes that run snippets under rlimits (not isolated).
+
+    Args:
+        workers (int): Worker processes (snippets run in parallel up to this).
+        cpu_seconds (int): CPU time a snippet may use.
+        memory_mb (int): Address space a snippet may use.
+        timeout (float): Wall-clock seconds before a snippet is stopped.
+        output_limit (int): Characters of output kept.
+    """
+
+    def __init__(self, workers: int = 2, cpu_seconds: int = 2, memory_mb: int = 256,
+                 timeout: float = 5.0, output_limit: int = 4000):
+        self.workers = workers
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.timeout = timeout
+        self.output_limit = output_limit
+        self.runs = 0
+        self.errors = 0
+        self.stopped = 0
+        self.restarts = 0
+        self.latencies: Deque[float] = deque(maxlen=500)
+        self._idle: Optional[asyncio.Queue] = None
+        self._procs: List[asyncio.subprocess.Process] = []
+        self._starting: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Start the workers (runs once; later calls wait for the first)."""
+        reason = refusal()
+        if reason is not None:
+            raise PermissionError(reason)
+        if self._starting is None:
+            self._starting = asyncio.ensure_future(self._start())
+        await asyncio.shield(self._starting)
+
+    async def _start(self) -> None:
+        self._idle = asyncio.Queue()
+        workers = await asyncio.gather(*(self._spawn() for _ in range(self.workers)))
+        for worker in workers:
+            self._idle.put_nowait(worker)
+
+    async def _spawn(self) -> asyncio.subprocess.Process:
+        proc = await asyncio.create_subprocess_exec(
+            # -I: no site-packages, environment variables or current directory
+            sys.executable, "-I", os.path.abspath(__file__), "--worker",
+            str(self.cpu_seconds), str(self.memory_mb), str(self.timeout), str(self.output_limit),
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL,
+        )
+        self._procs.append(proc)
+        return proc
+
+    async def run(self, code: str, setup: Iterable[str] = ()) -> RunResult:
+        """Run `code` after replaying `setup` (earlier snippets) in a fresh namespace."""
+        code = strip_prompts(code)
+        if len(code) > MAX_CODE_CHARS:
+            return RunResult(error=f"That's a lot of code! /run takes up to {MAX_CODE_CHARS} characters.",
+                             status="error")
+        if refusal() is not None:
+            return RunResult(error=ROOT_MESSAGE, status="disabled")
+        await self.start()
+        worker = await self._idle.get()
+        start = time.perf_counter()
+        healthy = False
+        try:
+            request = {"code": code, "setup": [strip_prompts(earlier) for earlier in setup]}
+            worker.stdin.write((json.dumps(request) + "\n").encode())
+            await worker.stdin.drain()
+            # The worker stops the snippet itself; this only catches a stuck worker
+            line = await asyncio.wait_for(worker.stdout.readline(), self.timeout + 2)
+            result = RunResult(**json.loads(line))
+            healthy = True
+        except (asyncio.TimeoutError, ConnectionError, ValueError, TypeError):
+            result = RunResult(error=TIMEOUT_MESSAGE, status="timeout")
+        finally:
+            if healthy:
+                self._idle.put_nowait(worker)
+            else:
+                # Also on cancellation: the worker may be mid-snippet, replace it
+                self._replace(worker)
+        result.elapsed = time.perf_counter() - start
+        self.runs += 1
+        self.errors += result.status == "error"
+        self.stopped += result.status in ("timeout", "killed")
+        self.latencies.append(result.elapsed)
+        return result
+
+    def _replace(self, worker: asyncio.subprocess.Process) -> None:
+        if worker.returncode is None:
+            worker.kill()
+        if worker in self._procs:
+            self._procs.remove(worker)
+        self.restarts += 1
+
+        async def respawn():
+            try:
+                self._idle.put_nowait(await self._spawn())
+            except Exception:
+                logger.exception("could not restart a code runner worker")
+
+        asyncio.ensure_future(respawn())
+
+    async def close(self) -> None:
+        for proc in self._procs:
+            if proc.returncode is None:
+                proc.stdin.close()
+                proc.kill()
+                await proc.wait()
+        self._procs = []
+        self._starting = None
+
+    def metrics(self) -> dict:
+        ordered = sorted(self.latencies)
+        return {
+            "runs": self.runs,
+            "errors": self.errors,
+            "stopped": self.stopped,
+            "worker_restarts": self.restarts,
+            "p50_ms": ordered[len(ordered) // 2] * 1000 if ordered else 0.0,
+            "p95_ms": ordered[int(len(ordered) * 0.95)] * 1000 if ordered else 0.0,
+        }
+
+
+# --------------------------------------------------------------------------------------
+# WORKER SIDE
+# --------------------------------------------------------------------------------------
+
+class _OutputFull(BaseException):
+    """Raised inside the snippet once it has printed `output_limit` characters."""
+
+
+class _LimitedOutput(io.StringIO):
+    def __init__(self, limit: int):
+        super().__init__()
+        self.limit = limit
+
+    def write(self, text: str) -> int:
+        room = self.limit - self.tell()
+        if len(text) > room:
+            super().write(text[:max(0, room)])
+            raise _OutputFull()
+        return super().write(text)
+
+
+def _exec_interactive(code: str, namespace: dict) -> None:
+    """Run `code`, printing the value of a final expression like the `>>>` prompt."""
+    import linecache
+
+    linecache.cache[SNIPPET] = (len(code), None, code.splitlines(True), SNIPPET)
+    tree = ast.parse(code, SNIPPET, "exec")
+    last = tree.body[-1] if tree.body and isinstance(tree.body[-1], ast.Expr) else None
+    if last is not None:
+        tree.body.pop()
+    exec(compile(tree, SNIPPET, "exec"), namespace)
+    if last is not None:
+        value = eval(compile(ast.Expression(last.value), SNIPPET, "eval"), namespace)
+        if value is not None:
+            print(repr(value))
+
+
+def _learner_traceback(exc: BaseException) -> str:
+    """The traceback without the runner's own frames."""
+    tb = traceback.TracebackException.from_exception(exc)
+    tb.stack = traceback.StackSummary.from_list([frame for frame in tb.stack if frame.filename == SNIPPET])
+    return "".join(tb.format())
+
+
+def execute(code: str, setup: Iterable[str] = (), output_limit: int = 4000) -> dict:
+    """Run a snippet in this process; returns the fields of a `RunResult`."""
+    import builtins
+    from contextlib import redirect_stderr, redirect_stdout
+
+    namespace = {"__name__": "__main__", "__builtins__": builtins}
+    with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+        for earlier in setup:
+            try:
+                _exec_interactive(earlier, namespace)
+            except BaseException:
+                pass
+    out = _LimitedOutput(output_limit)
+    try:
+        with redirect_stdout(out), redirect_stderr(out):
+            _exec_interactive(code, namespace)
+    except _OutputFull:
+        return {"output": out.getvalue() + f"\n... (output cut off after {output_limit} characters)"}
+    except BaseException as e:
+        return {"output": out.getvalue(), "error": _learner_traceback(e), "status": "error"}
+    return {"output": out.getvalue()}
+
+
+def _limit_child(result_fd: int, cpu_seconds: int, memory_mb: int, timeout: float) -> None:
+    """Limit the forked child: only fds 0-2 (/dev/null) and 3 (the result pipe) stay open."""
+    import resource
+    import signal
+
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+    os.dup2(result_fd, 3)
+    os.closerange(4, 1024)
+    sys.stdin = io.StringIO()
+
+    signal.signal(signal.SIGALRM, signal.SIG_DFL)
+    signal.signal(signal.SIGXFSZ, signal.SIG_IGN)   # writing a file raises instead of killing
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    limits = [
+        (resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1)),
+        (resource.RLIMIT_AS, (memory_mb << 20, memory_mb << 20)),
+        (resource.RLIMIT_FSIZE, (0, 0)),
+        (resource.RLIMIT_NPROC, (0, 0)),
+        (resource.RLIMIT_NOFILE, (4, 4)),
+    ]
+    for limit, value in limits:
+        try:
+            resource.setrlimit(limit, value)
+        except (ValueError, OSError):
+            pass  # not supported on this platform
+
+
+def _run_forked(request: dict, cpu_seconds: int, memory_mb: int, timeout: float, output_limit: int) -> dict:
+    import signal
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.close(read_fd)
+            _limit_child(write_fd, cpu_seconds, memory_mb, timeout)
+            reply = execute(request["code"], request.get("setup", ()), output_limit)
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            data = json.dumps(reply).encode()
+            while data:
+                data = data[os.write(3, data):]
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    chunks = []
+    with os.fdopen(read_fd, "rb") as pipe:
+        # Read to EOF before waiting, so a long result can't fill the pipe and block the child
+        for chunk in iter(lambda: pipe.read(65536), b""):
+            chunks.append(chunk)
+    _, status = os.waitpid(pid, 0)
+    if os.WIFSIGNALED(status):
+        if os.WTERMSIG(status) in (signal.SIGALRM, signal.SIGXCPU):
+            return {"error": TIMEOUT_MESSAGE, "status": "timeout"}
+        return {"error": KILLED_MESSAGE, "status": "killed"}
+    try:
+        return json.loads(b"".join(chunks))
+    except ValueError:
+        return {"error": KILLED_MESSAGE, "status": "killed"}
+
+
+def worker_main(cpu_seconds: int, memory_mb: int, timeout: float, output_limit: int) -> None:
+    """Serve snippets read from stdin, one JSON line each, answering on stdout."""
+    for name in WORKER_MODULES:
+        __import__(name)
+    out = sys.stdout
+    for line in sys.stdin:
+        request = json.loads(line)
+        if CAN_FORK:
+            reply = _run_forked(request, cpu_seconds, memory_mb, timeout, output_limit)
+        else:
+            reply = execute(request["code"], request.get("setup", ()), output_limit)
+        out.write(json.dumps(reply) + "\n")
+        out.flush()
+
+
+# --------------------------------------------------------------------------------------
+# BENCHMARK
+# --------------------------------------------------------------------------------------
+
+EXERCISES = [
+    "2 + 3", "4 * 5", "10 / 2", "2 ** 3",
+    '"Hello " + "World"', '"Python" * 3',
+    'name = "Django Girl"', "print(name)",
+    'favorite_colors = ["blue", "green", "purple"]', "favorite_colors.append('red')", "print(favorite_colors)",
+    '>>> friends = ["Alice", "Bob", "Carol"]\n>>> for friend in friends:\n...     print("Hello " + friend + "!")',
+    'print("Age: " + 25)', "print(nmae)",
+]
+
+LIMITED = {
+    "endless loop": "while True:\n    pass",
+    "sleeping": "import time\ntime.sleep(60)",
+    "huge list": "x = [0] * (10 ** 9)",
+    "open a socket": "import socket\nsocket.create_connection(('example.com', 80))",
+    "write a file": "open('owned.txt', 'w').write('hi')",
+    "start a process": "import os\nos.system('echo hi')",
+    "flood output": "while True:\n    print('x' * 100)",
+}
+
+
+async def benchmark(rounds: int = 5) -> dict:
+    import subprocess
+
+    runner = CodeRunner(workers=2, cpu_seconds=1, timeout=2.0)
+    await runner.start()
+    setup: List[str] = []
+    for code in EXERCISES:
+        await runner.run(code, setup)   # warm-up
+    pooled = []
+    for _ in range(rounds):
+        setup = []
+        for code in EXERCISES:
+            result = await runner.run(code, setup)
+            pooled.append(result.elapsed)
+            if result.ok:
+                setup.append(code)
+    limited = {}
+    for name, code in LIMITED.items():
+        result = await runner.run(code)
+        limited[name] = result.status + (": " + result.error.strip().splitlines()[-1] if result.error else "")
+    await runner.close()
+
+    fresh = []
+    for code in EXERCISES[:6]:
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", f"print(repr({code}))"], capture_output=True)
+        fresh.append(time.perf_counter() - start)
+    pooled.sort()
+    fresh.sort()
+    return {
+        "snippets": len(pooled),
+        "pool_p50_ms": pooled[len(pooled) // 2] * 1000,
+        "pool_p95_ms": pooled[int(len(pooled) * 0.95)] * 1000,
+        "fresh_interpreter_p50_ms": fresh[len(fresh) // 2] * 1000,
+        "limits": limited,
+    }
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--worker"]:
+        cpu, memory, wall, limit = sys.argv[2:6]
+        worker_main(int(cpu), int(memory), float(wall), int(limit))
+        sys.exit()
+    if refusal() is not None:
+        sys.exit(f"{refusal()}; run the benchmark as a regular user")
+    results = asyncio.run(benchmark())
+    for name, value in results.items():
+        if isinstance(value, dict):
+            print(f"{name}:")
+            for key, outcome in value.items():
+                print(f"{key:>24}: {outcome}")
+        else:
+            print(f"{name:>24}: {value:.2f}" if isinstance(value, float) else f"{name:>24}: {value}")
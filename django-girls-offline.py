@@ -1,111 +1,105 @@
 import os
 import asyncio
-import re
-from foundry_local import FoundryLocalManager
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
-from ui_rich import TextualChatUI
+from ui_plain import create_chat_ui, wants_plain
 from tutorial_api import tutorial
+from tutorial_session import TutorialSession, create_llm
+from model_scheduler import ModelScheduler
+from endpoint_pool import endpoint_pool
+from model_router import create_router
+from generation_budget import BudgetController
+from model_watchdog import ModelWatchdog
+from metrics import format_metrics
+from loop_latency import LoopLatencyProbe
+from session_journal import SessionJournal
+from code_runner import CodeRunner, refusal
 import traceback
 
 async def main():
-    # Start the Rich UI early
-    ui = TextualChatUI()
+    # Start the UI early (Rich panels, or plain text for pipes and SSH sessions)
+    ui = create_chat_ui()
     await ui.start()
-    
-    manager = FoundryLocalManager("Phi-4-generic-gpu")
-    
-    # LLM pointing to Foundry Local
-    llm = ChatOpenAI(
-        base_url=manager.endpoint,
-        api_key=manager.api_key,
-        model="Phi-4-generic-gpu",
-        temperature=0.1  # Lower temperature for more consistent code generation
-    )
-    
-    # Simpler system message focused on code generation
-    system_message = SystemMessage(content="""You are a Django Girls Tutorial Assistant. You help users learn Django by guiding them through building a blog.
-
-You have access to a tutorial API object. Instead of explaining things yourself, generate Python code to call the tutorial API:
+    # How late the event loop runs timers (shown in /stats)
+    loop_probe = LoopLatencyProbe()
+    loop_probe.start()
 
-Available methods:
-- tutorial.show('topic') - Show tutorial content for: welcome, python_basics, setup, django_install, create_project, create_app, models, admin, views, test
-- tutorial.show('code_type') - Show code for: models_code, views_code, urls_code, template_code, admin_code  
-- tutorial.next_step() - Get the next step suggestion
-- tutorial.help('error message') - Get help with errors
+    # LLM pointing to Foundry Local, behind the request scheduler
+    base_llm = create_llm()
+    # With several endpoints, one request in flight per endpoint
+    pool = endpoint_pool(base_llm)
+    scheduler = ModelScheduler(max_in_flight=len(pool) if pool else 1)
+    llm = scheduler.wrap(base_llm)
 
-When users greet you, generate: tutorial.show('welcome')
-When they ask about Python, generate: tutorial.show('python_basics')
-When they have errors, generate: tutorial.help('their error description')
-If they ask about any topic look for the topic in the available methods above and generate the appropriate tutorial.show('topic') call.
+    # The session keeps the tutorial state and chat history for this learner,
+    # journaled so a restart picks up where the learner left off
+    journal = SessionJournal()
+    # Tool-selection turns are routed without the large model
+    router = create_router()
+    # Per-turn max_tokens, stop sequences and timeouts, adapted to observed lengths
+    budgets = BudgetController()
+    # Deadlines, retries and a circuit breaker, so a stalled model can't hang the chat
+    watchdog = ModelWatchdog(probe_llm=llm)
+    # Resource-limited workers for /run (not isolated, see code_runner.py), started in the background
+    runner = CodeRunner()
+    if refusal() is None:
+        asyncio.ensure_future(runner.start())
+    session = TutorialSession(
+        llm, tutorial=tutorial, journal=journal, router=router, budgets=budgets, watchdog=watchdog,
+        runner=runner,
+    )
+    if session.restore():
+        await ui.add_system_markdown(
+            f"Welcome back! You were on **{tutorial.current_step}**. "
+            "Say \"next step\" to continue, or type `/reset` to start over."
+        )
 
-Always respond with simple Python code calling the tutorial API. Keep responses short.""")
-    
-    history = [system_message]
-    
-    # Create a simple execution environment
-    exec_globals = {'tutorial': tutorial}
-    
     await asyncio.sleep(0.1)
-    
+
     while True:
         try:
-            user_text = (await ui.get_user_input()).strip()
+            # Waiting for input blocks the loop; not counted as lag
+            with loop_probe.idle():
+                user_text = (await ui.get_user_input()).strip()
         except (EOFError, KeyboardInterrupt):
             await ui.add_system_markdown("Exiting.")
             break
-        
+
         if not user_text:
             continue
         if user_text.lower() in {"/exit", "/quit"}:
             await ui.add_system_markdown("Goodbye.")
             break
-        
-        # Add user message to history
-        history.append(HumanMessage(content=user_text))
-        
-        # Get LLM response
-        response = await llm.ainvoke(history)
-        
-        # Extract code from response
-        code_match = re.search(r'```python\n(.*?)\n```', response.content, re.DOTALL)
-        if not code_match:
-            # Try to find any line that looks like a tutorial call
-            code_match = re.search(r'(tutorial\.\w+\([^)]*\))', response.content)
-        
-        if code_match:
-            code = code_match.group(1) if '```' not in code_match.group(0) else code_match.group(1)
-            
-            try:
-                # Execute the generated code
-                result = eval(code, exec_globals)
-                
-                # Display the result
-                if result:
-                    await ui.add_agent_markdown(str(result))
-                    
-                    # Add to history for context
-                    history.append(AIMessage(content=f"I called: {code}\n\nResult shown above."))
-                    
-            except Exception as e:
-                await ui.add_system_markdown(f"Error executing code: {e}")
-                # Try to help with the error
-                try:
-                    help_result = tutorial.help(str(e))
-                    await ui.add_agent_markdown(help_result)
-                except:
-                    pass
-        else:
-            # No code found, show the raw response
-            await ui.add_agent_markdown(response.content)
-            history.append(response)
-        
-        # Keep history size manageable for SLM
-        if len(history) > 10:
-            # Keep system message and last 8 exchanges
-            history = [history[0]] + history[-8:]
+        if user_text.lower().split()[0] == "/history":
+            # Earlier messages, a page at a time: /history, /history 2, ...
+            arg = user_text.split()[1:]
+            await ui.show_history(int(arg[0]) if arg and arg[0].isdigit() else 1)
+            continue
+        if user_text.lower() == "/reset":
+            session.reset()
+            await ui.add_system_markdown("Starting the tutorial from the beginning.")
+            continue
+        if user_text.lower() == "/stats":
+            await ui.add_system_markdown(format_metrics({
+                "Model queue": scheduler.metrics(),
+                "Tool calls": session.tool_call_stats.metrics(),
+                "Routing": router.metrics(),
+                "Generation budget": budgets.metrics(),
+                "Model health": watchdog.metrics(),
+                **({"Endpoints": pool.metrics()} if pool else {}),
+                "Code runner": runner.metrics(),
+                "Event loop": loop_probe.metrics(),
+            }))
+            continue
+
+        for reply in await session.handle(user_text):
+            if reply.kind == "system":
+                await ui.add_system_markdown(reply.markdown)
+            else:
+                await ui.add_agent_markdown(reply.markdown)
+
+    journal.close()
+    await runner.close()
 
 if __name__ == "__main__":
-    from visuals import print_welcome_message
-    print_welcome_message()
-    asyncio.run(main())
\ No newline at end of file
+    from visuals import print_plain_welcome, print_welcome_message
+    print_plain_welcome() if wants_plain() else print_welcome_message()
+    asyncio.run(main())
@@ -1,20 +1,34 @@
 import os
 import asyncio
-import json
-import re
+import time
 
-from foundry_local import FoundryLocalManager
 from langgraph.prebuilt import create_react_agent
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, AIMessageChunk
 from langchain_mcp_adapters.tools import load_mcp_tools
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
-from ui_rich import TextualChatUI
-from dj_server import (
+from mcp.client.streamable_http import streamable_http_client
+from ui_plain import create_chat_ui, wants_plain
+from model_scheduler import ModelScheduler
+from endpoint_pool import endpoint_pool
+from model_router import LARGE, MODEL_DOWN_NOTE, MODEL_SLOW_NOTE, ROUTER, Route, answer_without_model, create_router
+from model_watchdog import ModelUnavailable, ModelWatchdog
+from tutorial_api import tutorial
+from generation_budget import BudgetController, response_kind
+from concept_matcher import match_concepts
+from tutorial_session import create_llm
+from metrics import format_metrics
+from loop_latency import LoopLatencyProbe
+from mcp_curriculum import Curriculum
+from code_runner import MAX_SNIPPETS, RUN_USAGE, CodeRunner, parse_run_command, refusal
+from tool_call_parser import ToolCall, parse_tool_calls
+from tool_call_stream import JSON_OBJECT, ToolCallStats, stream_tool_call
+from traceback_digest import compact_error_message
+from django_girls_mcp_server import (
     welcome_tutorial,
     python_introduction,
     explain_programming_concept,
+    diagnose_error,
     setup_environment,
     verify_environment,
     install_django,
@@ -23,69 +37,189 @@ from dj_server import (
     create_post_model,
     setup_admin,
     create_blog_views,
-    test_blog
+    test_blog,
+    next_step,
 )
 import logging 
 
+logger = logging.getLogger(__name__)
+
 # Configure logging to suppress HTTP request logs
 logging.getLogger("httpx").setLevel(logging.WARNING)
 logging.getLogger("httpcore").setLevel(logging.WARNING)
 logging.getLogger("urllib3").setLevel(logging.WARNING)
 logging.getLogger("requests").setLevel(logging.WARNING)
 
-async def execute_function_calls(name, args):
+# Registry of functions that can be called
+TOOLS = {
+    "welcome_tutorial": welcome_tutorial,
+    "python_introduction": python_introduction,
+    "explain_programming_concept": explain_programming_concept,
+    "diagnose_error": diagnose_error,
+    "setup_environment": setup_environment,
+    "verify_environment": verify_environment,
+    "install_django": install_django,
+    "create_django_project": create_django_project,
+    "create_blog_app": create_blog_app,
+    "create_post_model": create_post_model,
+    "setup_admin": setup_admin,
+    "create_blog_views": create_blog_views,
+    "test_blog": test_blog,
+    "next_step": next_step,
+}
+
+# Tool for each routed intent (see model_router.py); the steps are in tutorial order
+INTENT_TOOLS = {
+    "welcome": "welcome_tutorial",
+    "python_basics": "python_introduction",
+    "setup": "setup_environment",
+    "django_install": "install_django",
+    "create_project": "create_django_project",
+    "create_app": "create_blog_app",
+    "models": "create_post_model",
+    "admin": "setup_admin",
+    "views": "create_blog_views",
+    "test": "test_blog",
+    "models_code": "create_post_model",
+    "admin_code": "setup_admin",
+    "views_code": "create_blog_views",
+    "urls_code": "create_blog_views",
+    "template_code": "create_blog_views",
+}
+STEP_TOOLS = list(dict.fromkeys(INTENT_TOOLS.values()))
+
+def next_tool(last_tool):
+    """The step tool after `last_tool` (the first step when there is none)."""
+    index = STEP_TOOLS.index(last_tool) + 1 if last_tool in STEP_TOOLS else 0
+    return STEP_TOOLS[min(index, len(STEP_TOOLS) - 1)]
+
+def routed_tool_call(route: Route, user_text: str, last_tool: str):
+    """The tool call for a routed turn, or None when the large model must answer."""
+    if route.intent == "help":
+        return ToolCall("diagnose_error", {"error": user_text})
+    if route.intent == "next":
+        return ToolCall(next_tool(last_tool))
+    if route.intent is not None:
+        return ToolCall(INTENT_TOOLS[route.intent])
+    if route.explanation and match_concepts(user_text):
+        # Programming concepts have a ready-made explanation
+        return ToolCall("explain_programming_concept", {"concept": user_text})
+    return None
+
+# Step pages prefetched from the MCP server at startup
+curriculum = Curriculum()
+
+async def execute_function_calls(name, args, session=None, last_tool=None):
     """
     Executes the function calls and returns the results
+    (on the MCP server when `session` is given, else in this process)
     """
 
-    # Define the registry of functions that can be called
-    functions = {
-        "welcome_tutorial": welcome_tutorial,
-        "python_introduction": python_introduction,
-        "explain_programming_concept": explain_programming_concept,
-        "setup_environment": setup_environment,
-        "verify_environment": verify_environment,
-        "install_django": install_django,
-        "create_django_project": create_django_project,
-        "create_blog_app": create_blog_app,
-        "create_post_model": create_post_model,
-        "setup_admin": setup_admin,
-        "create_blog_views": create_blog_views,
-        "test_blog": test_blog,
-    }
+    if session is not None:
+        # A classroom server: every call updates its per-learner state (`next_step` relies on it)
+        try:
+            result = await session.call_tool(name, args)
+        except Exception as e:
+            logger.warning("MCP server unreachable, answering %s locally: %r", name, e)
+        else:
+            text = "\n\n".join(block.text for block in result.content if getattr(block, "text", None))
+            if result.isError:
+                raise RuntimeError(text or f"{name} failed on the MCP server")
+            return text
+
+    # Progress is tracked by this client, not by a server
+    if name == "next_step":
+        name, args = next_tool(last_tool), {}
+
+    # Step tools are answered from the prefetched curriculum
+    page = curriculum.tool_result(name, args)
+    if page is not None:
+        return page
 
     # Resolve function by its name
-    function = functions[name]
+    function = TOOLS[name]
 
     # Execute the function call
     result = function(**args)
 
     return result
 
-async def main():
+class AgentTokens:
+    """Adapts the agent's token stream to `stream_tool_call`."""
+
+    def __init__(self, agent):
+        self.agent = agent
+
+    async def astream(self, messages):
+        stream = self.agent.astream({"messages": messages}, stream_mode="messages")
+        try:
+            async for chunk, _metadata in stream:
+                if isinstance(chunk, AIMessageChunk):
+                    yield chunk
+        finally:
+            # Stops the model call when the caller has what it needs
+            await stream.aclose()
+
+class StreamedProse:
+    """Shows the free-form part of a streamed answer while it arrives, as one agent message."""
+
+    def __init__(self, ui):
+        self.ui = ui
+        self.stream = None
+
+    @property
+    def started(self) -> bool:
+        return self.stream is not None
+
+    def feed(self, text: str) -> None:
+        if self.stream is None:
+            if not text.strip():
+                return
+            self.stream = self.ui.stream_agent_markdown()
+        self.stream.feed(text)
+
+    def close(self) -> None:
+        if self.stream is not None:
+            self.stream.close()
+
+def mcp_transport():
+    """A classroom's shared MCP server when DJANGO_GIRLS_MCP_URL is set, else our own on stdio."""
+    url = os.environ.get("DJANGO_GIRLS_MCP_URL")
+    if url:
+        return streamable_http_client(url)
     server_params = StdioServerParameters(
         command="python",
         args=["django_girls_mcp_server.py"],
     )
+    return stdio_client(server_params)
 
-    async with stdio_client(server_params) as (read, write):
+async def main():
+    async with mcp_transport() as (read, write, *_):
         async with ClientSession(read, write) as session:
             await session.initialize()
 
-            # Start the Rich UI early
-            ui = TextualChatUI()
+            # Start the UI early (Rich panels, or plain text for pipes and SSH sessions)
+            ui = create_chat_ui()
             await ui.start()
+            # How late the event loop runs timers (shown in /stats)
+            loop_probe = LoopLatencyProbe()
+            loop_probe.start()
             tools = await load_mcp_tools(session)
+            # Tool calls go to a shared classroom server; our own stdio server runs this code anyway
+            remote_session = session if os.environ.get("DJANGO_GIRLS_MCP_URL") else None
+            # The whole curriculum in two round-trips; step tools are then served locally
+            try:
+                await curriculum.fetch(session)
+            except Exception as e:
+                logger.warning("Curriculum prefetch failed, calling tools instead: %s", e)
 
-            manager = FoundryLocalManager("Phi-4-generic-gpu")
-
-            # LLM pointing to Foundry Local
-            llm = ChatOpenAI(
-                base_url=manager.endpoint,
-                api_key=manager.api_key,
-                model="Phi-4-generic-gpu",
-                temperature=0.1,
-            )
+            # LLM pointing to Foundry Local (model picked for this machine),
+            # behind the request scheduler
+            base_llm = create_llm()
+            # With several endpoints, one request in flight per endpoint
+            pool = endpoint_pool(base_llm)
+            scheduler = ModelScheduler(max_in_flight=len(pool) if pool else 1)
+            llm = scheduler.wrap(base_llm)
             
             # Create the system message with tutorial flow instructions
             system_message = SystemMessage(content=f"""You are a Django Girls Tutorial Assistant. You MUST use the available tools to help users go through the tutorial.
@@ -95,21 +229,41 @@ async def main():
             If the tool doesn't need any arguments, just provide the tool name and an empty parameters object.
             """)
 
-            # Create agent with system message
-            agent = create_react_agent(
-                llm, 
-                tools=tools,
-                state_modifier=system_message
-            )
-            breakpoint()
+            # Per-turn max_tokens, stop sequences and timeouts, adapted to observed lengths
+            budgets = BudgetController()
+            agents = {}
+            # Deadlines, retries and a circuit breaker, so a stalled model can't hang the chat
+            watchdog = ModelWatchdog(probe_llm=llm)
+            # Rlimited workers for /run (off as root), and the snippets that worked so far
+            runner = CodeRunner()
+            if refusal() is None:
+                asyncio.ensure_future(runner.start())
+            snippets = []
+
+            def agent_for(kind):
+                # Create agent with system message; rebuilt only when the budget changes
+                budget = budgets.budget(kind)
+                if agents.get(kind, (None,))[0] != budget:
+                    agents[kind] = (budget, create_react_agent(
+                        budgets.bind(llm, kind),
+                        tools=tools,
+                        state_modifier=system_message
+                    ))
+                return agents[kind][1]
 
             # Wait a moment for the UI to fully initialize
             await asyncio.sleep(0.1)
 
             history = []
+            tool_call_stats = ToolCallStats()
+            # Tool-selection turns are routed without the large model
+            router = create_router()
+            last_tool = None
             while True:
                 try:
-                    user_text = (await ui.get_user_input()).strip()
+                    # Waiting for input blocks the loop; not counted as lag
+                    with loop_probe.idle():
+                        user_text = (await ui.get_user_input()).strip()
                 except (EOFError, KeyboardInterrupt):
                     await ui.add_system_markdown("Exiting.")
                     break
@@ -119,57 +273,124 @@ async def main():
                 if user_text.lower() in {"/exit", "/quit"}:
                     await ui.add_system_markdown("Goodbye.")
                     break
+                if user_text.lower().split()[0] == "/history":
+                    # Earlier messages, a page at a time: /history, /history 2, ...
+                    arg = user_text.split()[1:]
+                    await ui.show_history(int(arg[0]) if arg and arg[0].isdigit() else 1)
+                    continue
+                if user_text.lower() == "/stats":
+                    await ui.add_system_markdown(format_metrics({
+                        "Model queue": scheduler.metrics(),
+                        "Tool calls": tool_call_stats.metrics(),
+                        "Routing": router.metrics(),
+                        "Generation budget": budgets.metrics(),
+                        "Model health": watchdog.metrics(),
+                        **({"Endpoints": pool.metrics()} if pool else {}),
+                        "Code runner": runner.metrics(),
+                        "Curriculum": curriculum.metrics(),
+                        "Event loop": loop_probe.metrics(),
+                    }))
+                    continue
+                code = parse_run_command(user_text)
+                if code is not None:
+                    # Python exercises run in the code runner, errors explained by the tutorial's help
+                    if not code:
+                        await ui.add_system_markdown(RUN_USAGE)
+                        continue
+                    result = await runner.run(code, snippets)
+                    await ui.add_agent_markdown(result.markdown())
+                    if result.ok:
+                        snippets.append(code)
+                        del snippets[:-MAX_SNIPPETS]
+                    elif result.status == "error":
+                        await ui.add_agent_markdown(tutorial.help(result.error))
+                    continue
                 # Send only the conversation history with the new user input
                 # Add user message to history
-                history.append(HumanMessage(content=user_text))
-                response = await agent.ainvoke({"messages":history})
-
-                content = response["messages"][-1].content
-
-                # Extract code from response
-                json_content = re.sub(r"^```json\n|\n```$", "", content)
-                
-                if json_content: 
-                    # Parse the JSON
-                    tool_call = json.loads(json_content)
-                    
-                    if type(tool_call) is not list:
-                        tool_call = [tool_call]
-
-                    for tool in tool_call:
-                        # Extract tool name and parameters
-                        tool_name = tool.get("action") or tool.get("function", {}).get("name") or tool.get("function_call", {}).get("name")
-                        tool_params = tool.get("parameters") or tool.get("arguments", {}) or tool.get("function_call", {}).get("arguments" or "parameters", {}) or tool.get("function", {}).get("arguments" or "parameters", {})
-                        
-                        if tool_name and tool_name: 
-                            try:
-                                # Execute the tool
-                                tool_result = await execute_function_calls(tool_name, tool_params)
-                                
-                                # Display the result
-                                if tool_result:
-                                    await ui.add_agent_markdown(str(tool_result))
-                                    
-                                    # Add to history for context
-                                    history.append(AIMessage(content=f"I called: {tool_name}\n\n"))
-                                
-                            except Exception as e:
-                                await ui.add_system_markdown(f"Error getting tool: {e}")
-                        else:
-                            # No tool found, show the raw response
-                            await ui.add_agent_markdown(content)
-                            history.append(response)
+                history.append(HumanMessage(content=compact_error_message(user_text)))
+                streamed = False
+                route_start = time.perf_counter()
+                route = await router.route(user_text)
+                routed = routed_tool_call(route, user_text, last_tool)
+                if routed is not None:
+                    if route.tier == LARGE:
+                        # A concept question answered from the concept matcher
+                        router.record(ROUTER, time.perf_counter() - route_start)
+                    tool_calls = [routed]
+                else:
+                    # Stream the answer and stop as soon as the JSON tool object is complete
+                    kind = response_kind(route, user_text)
+                    timeout = budgets.budget(kind).timeout
+                    # Prose before any tool call is rendered as it streams
+                    prose = StreamedProse(ui)
+                    start = time.perf_counter()
+                    try:
+                        answer = await stream_tool_call(
+                            watchdog.guard(AgentTokens(agent_for(kind))), history, kind=JSON_OBJECT,
+                            stats=tool_call_stats, timeout=timeout, on_text=prose.feed, registry=TOOLS,
+                        )
+                    except ModelUnavailable:
+                        # Answer from the tutorial content until the model is back
+                        prose.close()
+                        await ui.add_system_markdown(MODEL_DOWN_NOTE)
+                        await ui.add_agent_markdown(answer_without_model(user_text, tutorial))
+                        continue
+                    if answer.timed_out:
+                        # A partial reply is not an answer, and its length says nothing about the budget
+                        prose.close()
+                        watchdog.report_failure(f"no answer within {timeout:.0f}s")
+                        await ui.add_system_markdown(MODEL_SLOW_NOTE)
+                        await ui.add_agent_markdown(answer_without_model(user_text, tutorial))
+                        continue
+                    router.record(LARGE, time.perf_counter() - start)
+                    budgets.observe(kind, answer.tokens, truncated=answer.finish_reason == "length")
+
+                    content = answer.content
+                    response = AIMessage(content=content)
+
+                    # Find the tool calls, repairing malformed JSON locally
+                    tool_calls = parse_tool_calls(content, TOOLS)
+                    if not tool_calls and prose.started:
+                        # Not a call after all: finish the answer in the same message
+                        prose.feed(content[answer.shown:])
+                    prose.close()
+                    streamed = prose.started
+
+                if tool_calls:
+                    for tool_call in tool_calls:
+                        try:
+                            # Execute the tool
+                            tool_result = await execute_function_calls(
+                                tool_call.name, tool_call.arguments, remote_session, last_tool,
+                            )
+
+                            # Display the result
+                            if tool_result:
+                                await ui.add_agent_markdown(str(tool_result))
+
+                                # Add to history for context
+                                history.append(AIMessage(content=f"I called: {tool_call.name}\n\n"))
+                                if tool_call.name in STEP_TOOLS:
+                                    last_tool = tool_call.name
+                                elif tool_call.name == "next_step":
+                                    last_tool = next_tool(last_tool)
+
+                        except Exception as e:
+                            await ui.add_system_markdown(f"Error getting tool: {e}")
                 else:
-                    # No code found, show the raw response
-                    await ui.add_agent_markdown(content)
+                    # No tool call found, show the raw response (unless it was streamed)
+                    if not streamed:
+                        await ui.add_agent_markdown(content)
                     history.append(response)
-                
+
                 # Keep history size manageable for SLM
                 if len(history) > 10:
                     # Keep system message and last 8 exchanges
                     history = [history[0]] + history[-8:]
 
+            await runner.close()
+
 if __name__ == "__main__":
-    from visuals import print_welcome_message
-    print_welcome_message()
+    from visuals import print_plain_welcome, print_welcome_message
+    print_plain_welcome() if wants_plain() else print_welcome_message()
     asyncio.run(main())               
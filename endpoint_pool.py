@@ -0,0 +1,435 @@
+"""
+Client-side load balancing across several local inference servers.
+
+In a classroom, two or three Foundry Local instances can run on the bigger
+machines (or on different ports of one). `EndpointPool` spreads model calls
+over them:
+
+- each backend keeps its own client, so HTTP connections to an endpoint
+  are reused across turns;
+- a request goes to the backend with the fewest requests outstanding
+  (`LEAST_OUTSTANDING`), or to the one with the lowest expected wait,
+  latency EWMA × (outstanding + 1) (`EWMA`);
+- a backend that fails with a connection error, a timeout or a 5xx is
+  drained: no new requests go to it, and the turn that hit the failure is
+  retried on another backend. A stream is only failed over before its
+  first token. After that the learner has already seen part of the reply.
+  Any other error (a 4xx, a bad request, a bug in the caller) is raised at
+  once, since every backend would reject the request the same way;
+- a drained backend is health-checked with a cheap `GET /models`. While an
+  event loop is running, a background task probes every `health_interval`
+  seconds. Otherwise the backend is tried again once `retry_after` seconds
+  have passed, and the wait doubles after each failed retry.
+
+Set DJANGO_GIRLS_ENDPOINTS to a comma-separated list of OpenAI-compatible
+base URLs (DJANGO_GIRLS_MODEL names the model) and `create_llm()` returns a
+`BalancedChatModel` over them. `python endpoint_pool.py` replays a classroom
+against simulated backends of different speeds, one of which dies halfway.
+"""
+import asyncio
+import functools
+import itertools
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk, BaseMessageChunk
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+
+logger = logging.getLogger(__name__)
+
+LEAST_OUTSTANDING = "least_outstanding"
+EWMA = "ewma"
+ROUND_ROBIN = "round_robin"  # baseline for the benchmark
+
+
+class NoHealthyEndpoint(Exception):
+    """Every backend is drained (or already failed this request)."""
+
+
+@functools.lru_cache(maxsize=None)
+def _transport_errors() -> tuple:
+    errors = [OSError, asyncio.TimeoutError]  # OSError covers ConnectionError and TimeoutError
+    try:
+        import httpx
+
+        errors.append(httpx.TransportError)
+    except ImportError:
+        pass
+    try:
+        import openai
+
+        errors.append(openai.APIConnectionError)  # includes APITimeoutError
+    except ImportError:
+        pass
+    return tuple(errors)
+
+
+def retryable(error: BaseException) -> bool:
+    """Whether another backend could succeed: connection errors, timeouts and 5xx responses."""
+    if isinstance(error, _transport_errors()):
+        return True
+    # openai.APIStatusError carries status_code, httpx.HTTPStatusError its response
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return isinstance(status, int) and status >= 500
+
+
+@dataclass(eq=False)
+class Backend:
+    endpoint: str
+    model_id: str
+    client: Any                 # whatever the caller talks to: ChatOpenAI, openai.OpenAI, ...
+    api_key: str = "not-needed"
+    outstanding: int = 0
+    latency: Optional[float] = None   # EWMA of time to first token (streams) or to the result
+    healthy: bool = True
+    retry_at: float = 0.0
+    retry_delay: float = 0.0
+    requests: int = 0
+    failures: int = 0
+
+
+class EndpointPool:
+    """Picks a backend per request and fails over when one breaks.
+
+    Args:
+        backends: The `Backend`s to balance over.
+        policy (str): `LEAST_OUTSTANDING`, `EWMA` or `ROUND_ROBIN`.
+        health_interval (float): Seconds between probes of a drained backend.
+        retry_after (float): First wait before a drained backend is tried again
+            when no probe task is running.
+        probe: Callable `probe(backend)` that raises if the backend is down
+            (default: `GET {endpoint}/models`).
+    """
+
+    def __init__(
+        self,
+        backends: Sequence[Backend],
+        policy: str = LEAST_OUTSTANDING,
+        health_interval: float = 5.0,
+        retry_after: float = 5.0,
+        probe: Optional[Callable[[Backend], Any]] = None,
+    ):
+        if not backends:
+            raise ValueError("EndpointPool needs at least one backend")
+        self.backends = list(backends)
+        self.policy = policy
+        self.health_interval = health_interval
+        self.retry_after = retry_after
+        self.probe = probe or _list_models
+        self.failovers = 0
+        self._rotation = itertools.count()
+        self._prober: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_choices(cls, choices, make_client: Callable[[Any], Any], **kwargs) -> "EndpointPool":
+        """One backend per `ModelChoice`, with a client built by `make_client(choice)`."""
+        return cls(
+            [Backend(c.endpoint, c.model_id, make_client(c), api_key=c.api_key) for c in choices],
+            **kwargs,
+        )
+
+    def __len__(self) -> int:
+        return len(self.backends)
+
+    # ----------------------------------------------------------------------------------
+    # Selection
+    # ----------------------------------------------------------------------------------
+
+    def acquire(self, exclude: Sequence[Backend] = ()) -> Backend:
+        """Pick a backend and count the request as outstanding on it."""
+        now = time.monotonic()
+        candidates = [b for b in self.backends if b not in exclude and (b.healthy or now >= b.retry_at)]
+        if not candidates:
+            raise NoHealthyEndpoint("No model endpoint is answering")
+        # Prefer healthy backends; a drained one past its retry time is a last resort
+        healthy = [b for b in candidates if b.healthy]
+        candidates = healthy or candidates
+
+        if self.policy == ROUND_ROBIN:
+            backend = candidates[next(self._rotation) % len(candidates)]
+        else:
+            # Rotating the start breaks ties, so idle backends share the first requests
+            offset = next(self._rotation) % len(candidates)
+            ordered = candidates[offset:] + candidates[:offset]
+            backend = min(ordered, key=self._score)
+        backend.outstanding += 1
+        backend.requests += 1
+        return backend
+
+    def release(self, backend: Backend, seconds: Optional[float] = None,
+                error: Optional[BaseException] = None) -> None:
+        """End a request: update the latency estimate, or drain the backend on failure."""
+        backend.outstanding -= 1
+        if error is not None:
+            self._drain(backend, error)
+            return
+        if seconds is None:
+            return  # cancelled or unmeasured: says nothing about the backend
+        backend.latency = seconds if backend.latency is None else backend.latency + 0.3 * (seconds - backend.latency)
+        if not backend.healthy:
+            self._restore(backend)
+
+    def _score(self, backend: Backend):
+        if self.policy == EWMA:
+            # Unmeasured backends score 0 so each gets tried early
+            return (backend.latency or 0.0) * (backend.outstanding + 1), backend.outstanding
+        return backend.outstanding, backend.latency or 0.0
+
+    # ----------------------------------------------------------------------------------
+    # Calls with failover
+    # ----------------------------------------------------------------------------------
+
+    async def arun(self, call: Callable[[Backend], Any]):
+        """`await call(backend)`, retried on the next backend if it fails retryably."""
+        tried: List[Backend] = []
+        while True:
+            backend = self._next(tried)
+            start = time.perf_counter()
+            try:
+                result = await call(backend)
+            except Exception as e:
+                if not retryable(e):
+                    self.release(backend)
+                    raise
+                self.release(backend, error=e)
+                continue
+            except BaseException:
+                self.release(backend)
+                raise
+            self.release(backend, time.perf_counter() - start)
+            return result
+
+    async def astream(self, call: Callable[[Backend], Any]):
+        """Stream `call(backend)`; fails over to another backend until the first chunk arrives."""
+        tried: List[Backend] = []
+        while True:
+            backend = self._next(tried)
+            start = time.perf_counter()
+            first = None
+            error = None
+            stream = None
+            try:
+                stream = call(backend)
+                async for chunk in stream:
+                    if first is None:
+                        first = time.perf_counter() - start
+                    yield chunk
+            except Exception as e:
+                if retryable(e):
+                    error = e
+                if error is None or first is not None:
+                    raise
+            finally:
+                if hasattr(stream, "aclose"):
+                    await stream.aclose()
+                self.release(backend, first, error)
+            if error is None:
+                return
+
+    def stream(self, call: Callable[[Backend], Any]):
+        """Synchronous `astream()`, for plain `openai.OpenAI` clients."""
+        tried: List[Backend] = []
+        while True:
+            backend = self._next(tried)
+            start = time.perf_counter()
+            first = None
+            error = None
+            stream = None
+            try:
+                stream = call(backend)
+                for chunk in stream:
+                    if first is None:
+                        first = time.perf_counter() - start
+                    yield chunk
+            except Exception as e:
+                if retryable(e):
+                    error = e
+                if error is None or first is not None:
+                    raise
+            finally:
+                if hasattr(stream, "close"):
+                    stream.close()
+                self.release(backend, first, error)
+            if error is None:
+                return
+
+    def _next(self, tried: List[Backend]) -> Backend:
+        if tried:
+            self.failovers += 1
+            logger.warning("Retrying the request on another endpoint (%d tried)", len(tried))
+        backend = self.acquire(exclude=tried)
+        tried.append(backend)
+        return backend
+
+    # ----------------------------------------------------------------------------------
+    # Health
+    # ----------------------------------------------------------------------------------
+
+    def _drain(self, backend: Backend, error: BaseException) -> None:
+        backend.failures += 1
+        backend.retry_delay = min(max(backend.retry_delay * 2, self.retry_after), 60.0)
+        backend.retry_at = time.monotonic() + backend.retry_delay
+        if backend.healthy:
+            logger.warning("Draining %s: %r", backend.endpoint, error)
+            backend.healthy = False
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # no loop: retried passively once retry_at passes
+        if self._prober is None or self._prober.done():
+            self._prober = loop.create_task(self._probe_loop())
+
+    def _restore(self, backend: Backend) -> None:
+        logger.info("%s is answering again", backend.endpoint)
+        backend.healthy = True
+        backend.retry_delay = 0.0
+
+    async def _probe_loop(self) -> None:
+        while any(not b.healthy for b in self.backends):
+            await asyncio.sleep(self.health_interval)
+            for backend in [b for b in self.backends if not b.healthy]:
+                try:
+                    await asyncio.wait_for(asyncio.to_thread(self.probe, backend), self.health_interval)
+                except Exception as e:
+                    logger.debug("Probe of %s failed: %r", backend.endpoint, e)
+                    continue
+                self._restore(backend)
+
+    def metrics(self) -> Dict[str, float]:
+        figures = {
+            "endpoints": len(self.backends),
+            "healthy": sum(b.healthy for b in self.backends),
+            "failovers": self.failovers,
+        }
+        for i, backend in enumerate(self.backends, 1):
+            figures[f"endpoint{i}_requests"] = backend.requests
+            figures[f"endpoint{i}_outstanding"] = backend.outstanding
+            figures[f"endpoint{i}_latency_ms"] = (backend.latency or 0.0) * 1000
+            figures[f"endpoint{i}_failures"] = backend.failures
+        return figures
+
+
+def _list_models(backend: Backend) -> None:
+    import httpx
+
+    response = httpx.get(
+        backend.endpoint.rstrip("/") + "/models",
+        headers={"Authorization": f"Bearer {backend.api_key}"},
+        timeout=2.0,
+    )
+    response.raise_for_status()
+
+
+class BalancedChatModel(BaseChatModel):
+    """LangChain chat model whose calls go to the `EndpointPool`'s backends.
+
+    Each backend's client is a chat model (normally a `ChatOpenAI` per
+    endpoint), so agents, `bind()` and `bind_tools()` work unchanged.
+    """
+
+    pool: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return "balanced-" + self.pool.backends[0].client._llm_type
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        # Synchronous calls are not used by the tutorial; no failover
+        backend = self.pool.acquire()
+        try:
+            result = backend.client.generate([messages], stop=stop, **kwargs)
+        finally:
+            self.pool.release(backend)
+        return ChatResult(generations=result.generations[0], llm_output=result.llm_output)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        result = await self.pool.arun(lambda b: b.client.agenerate([messages], stop=stop, **kwargs))
+        return ChatResult(generations=result.generations[0], llm_output=result.llm_output)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        async for chunk in self.pool.astream(lambda b: b.client.astream(messages, stop=stop, **kwargs)):
+            if not isinstance(chunk, BaseMessageChunk):
+                chunk = AIMessageChunk(content=chunk.content, additional_kwargs=chunk.additional_kwargs)
+            yield ChatGenerationChunk(message=chunk)
+
+    def bind_tools(self, tools, **kwargs):
+        # The backends share a model, so any of them can format the tools
+        return self.bind(**self.pool.backends[0].client.bind_tools(tools, **kwargs).kwargs)
+
+
+def endpoint_pool(llm) -> Optional[EndpointPool]:
+    """The pool behind `llm` (possibly wrapped by the scheduler), if it is balanced."""
+    llm = getattr(llm, "llm", llm)
+    return getattr(llm, "pool", None)
+
+
+def benchmark(turns: int = 200, rate: float = 30.0, seed: int = 3) -> Dict[str, Dict[str, float]]:
+    """Replay learner turns over three simulated backends; the fastest one dies halfway.
+
+    Turns arrive at random (`rate` per second on average) whether or not
+    earlier ones have finished, like a classroom does.
+    """
+    import random
+
+    speeds = [0.002, 0.004, 0.008]  # seconds per token; Foundry Local decodes one request at a time
+
+    class FakeServer:
+        def __init__(self, speed):
+            self.speed = speed
+            self.lock = asyncio.Lock()
+            self.dead = False
+
+        async def astream(self, tokens):
+            if self.dead:
+                raise ConnectionError("connection refused")
+            async with self.lock:
+                for _ in range(tokens):
+                    await asyncio.sleep(self.speed)
+                    yield "token"
+
+    async def run(policy: str) -> Dict[str, float]:
+        rng = random.Random(seed)
+        servers = [FakeServer(s) for s in speeds]
+        pool = EndpointPool([Backend(f"http://server{i}", "model", s) for i, s in enumerate(servers)],
+                            policy=policy, health_interval=60)
+        latencies: List[float] = []
+        dropped = 0
+
+        async def turn(tokens: int):
+            nonlocal dropped
+            start = time.perf_counter()
+            try:
+                async for _ in pool.astream(lambda b: b.client.astream(tokens)):
+                    pass
+            except Exception:
+                dropped += 1
+                return
+            latencies.append(time.perf_counter() - start)
+
+        tasks = []
+        for i in range(turns):
+            if i == turns // 2:
+                servers[0].dead = True
+            tasks.append(asyncio.ensure_future(turn(rng.randint(5, 15))))
+            await asyncio.sleep(rng.expovariate(rate))
+        await asyncio.gather(*tasks)
+        latencies.sort()
+        return {
+            "p50_ms": latencies[len(latencies) // 2] * 1000,
+            "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+            "dropped_turns": dropped,
+            "failovers": pool.failovers,
+        }
+
+    return {policy: asyncio.run(run(policy)) for policy in (ROUND_ROBIN, LEAST_OUTSTANDING, EWMA)}
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.ERROR)
+    for policy, figures in benchmark().items():
+        print(f"{policy:>18}: " + ", ".join(f"{name} {value:.0f}" for name, value in figures.items()))
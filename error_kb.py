@@ -0,0 +1,623 @@
+"""
+Error-signature knowledge base behind `TutorialAPI.help` and the MCP
+`diagnose_error` tool.
+
+Most errors learners paste are ones every coach has seen a hundred times. The
+knowledge base is a table of signatures: an exception type (or None for shell
+and pip output), a regex for the message, the context it belongs to, and the
+fix to show. Lookups go through a single compiled matcher over each
+signature's anchor (its exception name, or the literal start of its pattern)
+to find candidates, then only those candidates' precompiled regexes run.
+Results are ranked by specificity: matching the exception type, the length of
+the message pattern and the framework context all count, so
+`OperationalError: no such table: blog_post` beats a generic
+`OperationalError` answer.
+
+Run `python error_kb.py` to benchmark lookups on a corpus of real tracebacks.
+"""
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+@dataclass(frozen=True)
+class ErrorSignature:
+    name: str
+    exception: Optional[str]
+    pattern: str
+    context: str
+    fix: str
+
+
+@dataclass(frozen=True)
+class ErrorMatch:
+    signature: ErrorSignature
+    score: float
+
+
+ACTIVATE = (
+    "Your virtual environment isn't active. Run `source blog_env/bin/activate` (Mac/Linux) "
+    "or `blog_env\\Scripts\\activate` (Windows), then try again."
+)
+MIGRATE = "Run migrations: `python manage.py makemigrations` and then `python manage.py migrate`."
+TEMPLATE_PATH = (
+    "Django looks for templates in `blog/templates/blog/`. Check the folder names and that the file is "
+    "called `post_list.html` (not `post_list.html.txt`)."
+)
+
+# --------------------------------------------------------------------------------------
+# HAND-WRITTEN SIGNATURES
+# (name, exception, message regex, context, fix)
+# --------------------------------------------------------------------------------------
+
+_SIGNATURES: List[Tuple[str, Optional[str], str, str, str]] = [
+    # ---- Python basics -------------------------------------------------------------
+    ("name-undefined", "NameError", r"name '\w+' is not defined", "python",
+     "Python doesn't know that name yet. Check the spelling, and make sure you created the variable (or imported it) before using it."),
+    ("name-print-py2", "SyntaxError", r"Missing parentheses in call to 'print'", "python",
+     "In Python 3 `print` needs parentheses: `print(\"Hello\")`."),
+    ("syntax-missing-colon", "SyntaxError", r"expected ':'", "python",
+     "Lines starting with `if`, `for`, `while`, `def` or `class` must end with a colon `:`."),
+    ("syntax-unterminated-string", "SyntaxError", r"unterminated string literal", "python",
+     "A string is missing its closing quote. Every `\"` or `'` needs a partner."),
+    ("syntax-eol-string", "SyntaxError", r"EOL while scanning string literal", "python",
+     "A string is missing its closing quote. Every `\"` or `'` needs a partner."),
+    ("syntax-unmatched-paren", "SyntaxError", r"unmatched '[)\]}]'", "python",
+     "There's a closing bracket without an opening one. Count your `(` and `)`."),
+    ("syntax-unclosed-paren", "SyntaxError", r"'[(\[{]' was never closed", "python",
+     "A bracket was opened but never closed. Add the missing `)`, `]` or `}`."),
+    ("syntax-eof", "SyntaxError", r"unexpected EOF while parsing", "python",
+     "Python reached the end of your code while still waiting for something, usually a closing bracket or quote."),
+    ("syntax-assign-compare", "SyntaxError", r"invalid syntax\. Maybe you meant '==' or ':=' instead of '='", "python",
+     "Use `==` to compare values and `=` only to store a value in a variable."),
+    ("syntax-prompt-pasted", "SyntaxError", r">>>", "python",
+     "Don't type the `>>>` - that's the interpreter's prompt. Type only the code after it."),
+    ("syntax-invalid", "SyntaxError", r"invalid syntax", "python",
+     "Python couldn't understand this line. Look for a missing colon, quote or bracket just before the `^` marker."),
+    ("indent-unexpected", "IndentationError", r"unexpected indent", "python",
+     "This line has spaces at the start that Python didn't expect. Line it up with the code around it."),
+    ("indent-expected", "IndentationError", r"expected an indented block", "python",
+     "After a line ending in `:` the next line must be indented (4 spaces)."),
+    ("indent-unindent", "IndentationError", r"unindent does not match any outer indentation level", "python",
+     "The indentation of this line doesn't line up with the lines above. Use 4 spaces per level consistently."),
+    ("indent-tabs", "TabError", r"inconsistent use of tabs and spaces", "python",
+     "You mixed tabs and spaces. Configure your editor to insert 4 spaces and re-indent the block."),
+    ("type-concat-int", "TypeError", r"can only concatenate str \(not \"int\"\) to str", "python",
+     "You can't add text and a number. Convert the number first: `\"Age: \" + str(age)`."),
+    ("type-concat-str", "TypeError", r"unsupported operand type\(s\) for \+: 'int' and 'str'", "python",
+     "You can't add a number and text. Convert one of them: `int(\"5\")` or `str(5)`."),
+    ("type-not-callable", "TypeError", r"'\w+' object is not callable", "python",
+     "You're calling something that isn't a function - maybe a variable has the same name as a function, or there are extra `()`."),
+    ("type-not-subscriptable", "TypeError", r"'\w+' object is not subscriptable", "python",
+     "You used `[ ]` on something that isn't a list, string or dictionary."),
+    ("type-missing-arg", "TypeError", r"missing \d+ required positional argument", "python",
+     "The function needs more arguments than you gave it. Check what it expects inside the `( )`."),
+    ("type-too-many-args", "TypeError", r"takes \d+ positional arguments? but \d+ (?:were|was) given", "python",
+     "You passed too many arguments. If it's a method, remember `self` is passed automatically."),
+    ("index-out-of-range", "IndexError", r"list index out of range", "python",
+     "You asked for an item past the end of the list. Lists start counting at 0, so the last item of a 3-item list is `[2]`."),
+    ("string-index-out-of-range", "IndexError", r"string index out of range", "python",
+     "You asked for a character past the end of the string. Counting starts at 0."),
+    ("key-error", "KeyError", r"'?\w+'?", "python",
+     "That key isn't in the dictionary. Check the spelling, or use `.get('key')` to avoid the error."),
+    ("zero-division", "ZeroDivisionError", r"division by zero", "python",
+     "You divided by zero - even computers can't do that!"),
+    ("value-int", "ValueError", r"invalid literal for int\(\) with base 10", "python",
+     "`int()` only works on text that contains a whole number, like `int(\"42\")`."),
+    ("value-float", "ValueError", r"could not convert string to float", "python",
+     "`float()` only works on text that contains a number, like `float(\"3.5\")`."),
+    ("attr-none", "AttributeError", r"'NoneType' object has no attribute '\w+'", "python",
+     "Something you expected to have a value is `None`. Often a function forgot to `return` its result."),
+    ("attr-str-append", "AttributeError", r"'str' object has no attribute 'append'", "python",
+     "Strings don't have `append` - that's for lists. Use `+` to join strings."),
+    ("attr-list-lower", "AttributeError", r"'list' object has no attribute '(?:lower|upper|split)'", "python",
+     "That's a string method, but you have a list. Loop over the list and call it on each item."),
+    ("attr-generic", "AttributeError", r"has no attribute '\w+'", "python",
+     "That object doesn't have that attribute or method. Check the spelling and capitalisation."),
+    ("unbound-local", "UnboundLocalError", r"local variable '\w+' referenced before assignment", "python",
+     "You used a variable inside a function before giving it a value there."),
+    ("recursion", "RecursionError", r"maximum recursion depth exceeded", "python",
+     "A function keeps calling itself forever. Check the condition that should stop it - or a `save()` that calls itself."),
+    ("file-not-found", "FileNotFoundError", r"No such file or directory", "python",
+     "Python can't find that file. Check you're in the right folder (`pwd` / `cd`) and the file name is spelled right."),
+    ("no-module-hint", None, r"no module named", "python",
+     "Python can't find that module. " + ACTIVATE + " Then install the missing package with `pip install <name>`."),
+    ("import-cannot-name", "ImportError", r"cannot import name '\w+'", "python",
+     "The module exists, but the thing you're importing isn't in it. Check spelling and that you saved the file."),
+    ("import-circular", "ImportError", r"partially initialized module .* circular import", "python",
+     "Two files import each other. Move one import inside a function, or don't name your file like a library (e.g. `django.py`)."),
+    ("keyboard-interrupt", "KeyboardInterrupt", r"", "python",
+     "You pressed Ctrl+C, which stops the running program. That's fine - run it again when you're ready."),
+
+    # ---- Shell and virtual environments --------------------------------------------
+    ("venv-not-created", None, r"blog_env/bin/activate: No such file or directory", "venv",
+     "The virtual environment doesn't exist here. Create it with `python3 -m venv blog_env` in your project folder."),
+    ("venv-win-not-created", None, r"blog_env\\Scripts\\activate' is not recognized", "venv",
+     "The virtual environment doesn't exist here. Create it with `python -m venv blog_env` in your project folder."),
+    ("venv-powershell-policy", None, r"running scripts is disabled on this system", "venv",
+     "PowerShell blocks scripts by default. Run `Set-ExecutionPolicy -Scope CurrentUser RemoteSigned`, then activate again."),
+    ("venv-ensurepip", None, r"ensurepip is not available", "venv",
+     "Your system Python is missing venv support. On Debian/Ubuntu run `sudo apt install python3-venv`."),
+    ("venv-source-sh", None, r"source: not found", "venv",
+     "Your shell doesn't know `source`. Use `. blog_env/bin/activate` instead."),
+    ("pip-externally-managed", None, r"externally-managed-environment", "pip",
+     "Your system Python is protected. " + ACTIVATE),
+    ("pip-permission", None, r"Could not install packages due to an OSError: \[Errno 13\] Permission denied", "pip",
+     "pip tried to install system-wide. " + ACTIVATE),
+    ("pip-no-version", None, r"Could not find a version that satisfies the requirement", "pip",
+     "pip couldn't download the package. Check the spelling and your internet connection - or ask your coach for the offline wheelhouse (`python wheelhouse.py install`)."),
+    ("pip-no-distribution", None, r"No matching distribution found for", "pip",
+     "pip couldn't download the package. Check the spelling and your internet connection - or ask your coach for the offline wheelhouse (`python wheelhouse.py install`)."),
+    ("pip-network", None, r"Failed to establish a new connection", "pip",
+     "No internet connection. Ask your coach for the offline wheelhouse and run `python wheelhouse.py install`."),
+    ("pip-timeout", None, r"ReadTimeoutError: HTTPSConnectionPool", "pip",
+     "The download timed out (busy Wi-Fi?). Try again, or install from the offline wheelhouse: `python wheelhouse.py install`."),
+    ("pip-ssl", None, r"SSL: CERTIFICATE_VERIFY_FAILED", "pip",
+     "Your network is intercepting secure connections. Ask your coach for the offline wheelhouse (`python wheelhouse.py install`)."),
+    ("pip-old", None, r"You are using pip version", "pip",
+     "Just a warning - you can upgrade with `python -m pip install --upgrade pip`, but it's safe to continue."),
+    ("python-store-alias", None, r"Python was not found; run without arguments to install from the Microsoft Store", "shell",
+     "Windows doesn't have Python installed yet. Install it from python.org and tick \"Add python.exe to PATH\"."),
+    ("shell-permission", None, r"Permission denied", "shell",
+     "You don't have permission for that. Make sure you're working inside your own project folder, not a system folder."),
+    ("shell-not-a-dir", None, r"Not a directory", "shell",
+     "That path is a file, not a folder. Check it with `ls`."),
+
+    # ---- Django: installation, projects and management commands --------------------
+    ("django-not-found", None, r"django (?:is )?not found", "django",
+     "Django isn't installed in this environment. " + ACTIVATE + " If it is active, run `pip install django`."),
+    ("django-couldnt-import", "ImportError", r"Couldn't import Django", "django",
+     "Django isn't available. " + ACTIVATE + " If it still fails, run `pip install django`."),
+    ("startproject-conflict", "CommandError", r"'\w+' conflicts with the name of an existing Python module", "django",
+     "Pick another project name - that one is already used by Python. The tutorial uses `mysite`."),
+    ("startproject-exists", "CommandError", r"'[^']+' already exists", "django",
+     "You already created this. Look around with `ls` - you probably don't need to run the command again."),
+    ("startproject-invalid-name", "CommandError", r"is not a valid (?:project|app) name", "django",
+     "Names can only use letters, numbers and underscores, and can't start with a number. Try `mysite` or `blog`."),
+    ("manage-not-found", None, r"can't open file '.*manage\.py'", "django",
+     "You're not in the project folder. `cd` into the folder that contains `manage.py` (check with `ls`)."),
+    ("manage-unknown-command", None, r"Unknown command: '\w+'", "django",
+     "That `manage.py` command doesn't exist - check the spelling: `runserver`, `makemigrations`, `migrate`, `createsuperuser`."),
+    ("runserver-port", None, r"That port is already in use", "django",
+     "Another server is already running. Stop it with Ctrl+C in its terminal, or use another port: `python manage.py runserver 8001`."),
+    ("runserver-unapplied", None, r"You have \d+ unapplied migration", "django",
+     "Django's database tables aren't created yet. " + MIGRATE),
+    ("migrate-no-changes", None, r"No changes detected", "django",
+     "Django didn't see any model changes. Did you save `blog/models.py` and add `'blog'` to `INSTALLED_APPS`? Try `python manage.py makemigrations blog`."),
+    ("migrate-non-nullable", None, r"trying to add a non-nullable field '\w+' to \w+ without a default", "django",
+     "Your table already has rows. Choose option 1 and give a one-off default, or delete `db.sqlite3` and the migration files if you're just experimenting."),
+    ("migrate-conflict", "CommandError", r"Conflicting migrations detected", "django",
+     "Two migrations were created in parallel. Run `python manage.py makemigrations --merge`."),
+    ("migrate-inconsistent", "InconsistentMigrationHistory", r"is applied before its dependency", "django",
+     "The migration history is tangled. While learning, the quickest fix is deleting `db.sqlite3` and running `python manage.py migrate` again."),
+    ("migrate-app-no-migrations", "CommandError", r"App '\w+' does not have migrations", "django",
+     "Create them first: `python manage.py makemigrations blog`."),
+    ("superuser-tty", None, r"Superuser creation skipped due to not running in a TTY", "django",
+     "Your terminal isn't interactive (common in Git Bash). Run `winpty python manage.py createsuperuser`."),
+    ("superuser-taken", None, r"That username is already taken", "django",
+     "That admin user already exists. Pick another name, or log in with the one you made."),
+    ("superuser-common-password", None, r"This password is too common", "django",
+     "Django suggests a stronger password. You can type `y` to use it anyway while learning."),
+
+    # ---- Django: settings -----------------------------------------------------------
+    ("settings-not-configured", "ImproperlyConfigured", r"Requested setting \w+, but settings are not configured", "django",
+     "Run Django code through `python manage.py shell` (or `runserver`), not plain `python`."),
+    ("settings-secret-key", "ImproperlyConfigured", r"The SECRET_KEY setting must not be empty", "django",
+     "`SECRET_KEY` is missing from `mysite/settings.py`. Don't delete it - undo your last change to that file."),
+    ("settings-timezone", "ValueError", r"Incorrect timezone setting", "django",
+     "`TIME_ZONE` in `mysite/settings.py` must be a real zone like `'Europe/Berlin'` or `'UTC'`."),
+    ("settings-app-not-found", "ModuleNotFoundError", r"No module named 'blog'", "django",
+     "Django can't find the `blog` app. Make sure you ran `python manage.py startapp blog` in the folder with `manage.py`."),
+    ("settings-apps-not-ready", "AppRegistryNotReady", r"Apps aren't loaded yet", "django",
+     "Django code ran before Django started. Use `python manage.py shell` instead of plain `python`."),
+    ("settings-disallowed-host", "DisallowedHost", r"Invalid HTTP_HOST header", "django",
+     "Add the host to `ALLOWED_HOSTS` in `mysite/settings.py`, e.g. `ALLOWED_HOSTS = ['127.0.0.1', 'localhost']`."),
+    ("settings-debug-hosts", "CommandError", r"You must set settings\.ALLOWED_HOSTS if DEBUG is False", "django",
+     "With `DEBUG = False` you need `ALLOWED_HOSTS = ['127.0.0.1', 'localhost']` in `mysite/settings.py`."),
+    ("settings-app-label", "RuntimeError", r"Model class .* doesn't declare an explicit app_label", "django",
+     "Add `'blog'` to `INSTALLED_APPS` in `mysite/settings.py`."),
+    ("settings-static-root", "ImproperlyConfigured", r"You're using the staticfiles app without having set the required STATIC_URL", "django",
+     "Add `STATIC_URL = '/static/'` to `mysite/settings.py`."),
+    ("settings-generic", "ImproperlyConfigured", r"", "django",
+     "Something in `mysite/settings.py` isn't right. Read the message carefully - it names the setting that needs fixing."),
+
+    # ---- Django: models and database ------------------------------------------------
+    ("model-on-delete", "TypeError", r"__init__\(\) missing 1 required positional argument: 'on_delete'", "django",
+     "`ForeignKey` needs `on_delete`: `models.ForeignKey(User, on_delete=models.CASCADE)`."),
+    ("model-str-non-string", "TypeError", r"__str__ returned non-string", "django",
+     "`__str__` must return text: `return self.title`, not the whole object or a number."),
+    ("model-field-error", "FieldError", r"Cannot resolve keyword '\w+' into field", "django",
+     "That field name doesn't exist on the model. Check the spelling against `blog/models.py` (e.g. `published_date`)."),
+    ("model-invalid-lookup", "FieldError", r"Unsupported lookup '\w+'", "django",
+     "Lookups use two underscores and a valid name: `published_date__lte`."),
+    ("model-does-not-exist", "DoesNotExist", r"matching query does not exist", "django",
+     "No object matched your query. Add a post in the admin first, or use `filter()` instead of `get()`."),
+    ("model-multiple", "MultipleObjectsReturned", r"returned more than one", "django",
+     "`get()` found several matches. Use `filter()` or make the query more specific."),
+    ("model-check-fields", "SystemCheckError", r"fields\.E\d+", "django",
+     "A model field is set up wrong - the check message says which one. Compare with the tutorial's `Post` model."),
+    ("model-max-length", "SystemCheckError", r"CharFields must define a 'max_length' attribute", "django",
+     "`CharField` needs a length: `models.CharField(max_length=200)`."),
+    ("db-no-such-table", "OperationalError", r"no such table", "django",
+     MIGRATE),
+    ("db-no-such-table-hint", None, r"no such table", "django",
+     MIGRATE),
+    ("db-no-such-column", "OperationalError", r"no such column", "django",
+     "The database is behind your models. " + MIGRATE),
+    ("db-locked", "OperationalError", r"database is locked", "django",
+     "Another program is using `db.sqlite3`. Close other `runserver`/`shell` windows and try again."),
+    ("db-generic", "OperationalError", r"", "django",
+     "Something went wrong talking to the database. " + MIGRATE),
+    ("db-integrity-unique", "IntegrityError", r"UNIQUE constraint failed", "django",
+     "That value must be unique and already exists. Choose a different one."),
+    ("db-programming", "ProgrammingError", r"relation \"\w+\" does not exist", "django",
+     "The table doesn't exist yet. " + MIGRATE),
+
+    # ---- Django: admin ----------------------------------------------------------------
+    ("admin-already-registered", "AlreadyRegistered", r"The model \w+ is already registered", "django",
+     "`admin.site.register(Post)` appears twice. Keep only one in `blog/admin.py`."),
+    ("admin-not-registered", "NotRegistered", r"The model \w+ is not registered", "django",
+     "Register the model first: `admin.site.register(Post)` in `blog/admin.py`."),
+    ("admin-csrf", None, r"CSRF verification failed", "django",
+     "Reload the page and submit the form again. In your own templates, add `{% csrf_token %}` inside every `<form>`."),
+
+    # ---- Django: URLs and views -------------------------------------------------------
+    ("urls-no-patterns", "ImproperlyConfigured", r"The included URLconf '[\w.]+' does not appear to have any patterns in it", "django",
+     "`blog/urls.py` needs a `urlpatterns = [...]` list - check the spelling of `urlpatterns`."),
+    ("urls-view-missing", "AttributeError", r"module 'blog\.views' has no attribute '\w+'", "django",
+     "`blog/urls.py` points to a view that isn't in `blog/views.py`. Check the function name and save the file."),
+    ("urls-import-view", "ImportError", r"cannot import name '\w+' from 'blog\.views'", "django",
+     "That view isn't defined in `blog/views.py`. Check the function name and save the file."),
+    ("urls-include-missing", "NameError", r"name 'include' is not defined", "django",
+     "Import it in `mysite/urls.py`: `from django.urls import path, include`."),
+    ("urls-path-missing", "NameError", r"name 'path' is not defined", "django",
+     "Import it: `from django.urls import path`."),
+    ("urls-render-missing", "NameError", r"name 'render' is not defined", "django",
+     "Import it in `blog/views.py`: `from django.shortcuts import render`."),
+    ("urls-timezone-missing", "NameError", r"name 'timezone' is not defined", "django",
+     "Import it: `from django.utils import timezone`."),
+    ("urls-post-missing", "NameError", r"name 'Post' is not defined", "django",
+     "Import your model in `blog/views.py`: `from .models import Post`."),
+    ("urls-404", None, r"Page not found \(404\)", "django",
+     "No URL pattern matched. Check `mysite/urls.py` includes `path('', include('blog.urls'))` and the address you typed."),
+    ("view-returned-none", "ValueError", r"didn't return an HttpResponse object\. It returned None instead", "django",
+     "Your view forgot to `return` - the last line should be `return render(request, ...)`."),
+    ("urls-reverse-generic", "NoReverseMatch", r"", "django",
+     "A `{% url %}` or `reverse()` uses a name that isn't in your `urlpatterns`. Check the `name='...'` in `blog/urls.py`."),
+
+    # ---- Django: templates ------------------------------------------------------------
+    ("template-post-list", "TemplateDoesNotExist", r"blog/post_list\.html", "django",
+     TEMPLATE_PATH),
+    ("template-generic", "TemplateDoesNotExist", r"", "django",
+     "Django couldn't find that template. Templates live in `<app>/templates/<app>/` - e.g. `blog/templates/blog/`."),
+    ("template-parse-remainder", "TemplateSyntaxError", r"Could not parse the remainder", "django",
+     "Template variables use dots, not brackets or spaces: `{{ post.title }}`."),
+    ("template-filter", "TemplateSyntaxError", r"Invalid filter: '\w+'", "django",
+     "That template filter doesn't exist. Check the spelling, e.g. `linebreaksbr`."),
+    ("template-syntax-generic", "TemplateSyntaxError", r"", "django",
+     "Something in your template is off. Every `{% tag %}` needs a matching `{% endtag %}`."),
+    ("template-hint", None, r"template", "django",
+     "Check template path: `blog/templates/blog/post_list.html`."),
+]
+
+# --------------------------------------------------------------------------------------
+# GENERATED SIGNATURE FAMILIES
+# --------------------------------------------------------------------------------------
+
+# Modules learners commonly fail to import, and what to do about each
+_MODULE_FIXES: Dict[str, str] = {
+    "django": "Django isn't installed in the active environment. " + ACTIVATE + " If it is active, run `pip install django`.",
+    "mysite": "Run commands from the folder that contains `manage.py`, and check the project was created with `django-admin startproject mysite .`.",
+    "blog.urls": "Create `blog/urls.py` (see the views step) and check the spelling in `include('blog.urls')`.",
+    "blog.models": "Make sure `blog/models.py` exists - it's created by `python manage.py startapp blog`.",
+    "blog.views": "Make sure `blog/views.py` exists - it's created by `python manage.py startapp blog`.",
+    "blog.admin": "Make sure `blog/admin.py` exists - it's created by `python manage.py startapp blog`.",
+    "models": "Inside the blog app, import with a dot: `from .models import Post`.",
+    "views": "Inside the blog app, import with a dot: `from . import views`.",
+    "PIL": "Image fields need Pillow: `pip install Pillow`.",
+    "requests": "Install it into your virtual environment: `pip install requests`.",
+    "dotenv": "Install it: `pip install python-dotenv`.",
+    "rest_framework": "Install Django REST framework: `pip install djangorestframework`, then add `'rest_framework'` to `INSTALLED_APPS`.",
+    "crispy_forms": "Install it: `pip install django-crispy-forms`.",
+    "whitenoise": "Install it: `pip install whitenoise`.",
+    "psycopg2": "You're using PostgreSQL settings; the tutorial uses SQLite. Restore the default `DATABASES` setting, or `pip install psycopg2-binary`.",
+    "MySQLdb": "You're using MySQL settings; the tutorial uses SQLite. Restore the default `DATABASES` setting.",
+    "yaml": "Install it: `pip install pyyaml`.",
+    "django_extensions": "Install it: `pip install django-extensions`, or remove it from `INSTALLED_APPS`.",
+    "debug_toolbar": "Install it: `pip install django-debug-toolbar`, or remove it from `INSTALLED_APPS`.",
+}
+
+# Misspellings of "django" seen at workshops
+_DJANGO_TYPOS = ["Django", "djnago", "dajngo", "djanog", "djang", "jango", "djangp", "djangoo"]
+
+# Model field classes, frequently mis-capitalised
+_FIELD_TYPES = [
+    "CharField", "TextField", "DateTimeField", "DateField", "ForeignKey", "IntegerField",
+    "BooleanField", "EmailField", "URLField", "ImageField", "SlugField", "ManyToManyField",
+    "PositiveIntegerField", "DecimalField", "FloatField", "OneToOneField", "FileField", "Model",
+]
+
+# Template block tags that need an end tag
+_BLOCK_TAGS = ["for", "if", "block", "with", "comment", "autoescape", "spaceless", "verbatim"]
+
+# URL names used in the tutorial and its extensions
+_URL_NAMES = ["post_list", "post_detail", "post_new", "post_edit", "post_remove", "post_publish", "login", "logout"]
+
+_TABLES = ["blog_post", "auth_user", "django_session", "django_admin_log", "django_content_type"]
+
+_POST_FIELDS = ["author_id", "title", "text", "created_date", "published_date"]
+
+_COMMANDS = {
+    "python3": "Python isn't installed or isn't on your PATH. Install it from python.org (on Windows tick \"Add python.exe to PATH\").",
+    "python": "Try `python3` instead, or install Python from python.org (on Windows tick \"Add python.exe to PATH\").",
+    "pip": "Use `python -m pip` instead, or activate your virtual environment first. " + ACTIVATE,
+    "pip3": "Use `python3 -m pip` instead, or activate your virtual environment first.",
+    "django-admin": "Django isn't installed in the active environment. " + ACTIVATE + " Then `pip install django`.",
+    "git": "Git isn't installed. You don't need it for this tutorial - skip that step for now.",
+    "code": "VS Code's `code` command isn't on your PATH. Open the folder from VS Code's File menu instead.",
+}
+
+# manage.py commands and how learners mistype them
+_MANAGE_TYPOS = {
+    "runserver": ["runsever", "runserve", "run", "server", "runservr", "run_server"],
+    "makemigrations": ["makemigration", "makemigrate", "make_migrations", "migrations"],
+    "migrate": ["migrates", "migration", "migarte"],
+    "createsuperuser": ["createsuper", "createuser", "create_superuser", "superuser"],
+    "startapp": ["start_app", "createapp", "newapp"],
+}
+
+
+def _generated() -> List[Tuple[str, Optional[str], str, str, str]]:
+    rows = []
+    for module, fix in _MODULE_FIXES.items():
+        rows.append((f"module-{module}", "ModuleNotFoundError", rf"No module named '{re.escape(module)}'", "django", fix))
+    for typo in _DJANGO_TYPOS:
+        rows.append((f"module-typo-{typo}", "ModuleNotFoundError", rf"No module named '{typo}'", "python",
+                     f"It's spelled `django`, all lowercase. You typed `{typo}`."))
+    for field in _FIELD_TYPES:
+        rows.append((f"field-case-{field}", "AttributeError",
+                     rf"module 'django\.db\.models' has no attribute '(?!(?-i:{field})')(?i:{field})'", "django",
+                     f"Capitalisation matters: it's `models.{field}`."))
+    for tag in _BLOCK_TAGS:
+        rows.append((f"template-unclosed-{tag}", "TemplateSyntaxError", rf"Unclosed tag on line \d+: '{tag}'", "django",
+                     f"Your `{{% {tag} %}}` needs a matching `{{% end{tag} %}}`."))
+        rows.append((f"template-invalid-end{tag}", "TemplateSyntaxError", rf"Invalid block tag on line \d+: 'end{tag}'", "django",
+                     f"There's an `{{% end{tag} %}}` without an opening `{{% {tag} %}}` (or a typo in the opening tag)."))
+    for name in _URL_NAMES:
+        rows.append((f"reverse-{name}", "NoReverseMatch", rf"Reverse for '{name}' not found", "django",
+                     f"No URL pattern is named `{name}`. Add `path(..., name='{name}')` to `blog/urls.py` or fix the name in your template."))
+        rows.append((f"reverse-args-{name}", "NoReverseMatch", rf"Reverse for '{name}' with (?:arguments|keyword arguments) .* not found", "django",
+                     f"The `{name}` URL expects a value like `pk`. Pass it: `{{% url '{name}' pk=post.pk %}}`."))
+    for table in _TABLES:
+        rows.append((f"no-such-table-{table}", "OperationalError", rf"no such table: {table}", "django",
+                     ("Create the tables for your blog: `python manage.py makemigrations blog` and `python manage.py migrate`."
+                      if table.startswith("blog_") else "Django's built-in tables are missing. Run `python manage.py migrate`.")))
+    for field in _POST_FIELDS:
+        rows.append((f"no-such-column-{field}", "OperationalError", rf"no such column: blog_post\.{field}", "django",
+                     f"`{field}` was added to the model after the table was created. " + MIGRATE))
+        rows.append((f"not-null-{field}", "IntegrityError", rf"NOT NULL constraint failed: blog_post\.{field}", "django",
+                     f"Every post needs a `{field.replace('_id', '')}`. Fill it in, or make the field optional with `blank=True, null=True`."))
+    for command, fix in _COMMANDS.items():
+        escaped = re.escape(command)
+        rows.append((f"cmd-bash-{command}", None, rf"{escaped}: command not found", "shell", fix))
+        rows.append((f"cmd-zsh-{command}", None, rf"command not found: {escaped}\b", "shell", fix))
+        rows.append((f"cmd-windows-{command}", None, rf"'{escaped}' is not recognized as an internal or external command", "shell", fix))
+    for command, typos in _MANAGE_TYPOS.items():
+        for typo in typos:
+            rows.append((f"manage-typo-{typo}", None, rf"Unknown command: '{typo}'", "django",
+                         f"Did you mean `python manage.py {command}`?"))
+    return rows
+
+
+SIGNATURES: List[ErrorSignature] = [ErrorSignature(*row) for row in _SIGNATURES + _generated()]
+
+# --------------------------------------------------------------------------------------
+# MATCHER
+# --------------------------------------------------------------------------------------
+
+_LEADING_LITERAL = re.compile(r"(?:[^\\.^$*+?()\[\]{}|]|\\[^\w\d])+")
+
+DJANGO_HINTS = re.compile(r"django|manage\.py|mysite|blog/", re.IGNORECASE)
+
+
+def _trie_regex(words: Sequence[str]) -> str:
+    """One regex matching any of `words`, with shared prefixes factored out.
+
+    A flat alternation makes the regex engine retry every word at every
+    position; the trie form rejects most positions after one character.
+    """
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        end = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if end:
+            # Prefer the longer word, but accept stopping here
+            body = f"(?:{body})?"
+        return body
+
+    return build(trie)
+
+
+def _anchor(signature: ErrorSignature) -> str:
+    """The literal text every match of this signature must contain."""
+    if signature.exception:
+        return signature.exception
+    literal = _LEADING_LITERAL.match(signature.pattern)
+    text = re.sub(r"\\(.)", r"\1", literal.group()) if literal else ""
+    if len(text.strip()) < 4:
+        raise ValueError(f"Signature {signature.name!r} needs an exception or a literal prefix")
+    return text
+
+
+class ErrorKnowledgeBase:
+    """Compiled lookup over a list of `ErrorSignature`s."""
+
+    def __init__(self, signatures: Sequence[ErrorSignature] = SIGNATURES):
+        self.signatures = list(signatures)
+        self._by_anchor: Dict[str, List[Tuple[ErrorSignature, "re.Pattern[str]"]]] = {}
+        for signature in self.signatures:
+            compiled = re.compile(signature.pattern, re.IGNORECASE) if signature.pattern else None
+            self._by_anchor.setdefault(_anchor(signature).lower(), []).append((signature, compiled))
+        self._anchors = re.compile(_trie_regex(list(self._by_anchor)), re.IGNORECASE)
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def lookup(self, text: str, exception: Optional[str] = None, limit: int = 3) -> List[ErrorMatch]:
+        """Return the best matching signatures for an error, most specific first.
+
+        `exception` is the exception type when the caller already knows it
+        (e.g. from a parsed traceback); it weighs more than a mention of the
+        exception name somewhere in the text.
+        """
+        found = {m.group().lower() for m in self._anchors.finditer(text)}
+        if exception:
+            found.add(exception.lower())
+        django_context = bool(DJANGO_HINTS.search(text))
+
+        matches = []
+        for anchor in found:
+            for signature, compiled in self._by_anchor.get(anchor, ()):
+                if signature.exception and signature.exception.lower() != anchor:
+                    continue
+                if compiled is not None and not compiled.search(text):
+                    continue
+                score = float(len(signature.pattern))
+                if signature.exception:
+                    score += 50 if exception and exception.lower() == signature.exception.lower() else 20
+                if django_context and signature.context == "django":
+                    score += 5
+                matches.append(ErrorMatch(signature, score))
+        matches.sort(key=lambda match: -match.score)
+        return matches[:limit]
+
+    def diagnose(self, text: str, exception: Optional[str] = None) -> Optional[str]:
+        """Markdown fix for the best match, or None if nothing matched."""
+        matches = self.lookup(text, exception=exception)
+        if not matches:
+            return None
+        best = matches[0].signature
+        return f"**{best.exception}** - {best.fix}" if best.exception else best.fix
+
+
+knowledge_base = ErrorKnowledgeBase()
+
+# --------------------------------------------------------------------------------------
+# BENCHMARK
+# --------------------------------------------------------------------------------------
+
+TRACEBACK_CORPUS = [
+    ("""Traceback (most recent call last):
+  File "/home/ana/djangogirls-blog/manage.py", line 11, in main
+    from django.core.management import execute_from_command_line
+ModuleNotFoundError: No module named 'django'
+
+The above exception was the direct cause of the following exception:
+
+Traceback (most recent call last):
+  File "/home/ana/djangogirls-blog/manage.py", line 22, in <module>
+    main()
+  File "/home/ana/djangogirls-blog/manage.py", line 13, in main
+    raise ImportError(
+ImportError: Couldn't import Django. Are you sure it's installed and available on your PYTHONPATH environment variable? Did you forget to activate a virtual environment?""",
+     {"module-django", "django-couldnt-import"}),
+    ("""Internal Server Error: /
+Traceback (most recent call last):
+  File "/home/ana/djangogirls-blog/blog_env/lib/python3.12/site-packages/django/db/backends/sqlite3/base.py", line 354, in execute
+    return super().execute(query, params)
+sqlite3.OperationalError: no such table: blog_post
+
+The above exception was the direct cause of the following exception:
+  File "/home/ana/djangogirls-blog/blog/views.py", line 7, in post_list
+    return render(request, 'blog/post_list.html', {'posts': posts})
+django.db.utils.OperationalError: no such table: blog_post""", {"no-such-table-blog_post"}),
+    ("""TemplateDoesNotExist at /
+blog/post_list.html
+Request Method:	GET
+Request URL:	http://127.0.0.1:8000/
+Django Version:	5.0.1
+Exception Type:	TemplateDoesNotExist
+Exception Value: blog/post_list.html""", {"template-post-list"}),
+    ("""  File "/home/ana/djangogirls-blog/blog/models.py", line 7, in Post
+    title = models.Charfield(max_length=200)
+AttributeError: module 'django.db.models' has no attribute 'Charfield'""", {"field-case-CharField"}),
+    ("""  File "/home/ana/djangogirls-blog/blog/models.py", line 6, in Post
+    author = models.ForeignKey(User)
+TypeError: ForeignKey.__init__() missing 1 required positional argument: 'on_delete'""", {"model-on-delete"}),
+    ("""django.urls.exceptions.NoReverseMatch: Reverse for 'post_detail' not found. 'post_detail' is not a valid view function or pattern name.""",
+     {"reverse-post_detail"}),
+    ("""django.template.exceptions.TemplateSyntaxError: Unclosed tag on line 21: 'for'. Looking for one of: empty, endfor.""",
+     {"template-unclosed-for"}),
+    ("""$ python manage.py runsever
+Unknown command: 'runsever'. Did you mean runserver?
+Type 'manage.py help' for usage.""", {"manage-typo-runsever"}),
+    ("""django-admin: command not found""", {"cmd-bash-django-admin"}),
+    ("""'python' is not recognized as an internal or external command,
+operable program or batch file.""", {"cmd-windows-python"}),
+    ("""error: externally-managed-environment
+
+× This environment is externally managed""", {"pip-externally-managed"}),
+    ("""ERROR: Could not find a version that satisfies the requirement django (from versions: none)
+ERROR: No matching distribution found for django""", {"pip-no-version", "pip-no-distribution"}),
+    ("""  File "<stdin>", line 1
+    if 5 > 2
+            ^
+SyntaxError: expected ':'""", {"syntax-missing-colon"}),
+    (""">>> "hello" + 5
+Traceback (most recent call last):
+  File "<stdin>", line 1, in <module>
+TypeError: can only concatenate str (not "int") to str""", {"type-concat-int"}),
+    ("""django.db.utils.IntegrityError: NOT NULL constraint failed: blog_post.author_id""", {"not-null-author_id"}),
+    ("""Error: That port is already in use.""", {"runserver-port"}),
+    ("""You have 18 unapplied migration(s). Your project may not work properly until you apply the migrations for app(s): admin, auth, contenttypes, sessions.
+Run 'python manage.py migrate' to apply them.""", {"runserver-unapplied"}),
+    ("""ValueError: The view blog.views.post_list didn't return an HttpResponse object. It returned None instead.""",
+     {"view-returned-none"}),
+]
+
+
+def _linear_scan(text: str) -> Optional[str]:
+    """Baseline: try every signature's regex in turn, keep the longest match."""
+    best, best_len = None, -1
+    for signature in SIGNATURES:
+        if signature.exception and signature.exception.lower() not in text.lower():
+            continue
+        if signature.pattern and not re.search(signature.pattern, text, re.IGNORECASE):
+            continue
+        if len(signature.pattern) > best_len:
+            best, best_len = signature.name, len(signature.pattern)
+    return best
+
+
+def benchmark(rounds: int = 200) -> Dict[str, float]:
+    """Accuracy and throughput of the compiled matcher versus a linear scan."""
+    def compiled(text):
+        matches = knowledge_base.lookup(text, limit=1)
+        return matches[0].signature.name if matches else None
+
+    results = {"signatures": float(len(knowledge_base))}
+    for label, matcher in (("linear_scan", _linear_scan), ("compiled_matcher", compiled)):
+        correct = sum(1 for text, expected in TRACEBACK_CORPUS if matcher(text) in expected)
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for text, _ in TRACEBACK_CORPUS:
+                matcher(text)
+        elapsed = time.perf_counter() - start
+        results[f"{label}_accuracy"] = correct / len(TRACEBACK_CORPUS)
+        results[f"{label}_lookups_per_s"] = rounds * len(TRACEBACK_CORPUS) / elapsed
+    return results
+
+
+if __name__ == "__main__":
+    for name, value in benchmark().items():
+        print(f"{name:>32}: {value:,.3f}")
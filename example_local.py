@@ -1,123 +1,197 @@
+import asyncio
+import signal
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+
 import openai
-from foundry_local import FoundryLocalManager
+
+from endpoint_pool import EndpointPool
+from model_selection import select_models
+
+
+@dataclass
+class ReplyStats:
+    ttft: float          # seconds until the first token
+    tokens: int          # streamed content chunks, one per token
+    elapsed: float
+    cancelled: bool = False
+
+    @property
+    def tokens_per_s(self) -> float:
+        decoding = self.elapsed - self.ttft
+        return (self.tokens - 1) / decoding if self.tokens > 1 and decoding > 0 else 0.0
+
+    def __str__(self) -> str:
+        return f"[{self.ttft:.2f} s to first token, {self.tokens_per_s:.1f} tokens/s]"
 
 
-def setup_local_model(alias="phi-4"):
+def setup_local_model(alias=None):
     """
-    Set up the local model manager and OpenAI client.
-    
+    Set up the local model and an async OpenAI client for each endpoint serving it.
+
+    The model is resolved here, once; every turn reuses the model id held by
+    each endpoint instead of asking Foundry Local again.
+
     Args:
-        alias (str): The model alias to use (default: "phi-4")
-    
+        alias (str): The model alias to use (default: the best model for this
+            machine, see model_selection.py)
+
     Returns:
-        tuple: (manager, client) instances
+        EndpointPool: the endpoints, balanced and failed over between turns
     """
-    # Create a FoundryLocalManager instance. This will start the Foundry 
-    # Local service if it is not already running and load the specified model.
-    manager = FoundryLocalManager(alias)
-    
-    # Configure the client to use the local Foundry service
-    client = openai.OpenAI(
-        base_url=manager.endpoint,
-        api_key=manager.api_key  # API key is not required for local usage
+    # Start the Foundry Local service if it is not already running and load
+    # the chosen model (calibrated once per machine, then cached), or use the
+    # servers listed in DJANGO_GIRLS_ENDPOINTS.
+    choices = select_models(alias)
+
+    # One client per endpoint, so each keeps its connections open between turns
+    return EndpointPool.from_choices(
+        choices,
+        lambda choice: openai.AsyncOpenAI(
+            base_url=choice.endpoint,
+            api_key=choice.api_key  # API key is not required for local usage
+        )
     )
-    
-    return manager, client
 
 
-def get_streaming_response(client, model_id, messages):
+async def _completion(backend, messages):
+    stream = await backend.client.chat.completions.create(
+        model=backend.model_id,
+        messages=messages,
+        stream=True
+    )
+    try:
+        async for chunk in stream:
+            yield chunk
+    finally:
+        # Closing the response makes the server stop generating
+        await stream.close()
+
+
+async def get_streaming_response(pool, messages):
     """
-    Get a streaming response from the model.
-    
+    Stream a response from the model, printing it as it arrives.
+
+    Cancelling the task running this (Ctrl-C in the chat) stops the
+    generation and returns what arrived so far.
+
     Args:
-        client: OpenAI client instance
-        model_id (str): The model ID to use
+        pool: EndpointPool of AsyncOpenAI clients
         messages (list): Chat history messages
-    
+
     Returns:
-        str: The complete assistant response
+        tuple: (response text, ReplyStats)
     """
+    parts = []
+    start = time.perf_counter()
+    ttft = None
+    cancelled = False
     try:
-        stream = client.chat.completions.create(
-            model=model_id,
-            messages=messages,
-            stream=True
-        )
-        
-        # Collect the assistant's response
-        assistant_response = ""
-        for chunk in stream:
-            if chunk.choices[0].delta.content is not None:
-                content = chunk.choices[0].delta.content
-                assistant_response += content
-                print(content, end="", flush=True)
-        
-        return assistant_response.strip()
-    
+        # A failing endpoint is skipped and the request sent to the next one
+        async for chunk in pool.astream(lambda backend: _completion(backend, messages)):
+            if not chunk.choices or chunk.choices[0].delta.content is None:
+                continue
+            content = chunk.choices[0].delta.content
+            if ttft is None:
+                ttft = time.perf_counter() - start
+            parts.append(content)
+            print(content, end="", flush=True)
+    except asyncio.CancelledError:
+        cancelled = True
+        print(" [stopped]", end="", flush=True)
     except Exception as e:
         print(f"Error: {e}")
         print("Please try again.")
-        return ""
-    
-def read_markdown_as_system_prompt(filepath):
+
+    elapsed = time.perf_counter() - start
+    stats = ReplyStats(ttft if ttft is not None else elapsed, len(parts), elapsed, cancelled)
+    return "".join(parts).strip(), stats
+
+
+@lru_cache(maxsize=None)
+def _read_text(filepath):
     with open(filepath, "r", encoding="utf-8") as f:
-        content = f.read()
-    return {"role": "system", "content": content}
+        return f.read()
+
+
+def read_markdown_as_system_prompt(filepath):
+    # Read from disk once per file, however often the prompt is needed
+    return {"role": "system", "content": _read_text(filepath)}
 
 
-def chat_with_local_model(alias="phi-4", system_prompt_file=None):
+async def _generate(pool, chat_history):
+    """Run one generation; Ctrl-C cancels it instead of ending the chat."""
+    loop = asyncio.get_running_loop()
+    task = loop.create_task(get_streaming_response(pool, chat_history))
+    previous = signal.signal(signal.SIGINT, lambda *_: loop.call_soon_threadsafe(task.cancel))
+    try:
+        return await task
+    finally:
+        signal.signal(signal.SIGINT, previous)
+
+
+async def chat_with_local_model(alias=None, system_prompt_file=None):
     """
     Main chat function that handles the interactive conversation.
-    
+
     Args:
-        alias (str): The model alias to use (default: "phi-4")
+        alias (str): The model alias to use (default: chosen for this machine)
+        system_prompt_file (str): Markdown file used as the system prompt
     """
-    # Set up the model and client
-    manager, client = setup_local_model(alias)
-    
+    # Set up the model and clients
+    pool = setup_local_model(alias)
+
     # Initialize chat history
     if system_prompt_file:
         chat_history = [read_markdown_as_system_prompt(system_prompt_file)]
     else:
         chat_history = []
-    
+
     print("Chat with your local AI model! Type 'quit' or 'exit' to end the conversation.")
+    print("Press Ctrl-C while the model is answering to stop the answer.")
     print("-" * 60)
-    
+
+    # Ctrl-C at the prompt interrupts input() (asyncio.run would only cancel
+    # the chat task once input() returned)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+
     # Interactive chat loop
     while True:
-        # Get user input
-        user_input = input("\nYou: ").strip()
-        
+        # Get user input (Ctrl-C at the prompt ends the chat)
+        try:
+            user_input = input("\nYou: ").strip()
+        except (EOFError, KeyboardInterrupt):
+            user_input = "quit"
+
         # Check if user wants to quit
         if user_input.lower() in ['quit', 'exit', 'q']:
-            print("Goodbye!")
+            print("\nGoodbye!")
             break
-        
+
         # Skip empty inputs
         if not user_input:
             continue
-        
+
         # Add user message to chat history
         chat_history.append({"role": "user", "content": user_input})
-        
+
         print("\nAI: ", end="", flush=True)
-        
+
         # Get streaming response
-        assistant_response = get_streaming_response(
-            client, 
-            manager.get_model_info(alias).id, 
-            chat_history
-        )
-        
-        # Add assistant's response to chat history
+        assistant_response, stats = await _generate(pool, chat_history)
+
+        # Add assistant's response to chat history (a stopped answer is kept
+        # as far as it got, so the model knows what the learner saw)
         if assistant_response:
             chat_history.append({"role": "assistant", "content": assistant_response})
-        
-        print()  # New line after response
+        else:
+            chat_history.pop()
+
+        print(f"\n{stats}")
 
 
 if __name__ == "__main__":
-    # By using an alias, the most suitable model will be downloaded 
-    # to your end-user's device.
-    chat_with_local_model("phi-4")
\ No newline at end of file
+    # Without an alias, the most suitable model for this device is
+    # calibrated once and remembered (DJANGO_GIRLS_MODEL overrides it).
+    asyncio.run(chat_with_local_model())
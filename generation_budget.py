@@ -0,0 +1,175 @@
+"""
+Generation budgets: how much the model may say for each kind of turn.
+
+The chat models were created with only `temperature=0.1`, so a turn whose
+whole useful output is `tutorial.show('setup')` could still generate
+hundreds of tokens of commentary, and an explanation could ramble on until
+the context ran out. `BudgetController` gives each expected response type
+its own limits:
+
+- `TOOL_CALL`: a few dozen tokens, stopping at the closing code fence,
+- `SHORT_ANSWER`: a paragraph,
+- `EXPLANATION`: a few hundred tokens,
+
+each with a `max_tokens`, stop sequences and a timeout (never shorter than
+the watchdog's first-token timeout). The controller
+learns from what the model actually produces. Once it has seen enough
+turns of a kind, `max_tokens` follows the 95th percentile of observed
+lengths (with headroom, within fixed bounds). A reply cut off by the limit
+raises the budget straight away, so learners don't keep getting truncated
+answers.
+
+`metrics()` reports tokens generated per turn for `/stats`. Run
+`python generation_budget.py` to replay typical answer lengths with and
+without budgets.
+"""
+import math
+from collections import deque
+from dataclasses import dataclass, replace
+from typing import Deque, Dict, Optional, Tuple
+
+from model_watchdog import FIRST_TOKEN_TIMEOUT
+
+TOOL_CALL = "tool_call"
+SHORT_ANSWER = "short_answer"
+EXPLANATION = "explanation"
+
+
+@dataclass(frozen=True)
+class Budget:
+    max_tokens: int
+    stop: Tuple[str, ...] = ()
+    timeout: float = 60.0
+    # Bounds for the adaptive max_tokens
+    floor: int = 16
+    ceiling: int = 2048
+
+
+# The closing fence ends a tool call; "\n```\n" never matches an opening "```python".
+# Timeouts run from the request, so each one leaves the watchdog its whole
+# first-token wait plus time to generate; a shorter one would cut a slow
+# start off before the watchdog could retry or count it.
+DEFAULT_BUDGETS: Dict[str, Budget] = {
+    TOOL_CALL: Budget(max_tokens=64, stop=("\n```\n",), timeout=FIRST_TOKEN_TIMEOUT + 20.0, floor=24, ceiling=256),
+    SHORT_ANSWER: Budget(max_tokens=200, timeout=FIRST_TOKEN_TIMEOUT + 30.0, floor=64, ceiling=512),
+    EXPLANATION: Budget(max_tokens=700, timeout=FIRST_TOKEN_TIMEOUT + 90.0, floor=200, ceiling=1500),
+}
+
+
+def response_kind(route=None, user_text: str = "") -> str:
+    """Expected response type for a turn that reaches the large model."""
+    if route is not None and route.explanation:
+        return EXPLANATION
+    if user_text.rstrip().endswith("?"):
+        return SHORT_ANSWER
+    return TOOL_CALL
+
+
+class BudgetController:
+    """Per-response-type generation limits that adapt to observed lengths.
+
+    Args:
+        budgets: Starting budget per response type (default: `DEFAULT_BUDGETS`).
+        headroom (float): Multiplier over the observed 95th percentile.
+        min_samples (int): Turns of a kind seen before its budget adapts.
+        window (int): Observed lengths kept per kind.
+    """
+
+    def __init__(
+        self,
+        budgets: Optional[Dict[str, Budget]] = None,
+        headroom: float = 1.5,
+        min_samples: int = 5,
+        window: int = 100,
+    ):
+        self._budgets = dict(budgets or DEFAULT_BUDGETS)
+        self.headroom = headroom
+        self.min_samples = min_samples
+        self._lengths: Dict[str, Deque[int]] = {kind: deque(maxlen=window) for kind in self._budgets}
+        self._turns = {kind: 0 for kind in self._budgets}
+        self._tokens = {kind: 0 for kind in self._budgets}
+        self._truncated = {kind: 0 for kind in self._budgets}
+
+    def budget(self, kind: str) -> Budget:
+        return self._budgets[kind]
+
+    def bind(self, llm, kind: str):
+        """`llm` with the limits for `kind` applied to every call."""
+        budget = self._budgets[kind]
+        kwargs = {"max_tokens": budget.max_tokens}
+        if budget.stop:
+            kwargs["stop"] = list(budget.stop)
+        return llm.bind(**kwargs)
+
+    def observe(self, kind: str, tokens: int, truncated: bool = False) -> None:
+        """Record how long a reply was and whether the limit cut it off."""
+        self._turns[kind] += 1
+        self._tokens[kind] += tokens
+        budget = self._budgets[kind]
+        if truncated:
+            self._truncated[kind] += 1
+            # Too tight: give the next reply room straight away
+            self._set(kind, math.ceil(budget.max_tokens * self.headroom))
+            return
+
+        lengths = self._lengths[kind]
+        lengths.append(tokens)
+        if len(lengths) >= self.min_samples:
+            ordered = sorted(lengths)
+            p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+            self._set(kind, math.ceil(p95 * self.headroom))
+
+    def metrics(self) -> Dict[str, float]:
+        turns = sum(self._turns.values())
+        figures = {"tokens_per_turn": sum(self._tokens.values()) / turns if turns else 0.0}
+        for kind, budget in self._budgets.items():
+            figures[f"{kind}_max_tokens"] = budget.max_tokens
+            figures[f"{kind}_tokens_per_turn"] = self._tokens[kind] / self._turns[kind] if self._turns[kind] else 0.0
+            figures[f"{kind}_truncated"] = self._truncated[kind]
+        return figures
+
+    def _set(self, kind: str, max_tokens: int) -> None:
+        budget = self._budgets[kind]
+        max_tokens = max(budget.floor, min(budget.ceiling, max_tokens))
+        self._budgets[kind] = replace(budget, max_tokens=max_tokens)
+
+
+def benchmark(turns: int = 300, seed: int = 7) -> Dict[str, float]:
+    """Tokens generated per turn for a replayed mix of answers, with and without budgets.
+
+    Answer lengths follow what Phi-class models produce for the tutorial: a
+    ~12 token tool call followed by 0-200 tokens of chatter, short answers of
+    40-250 tokens and explanations of 200-900 tokens.
+    """
+    import random
+
+    rng = random.Random(seed)
+    controller = BudgetController()
+    unbounded = bounded = 0
+    for _ in range(turns):
+        kind = rng.choices([TOOL_CALL, SHORT_ANSWER, EXPLANATION], weights=[70, 20, 10])[0]
+        if kind == TOOL_CALL:
+            call, chatter = 14, rng.randint(0, 200)
+            length = call + chatter
+            # The stop sequence ends the reply at the closing fence
+            produced = min(call, controller.budget(kind).max_tokens)
+        else:
+            length = rng.randint(40, 250) if kind == SHORT_ANSWER else rng.randint(200, 900)
+            produced = min(length, controller.budget(kind).max_tokens)
+        truncated = produced < length and kind != TOOL_CALL
+        controller.observe(kind, produced, truncated=truncated)
+        unbounded += length
+        bounded += produced
+    metrics = controller.metrics()
+    return {
+        "unbounded_tokens_per_turn": unbounded / turns,
+        "budgeted_tokens_per_turn": bounded / turns,
+        "drop": 1 - bounded / unbounded,
+        "explanation_truncated": metrics[f"{EXPLANATION}_truncated"],
+        "short_answer_truncated": metrics[f"{SHORT_ANSWER}_truncated"],
+    }
+
+
+if __name__ == "__main__":
+    for name, value in benchmark().items():
+        print(f"{name:>26}: {value:.2f}")
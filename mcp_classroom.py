@@ -0,0 +1,260 @@
+"""
+One MCP server for a whole classroom, over HTTP.
+
+On stdio every client starts its own `django_girls_mcp_server.py` process.
+With 30-60 learners that means 30-60 interpreters, each loading the same
+tutorial content. This module serves the same FastMCP server over the
+network instead: streamable HTTP at `/mcp` (the current MCP transport), or
+the older SSE transport at `/sse` for clients that only speak that. One
+process then serves every learner's client concurrently.
+
+- Session state: each MCP session gets its own `LearnerState` in the
+  server (last step opened, steps seen), so `next_step` answers for that
+  learner. The state is dropped when the session ends or expires after
+  `--idle-timeout` seconds without requests.
+- Limits: `--max-sessions` caps open MCP sessions (new ones get HTTP 503
+  until a seat frees up), `--max-connections` caps concurrent HTTP
+  connections, and request bodies are size-limited by the MCP library.
+- Graceful shutdown: on Ctrl+C or SIGTERM the server stops accepting
+  connections, lets calls in flight finish for up to `--grace` seconds,
+  then closes the sessions.
+
+Listening on anything but localhost turns off the MCP library's DNS
+rebinding check, which only allows localhost Host headers; the learners'
+machines reach the server by its LAN address.
+
+Usage:
+    python mcp_classroom.py serve --host 0.0.0.0 --port 8000
+    DJANGO_GIRLS_MCP_URL=http://192.168.1.20:8000/mcp python django_girls_mcp.py
+    python mcp_classroom.py loadtest --clients 50
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import statistics
+import sys
+import time
+from typing import Dict, List, Optional
+
+import uvicorn
+
+from django_girls_mcp_server import learner_metrics, mcp
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+TRANSPORTS = ("streamable-http", "sse")
+LOOPBACK = ("127.0.0.1", "localhost", "::1")
+
+
+def configure(
+    host: str, port: int, max_sessions: Optional[int], idle_timeout: Optional[float], stream_responses: bool = False,
+):
+    """Apply the network settings to the tutorial's FastMCP server and return it."""
+    from mcp.server.transport_security import TransportSecuritySettings
+
+    mcp.settings.host = host
+    mcp.settings.port = port
+    mcp.settings.max_sessions = max_sessions
+    mcp.settings.session_idle_timeout = idle_timeout
+    # Tool results as plain JSON bodies rather than a one-event SSE stream per call
+    mcp.settings.json_response = not stream_responses
+    if host not in LOOPBACK:
+        mcp.settings.transport_security = TransportSecuritySettings(enable_dns_rebinding_protection=False)
+    return mcp
+
+
+class _Server(uvicorn.Server):
+    async def shutdown(self, sockets=None) -> None:
+        logger.info("Shutting down, letting calls in flight finish: %s", learner_metrics())
+        await super().shutdown(sockets)
+
+
+async def serve(
+    transport: str = "streamable-http",
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    max_sessions: Optional[int] = 100,
+    max_connections: Optional[int] = 200,
+    idle_timeout: Optional[float] = 1800,
+    grace: float = 10.0,
+    stream_responses: bool = False,
+) -> None:
+    """Serve the tutorial MCP server until interrupted, then shut down gracefully."""
+    configure(host, port, max_sessions, idle_timeout, stream_responses)
+    app = mcp.streamable_http_app() if transport == "streamable-http" else mcp.sse_app()
+    config = uvicorn.Config(
+        app,
+        host=host,
+        port=port,
+        limit_concurrency=max_connections,
+        timeout_graceful_shutdown=grace,
+        log_level="warning",
+    )
+    server = _Server(config)
+    path = mcp.settings.streamable_http_path if transport == "streamable-http" else mcp.settings.sse_path
+    logger.info("Tutorial MCP server (%s) on http://%s:%s%s", transport, host, port, path)
+    # uvicorn re-raises the signal once shut down, so SIGTERM still ends the process as SIGTERM
+    await server.serve()
+
+
+# --------------------------------------------------------------------------------------
+# LOAD TEST
+# --------------------------------------------------------------------------------------
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind((DEFAULT_HOST, 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_for_port(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(DEFAULT_HOST, port)
+        except OSError:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"server did not start listening on port {port}")
+            await asyncio.sleep(0.05)
+        else:
+            writer.close()
+            return
+
+
+def _rss_mb(pid: int) -> float:
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+async def _simulated_client(url: str, index: int, rounds: int, latencies: List[float], connects: List[float]) -> bool:
+    from mcp import ClientSession
+    from mcp.client.streamable_http import streamable_http_client
+    from tutorial_content import STEP_TOOLS, STEPS, content_store
+
+    # Each client walks a different number of steps, so state leaking between
+    # sessions shows up as a wrong `next_step` page.
+    steps = 1 + index % (len(STEPS) - 1)
+    isolated = True
+    start = time.perf_counter()
+    async with streamable_http_client(url) as (read, write, _):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            connects.append(time.perf_counter() - start)
+            for _ in range(rounds):
+                calls = [(STEP_TOOLS[topic], {}) for topic in STEPS[:steps]]
+                calls += [("diagnose_error", {"error": "ModuleNotFoundError: No module named 'django'"}),
+                          ("next_step", {})]
+                for name, arguments in calls:
+                    t = time.perf_counter()
+                    result = await session.call_tool(name, arguments)
+                    latencies.append(time.perf_counter() - t)
+                    if result.isError:
+                        raise RuntimeError(result.content[0].text)
+                isolated &= result.content[0].text == content_store().page(STEPS[steps])
+    return isolated
+
+
+async def run_load_test(clients: int = 50, rounds: int = 3, max_sessions: Optional[int] = None) -> Dict[str, float]:
+    """Start a server process and run `clients` MCP clients against it concurrently.
+
+    Returns tool-call throughput and latency percentiles, how many clients
+    saw their own progress, the server's memory, and how long a SIGTERM
+    shutdown took.
+    """
+    port = _free_port()
+    command = [sys.executable, os.path.abspath(__file__), "serve", "--port", str(port), "--quiet",
+               "--max-sessions", str(max_sessions or clients)]
+    server = await asyncio.create_subprocess_exec(*command)
+    try:
+        await _wait_for_port(port)
+        url = f"http://{DEFAULT_HOST}:{port}/mcp"
+        latencies: List[float] = []
+        connects: List[float] = []
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(_simulated_client(url, i, rounds, latencies, connects) for i in range(clients)),
+            return_exceptions=True,
+        )
+        elapsed = time.perf_counter() - start
+        rss = _rss_mb(server.pid)
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.warning("client failed: %r", result)
+    finally:
+        stop = time.perf_counter()
+        if server.returncode is None:
+            server.send_signal(signal.SIGTERM)
+        await server.wait()
+        shutdown = time.perf_counter() - stop
+
+    latencies.sort()
+    return {
+        "clients": clients,
+        "tool_calls": len(latencies),
+        "elapsed_s": elapsed,
+        "calls_per_s": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p99_ms": latencies[max(0, int(len(latencies) * 0.99) - 1)] * 1000 if latencies else 0.0,
+        "max_ms": latencies[-1] * 1000 if latencies else 0.0,
+        "connect_p50_ms": statistics.median(connects) * 1000 if connects else 0.0,
+        "isolated_clients": sum(1 for r in results if r is True),
+        "failed_clients": sum(1 for r in results if isinstance(r, BaseException)),
+        "server_rss_mb": rss,
+        "shutdown_s": shutdown,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Django Girls MCP server for a classroom")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve_cmd = sub.add_parser("serve", help="serve the tutorial MCP server over HTTP")
+    serve_cmd.add_argument("--transport", choices=TRANSPORTS, default="streamable-http")
+    serve_cmd.add_argument("--host", default=DEFAULT_HOST)
+    serve_cmd.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve_cmd.add_argument("--max-sessions", type=int, default=100, help="open MCP sessions (streamable HTTP)")
+    serve_cmd.add_argument("--max-connections", type=int, default=200, help="concurrent HTTP connections")
+    serve_cmd.add_argument("--idle-timeout", type=float, default=1800, help="seconds before an idle session ends")
+    serve_cmd.add_argument("--grace", type=float, default=10.0, help="seconds to finish calls on shutdown")
+    serve_cmd.add_argument("--stream-responses", action="store_true",
+                           help="answer each call as an SSE stream (for tools that send progress)")
+    serve_cmd.add_argument("--quiet", action="store_true", help="log warnings only")
+
+    load = sub.add_parser("loadtest", help="many concurrent MCP clients against one server process")
+    load.add_argument("--clients", type=int, default=50)
+    load.add_argument("--rounds", type=int, default=3, help="times each client walks its steps")
+    load.add_argument("--max-sessions", type=int, default=None, help="server session limit (default: --clients)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        # FastMCP installs its own log handler on import; use the same format as classroom_server.py
+        level = logging.WARNING if args.quiet else logging.INFO
+        logging.basicConfig(level=level, format="%(asctime)s %(message)s", force=True)
+        try:
+            asyncio.run(serve(
+                args.transport, args.host, args.port, args.max_sessions, args.max_connections,
+                args.idle_timeout, args.grace, args.stream_responses,
+            ))
+        except KeyboardInterrupt:
+            pass
+    else:
+        logging.basicConfig(level=logging.WARNING, force=True)
+        report = asyncio.run(run_load_test(args.clients, args.rounds, args.max_sessions))
+        for key, value in report.items():
+            print(f"{key:>24}: {value:.1f}" if isinstance(value, float) else f"{key:>24}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Client-side copy of the tutorial curriculum, fetched from the MCP server.
+
+Each step tool (`setup_admin`, `install_django`, ...) returns a fixed page,
+yet a client pays one MCP round-trip per call. The server also publishes
+every page and snippet as a resource, plus the whole curriculum as one JSON
+document at `tutorial://curriculum` (see tutorial_content.py). `Curriculum`
+pulls that document once:
+
+1. `list_resources` - one round-trip, gives each resource's `_meta.version`;
+2. `read_resource(tutorial://curriculum)` - one round-trip, only when the
+   version differs from the copy already held.
+
+After that, `tool_result()` answers every step tool locally. Tools that take
+arguments (`diagnose_error`, `explain_programming_concept`) still go to the
+server. Calling `fetch()` again is cheap when nothing changed: one listing,
+no download.
+
+`python mcp_curriculum.py` starts the MCP server over stdio and compares a
+learner going through the steps with one tool call each against prefetch +
+local lookups.
+"""
+import asyncio
+import json
+import logging
+import statistics
+import sys
+import time
+from typing import Optional
+
+from tutorial_content import CURRICULUM_URI, TOOL_TOPICS, ContentStore
+
+
+class Curriculum:
+    """Tutorial pages prefetched from an MCP server, served without round-trips.
+
+    Args:
+        store (ContentStore, optional): A copy already held (from an earlier fetch).
+    """
+
+    def __init__(self, store: Optional[ContentStore] = None):
+        self.store = store
+        self.round_trips = 0
+        self.fetches = 0
+        self.local_hits = 0
+        self.fetch_seconds = 0.0
+
+    @property
+    def version(self) -> Optional[str]:
+        return self.store.version if self.store else None
+
+    async def fetch(self, session) -> bool:
+        """Bring the copy up to date from `session`; True if a new version was downloaded."""
+        start = time.perf_counter()
+        try:
+            listing = await session.list_resources()
+            self.round_trips += 1
+            remote = next(
+                ((r.meta or {}).get("version") for r in listing.resources if str(r.uri) == CURRICULUM_URI),
+                None,
+            )
+            if remote is None:
+                raise LookupError(f"server does not publish {CURRICULUM_URI}")
+            if remote == self.version:
+                return False
+            result = await session.read_resource(CURRICULUM_URI)
+            self.round_trips += 1
+            store = ContentStore.from_dict(json.loads(result.contents[0].text))
+            if store.version != remote:
+                raise ValueError(f"listed version {remote}, read {store.version}")
+            self.store = store
+            self.fetches += 1
+            return True
+        finally:
+            self.fetch_seconds += time.perf_counter() - start
+
+    def tool_result(self, name: str, arguments: Optional[dict] = None) -> Optional[str]:
+        """The page a step tool would return, or None when the server must be asked."""
+        if self.store is None or arguments or name not in TOOL_TOPICS:
+            return None
+        self.local_hits += 1
+        return self.store.page(TOOL_TOPICS[name])
+
+    def metrics(self) -> dict:
+        return {
+            "version": self.version or "-",
+            "topics": len(self.store.pages) if self.store else 0,
+            "round_trips": self.round_trips,
+            "fetch_ms": self.fetch_seconds * 1000,
+            "local_hits": self.local_hits,
+        }
+
+
+# --------------------------------------------------------------------------------------
+# BENCHMARK
+# --------------------------------------------------------------------------------------
+
+async def benchmark(passes: int = 3) -> None:
+    from mcp import ClientSession, StdioServerParameters
+    from mcp.client.stdio import stdio_client
+
+    server = StdioServerParameters(command=sys.executable, args=["django_girls_mcp_server.py"])
+    tools = list(TOOL_TOPICS)
+    async with stdio_client(server) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+
+            # Before: one tool call per step, every time the learner opens one
+            latencies = []
+            start = time.perf_counter()
+            for _ in range(passes):
+                for tool in tools:
+                    t = time.perf_counter()
+                    result = await session.call_tool(tool, {})
+                    latencies.append(time.perf_counter() - t)
+            tool_total = time.perf_counter() - start
+            last_page = result.content[0].text
+
+            # After: list + read once, then local lookups
+            curriculum = Curriculum()
+            start = time.perf_counter()
+            await curriculum.fetch(session)
+            lookups = []
+            for _ in range(passes):
+                for tool in tools:
+                    t = time.perf_counter()
+                    text = curriculum.tool_result(tool)
+                    lookups.append(time.perf_counter() - t)
+            prefetch_total = time.perf_counter() - start
+            assert text == last_page, "prefetched page differs from the tool result"
+
+            # A later refresh with nothing changed
+            t = time.perf_counter()
+            refreshed = await curriculum.fetch(session)
+            refresh = time.perf_counter() - t
+
+    requests = passes * len(tools)
+    print(f"{requests} step requests ({passes} passes over {len(tools)} step tools)")
+    print(f"{'':22} {'round-trips':>12} {'total ms':>10} {'p50 ms':>8} {'max ms':>8}")
+    print(f"{'tool call per step':22} {requests:>12} {tool_total * 1000:>10.1f} "
+          f"{statistics.median(latencies) * 1000:>8.2f} {max(latencies) * 1000:>8.2f}")
+    print(f"{'prefetch + local':22} {curriculum.round_trips - 1:>12} {prefetch_total * 1000:>10.1f} "
+          f"{statistics.median(lookups) * 1000:>8.3f} {max(lookups) * 1000:>8.3f}")
+    print(f"refresh with no change: 1 round-trip, {refresh * 1000:.1f} ms, downloaded={refreshed}")
+    print(f"curriculum {curriculum.version}: {len(curriculum.store.pages)} topics")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 3))
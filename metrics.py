@@ -0,0 +1,20 @@
+"""
+Formatting helpers for the `/stats` command.
+
+Components that keep performance counters expose them as a flat dict from a
+`metrics()` method; the front-ends gather those dicts and render them here.
+"""
+from typing import Mapping
+
+
+def format_metrics(sections: Mapping[str, Mapping[str, float]]) -> str:
+    """Render `{section title: {metric: value}}` as compact markdown."""
+    lines = []
+    for title, values in sections.items():
+        lines.append(f"**{title}**")
+        for name, value in values.items():
+            if isinstance(value, float):
+                value = f"{value:.1f}"
+            lines.append(f"- {name.replace('_', ' ')}: {value}")
+        lines.append("")
+    return "\n".join(lines).strip() or "No stats yet."
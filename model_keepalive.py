@@ -0,0 +1,296 @@
+"""
+Keep the model resident between runs of the tutorial.
+
+Every launch used to go through `FoundryLocalManager(...)`: check the
+service, resolve the model, load it, and pay the first prefill. Learners
+restart the script constantly, so that cost was paid again and again.
+
+The keep-alive companion is a small background process that selects and
+loads the model once, then holds it:
+
+    python model_keepalive.py start     # detach a companion for this machine
+    python model_keepalive.py status    # endpoint, model, clients, idle time
+    python model_keepalive.py stop
+    python model_keepalive.py bench     # relaunch-to-first-answer, cold vs warm
+
+While it runs, `select_model()` asks it for the endpoint over a localhost
+socket (one round trip, no Foundry calls) and holds a *lease*: the
+connection stays open for as long as the tutorial runs. The companion pings
+the model every `ping_interval` seconds so it stays loaded and warm, and
+reloads it if a ping fails. Once no tutorial has been connected for
+`idle_timeout` seconds, the companion unloads the model and exits, so the
+memory comes back when the workshop ends.
+
+Set DJANGO_GIRLS_KEEPALIVE=1 to start a companion automatically on launch.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import asdict
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8766
+IDLE_TIMEOUT = 30 * 60
+PING_INTERVAL = 120.0
+
+# Held for the life of the tutorial process; closing it ends the lease
+_lease: Optional[socket.socket] = None
+
+
+def keepalive_port() -> int:
+    return int(os.environ.get("DJANGO_GIRLS_KEEPALIVE_PORT", DEFAULT_PORT))
+
+
+def attach(spawn: Optional[bool] = None, timeout: float = 0.2):
+    """Model choice from a running companion (holding a lease on it), or None.
+
+    With `spawn` (default: DJANGO_GIRLS_KEEPALIVE=1) a companion is started
+    in the background when none is running, for the next launch to use.
+    """
+    global _lease
+    from model_selection import ModelChoice
+
+    try:
+        sock = socket.create_connection(("127.0.0.1", keepalive_port()), timeout=timeout)
+    except OSError:
+        if spawn if spawn is not None else os.environ.get("DJANGO_GIRLS_KEEPALIVE") == "1":
+            start_companion()
+        return None
+    try:
+        sock.sendall(b'{"op": "lease"}\n')
+        reply = json.loads(sock.makefile("rb").readline() or b"{}")
+    except (OSError, ValueError):
+        sock.close()
+        return None
+    if not reply.get("healthy"):
+        sock.close()
+        return None
+    sock.settimeout(None)
+    _lease = sock
+    return ModelChoice(**reply["model"], source="keepalive")
+
+
+def start_companion(idle_timeout: float = IDLE_TIMEOUT, ping_interval: float = PING_INTERVAL) -> None:
+    """Start a detached companion process."""
+    subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "serve",
+         "--idle-timeout", str(idle_timeout), "--ping-interval", str(ping_interval)],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def request(op: str, timeout: float = 2.0) -> Optional[dict]:
+    """Send one command to the companion; None if it isn't running."""
+    try:
+        with socket.create_connection(("127.0.0.1", keepalive_port()), timeout=timeout) as sock:
+            sock.sendall((json.dumps({"op": op}) + "\n").encode())
+            return json.loads(sock.makefile("rb").readline() or b"{}")
+    except (OSError, ValueError):
+        return None
+
+
+class KeepAliveServer:
+    """The companion: holds the model loaded while tutorials are connected.
+
+    Args:
+        port (int): Localhost port to listen on.
+        idle_timeout (float): Seconds without any client before unloading and exiting.
+        ping_interval (float): Seconds between keep-warm pings to the model.
+    """
+
+    def __init__(self, port: int = DEFAULT_PORT, idle_timeout: float = IDLE_TIMEOUT,
+                 ping_interval: float = PING_INTERVAL):
+        self.port = port
+        self.idle_timeout = idle_timeout
+        self.ping_interval = ping_interval
+        self.choice = None
+        self.healthy = False
+        self.clients = 0
+        self.idle_since = time.monotonic()
+        self.last_ping_ms: Optional[float] = None
+        self._stop = asyncio.Event()
+
+    async def run(self) -> None:
+        from model_selection import select_model
+
+        self.choice = await asyncio.to_thread(select_model, keepalive=False)
+        self.healthy = await self._ping()
+        server = await asyncio.start_server(self._handle, "127.0.0.1", self.port)
+        logger.info("Keeping %s resident at %s", self.choice.model_id, self.choice.endpoint)
+        pinger = asyncio.create_task(self._ping_loop())
+        try:
+            while not self._stop.is_set():
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    pass
+                if self.clients == 0 and time.monotonic() - self.idle_since > self.idle_timeout:
+                    logger.info("No tutorial for %.0f s, releasing the model", self.idle_timeout)
+                    break
+        finally:
+            pinger.cancel()
+            server.close()
+            await server.wait_closed()
+            await asyncio.to_thread(self._unload)
+
+    def status(self) -> dict:
+        return {
+            "healthy": self.healthy,
+            "model": asdict(self.choice) if self.choice else None,
+            "clients": self.clients,
+            "idle_s": time.monotonic() - self.idle_since if self.clients == 0 else 0.0,
+            "idle_timeout_s": self.idle_timeout,
+            "last_ping_ms": self.last_ping_ms,
+            "pid": os.getpid(),
+        }
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        leased = False
+        try:
+            line = await reader.readline()
+            op = json.loads(line or b"{}").get("op")
+            if op == "lease":
+                leased = True
+                self.clients += 1
+            elif op == "stop":
+                self._stop.set()
+            model = {k: v for k, v in asdict(self.choice).items() if k != "source"} if self.choice else None
+            writer.write((json.dumps({**self.status(), "model": model}) + "\n").encode())
+            await writer.drain()
+            if leased:
+                # The lease lasts until the tutorial closes the connection (or dies)
+                await reader.read()
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            if leased:
+                self.clients -= 1
+                if self.clients == 0:
+                    self.idle_since = time.monotonic()
+            writer.close()
+
+    async def _ping_loop(self) -> None:
+        from model_selection import select_model
+
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            self.healthy = await self._ping()
+            if not self.healthy:
+                logger.warning("Model did not answer the keep-alive ping, reloading")
+                try:
+                    self.choice = await asyncio.to_thread(select_model, keepalive=False)
+                    self.healthy = await self._ping()
+                except Exception as e:
+                    logger.warning("Reloading failed: %r", e)
+
+    async def _ping(self) -> bool:
+        import openai
+
+        client = openai.AsyncOpenAI(base_url=self.choice.endpoint, api_key=self.choice.api_key)
+        start = time.perf_counter()
+        try:
+            # One token keeps the model loaded (and its load timer fresh)
+            await asyncio.wait_for(client.chat.completions.create(
+                model=self.choice.model_id, messages=[{"role": "user", "content": "ping"}], max_tokens=1,
+            ), timeout=60)
+        except Exception as e:
+            logger.debug("Ping failed: %r", e)
+            return False
+        finally:
+            await client.close()
+        self.last_ping_ms = (time.perf_counter() - start) * 1000
+        return True
+
+    def _unload(self) -> None:
+        # An external server (DJANGO_GIRLS_ENDPOINT) manages its own models
+        if self.choice is None or self.choice.source == "endpoint":
+            return
+        try:
+            from foundry_local import FoundryLocalManager
+
+            FoundryLocalManager().unload_model(self.choice.model_id)
+        except Exception as e:
+            logger.warning("Could not unload %s: %r", self.choice.model_id, e)
+
+
+def benchmark(ready_timeout: float = 600.0) -> dict:
+    """Launch-to-first-answer time without and with a companion.
+
+    The cold leg loads the model itself, so no companion may be running
+    when it starts; the benchmark then starts one and times a launch that
+    attaches to it.
+    """
+    import openai
+
+    from model_selection import select_model
+
+    def first_answer(choice) -> None:
+        client = openai.OpenAI(base_url=choice.endpoint, api_key=choice.api_key)
+        client.chat.completions.create(
+            model=choice.model_id, messages=[{"role": "user", "content": "hello"}], max_tokens=8
+        )
+
+    if request("status") is not None:
+        raise SystemExit("Stop the companion first (python model_keepalive.py stop): it keeps the model loaded")
+
+    start = time.perf_counter()
+    first_answer(select_model(keepalive=False))
+    cold = time.perf_counter() - start
+
+    start_companion()
+    deadline = time.monotonic() + ready_timeout
+    while not (request("status") or {}).get("healthy"):
+        if time.monotonic() > deadline:
+            raise SystemExit("The companion did not get the model ready")
+        time.sleep(0.5)
+
+    start = time.perf_counter()
+    choice = attach(spawn=False)
+    if choice is None:
+        raise SystemExit("Could not attach to the companion")
+    first_answer(choice)
+    warm = time.perf_counter() - start
+    return {"without_companion_s": cold, "with_companion_s": warm}
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Keep the tutorial's model resident between runs")
+    parser.add_argument("command", choices=["start", "serve", "status", "stop", "bench"])
+    parser.add_argument("--idle-timeout", type=float, default=IDLE_TIMEOUT)
+    parser.add_argument("--ping-interval", type=float, default=PING_INTERVAL)
+    args = parser.parse_args(argv)
+
+    if args.command == "start":
+        if request("status") is not None:
+            print("Already running.")
+            return
+        start_companion(args.idle_timeout, args.ping_interval)
+        print(f"Starting the companion on port {keepalive_port()} (model loads in the background).")
+    elif args.command == "serve":
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+        asyncio.run(KeepAliveServer(keepalive_port(), args.idle_timeout, args.ping_interval).run())
+    elif args.command in ("status", "stop"):
+        reply = request(args.command)
+        if reply is None:
+            print("Not running.")
+        else:
+            for name, value in reply.items():
+                print(f"{name:>16}: {value}")
+    else:
+        for name, value in benchmark().items():
+            print(f"{name:>20}: {value:.3f}")
+
+
+if __name__ == "__main__":
+    main()
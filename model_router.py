@@ -0,0 +1,424 @@
+"""
+Two-tier routing: cheap tool selection, the large model only for explanations.
+
+Most tutorial turns ("hello", "install django", "next step", a pasted error)
+only need the model to pick one of a dozen tools, and asking Phi-4 to do
+that costs seconds per turn. `ModelRouter` tries the cheap tiers first:
+
+1. **router**: two precompiled regexes with one named group per intent,
+   one over anchors (`INTENT_SYNONYMS`: multi-word phrases and words no
+   other step uses) and one over common words (`INTENT_KEYWORDS`, e.g.
+   "page" or "python"). It answers in microseconds and handles most
+   navigation turns. Anchors route on their own; common words only route
+   messages of a few words, and a turn naming two steps about equally is
+   left to the models.
+2. **small**: optionally, a small local model (DJANGO_GIRLS_ROUTER_MODEL,
+   e.g. qwen2.5-0.5b) that is asked for a single topic name when the regex
+   finds nothing.
+3. **large**: open-ended questions ("why do we need migrations?", "explain
+   views") and anything the cheaper tiers can't place go to the large model.
+
+The router only decides the *intent*. Each front-end turns it into its own
+call: `tutorial.show('setup')` for the code-generation agent, or
+`setup_environment()` for the MCP agent. `metrics()` reports how often turns
+escalate and the latency of each tier. Run `python model_router.py` to replay
+the learner corpus against single-model mode (`--live` uses the real models).
+"""
+import os
+import re
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Tuple
+
+from traceback_digest import looks_like_error
+from tutorial_content import SNIPPETS, STEPS
+
+ROUTER = "router"
+SMALL = "small"
+LARGE = "large"
+
+# Tutorial steps in order (see tutorial_content.py), then the intents that aren't steps
+CODE_INTENTS = [f"{name}_code" for name in SNIPPETS]
+INTENTS = STEPS + CODE_INTENTS + ["next", "help"]
+
+# Phrases learners use for each intent (matched on word boundaries, plurals included).
+# These are anchors: multi-word phrases and words only this step uses, enough to route on.
+INTENT_SYNONYMS: Dict[str, List[str]] = {
+    "help": ["got an error", "getting an error", "get an error", "i have an error", "error message",
+             "doesn't work", "does not work", "not working", "isn't working", "command not found",
+             "it broke", "something went wrong", "help me fix", "traceback"],
+    "next": ["next step", "what now", "what's next", "whats next", "move on", "i'm done",
+             "go on", "carry on", "keep going", "environment is ready", "my environment is ready"],
+    "welcome": ["good morning", "good afternoon", "get started", "start the tutorial", "let's start"],
+    "python_basics": ["python basics", "python introduction", "intro to python", "learn python", "teach me python",
+                      "python interpreter", "python console"],
+    # Ahead of "setup": phrases matching both at the same place go to the first intent listed
+    "admin": ["superuser", "admin panel", "admin interface", "admin site", "createsuperuser",
+              "setup admin", "set up admin", "set up the admin"],
+    "setup": ["set up my environment", "set up the environment", "setup my environment", "django setup",
+              "virtual environment", "virtualenv", "venv", "virtual env", "blog_env"],
+    "django_install": ["install django", "installing django", "django install", "django installation",
+                       "pip install django", "get django"],
+    "create_project": ["create the project", "create a project", "new project", "startproject", "start a project",
+                       "django project", "create project", "mysite"],
+    "create_app": ["blog app", "create the app", "create an app", "create app", "startapp", "new app",
+                   "create the blog", "django app"],
+    "models": ["post model", "database model", "models.py"],
+    "views": ["views.py", "urls.py", "html page"],
+    "test": ["test it", "run the server", "runserver", "try it", "see my blog", "check it works",
+             "run my blog", "open the site", "local server"],
+}
+
+# Common words that name a step but also turn up in free-form questions ("can
+# a page show two posts?"). They only route short messages ("hello", "the
+# admin", "make the views") and requests for code ("show me the models code");
+# in longer ones the model decides.
+INTENT_KEYWORDS: Dict[str, List[str]] = {
+    "help": ["stuck"],
+    "next": ["next", "continue", "done"],
+    "welcome": ["hello", "hi", "hey", "hiya", "start", "begin", "welcome"],
+    "python_basics": ["python"],
+    "admin": ["admin"],
+    "setup": ["setup", "environment"],
+    "models": ["model", "database", "migration", "migrate"],
+    "views": ["view", "url", "template", "page"],
+    "test": ["test"],
+}
+KEYWORD_MAX_WORDS = 4
+
+# The best intent must outscore the runner-up by this factor, else the turn is ambiguous
+MIN_MARGIN = 1.5
+
+# "show me the models code" asks for the snippet rather than the lesson
+_CODE_REQUEST = re.compile(r"\b(?:code|snippet|example|file contents?|what do i (?:type|write))\b", re.IGNORECASE)
+_CODE_FOR = {"models": "models_code", "admin": "admin_code", "views": "views_code"}
+_URL_OR_TEMPLATE = re.compile(r"\b(?P<urls_code>urls?(?:\.py)?)\b|\b(?P<template_code>templates?|html)\b",
+                              re.IGNORECASE)
+
+# Questions that want an explanation rather than a tutorial step
+_EXPLANATION = re.compile(
+    r"^\s*(?:why\b|explain\b|can you explain\b|what(?:'s| is| are| does)\b(?! next\b| now\b)"
+    r"|how (?:does|do(?!\s+i\b)|is|come)\b|tell me (?:more )?about\b|what's the difference\b|difference between\b"
+    r"|when should\b|is it\b|should i\b)",
+    re.IGNORECASE,
+)
+
+SMALL_MODEL_PROMPT = (
+    "You route messages for a Django tutorial. Reply with exactly one word from this list:\n"
+    + ", ".join(INTENTS + ["none"])
+    + "\nUse 'none' if the learner asks for an explanation or you are not sure."
+)
+
+
+def _plural(term: str) -> str:
+    escaped = re.escape(term).replace(r"\ ", r"\s+")
+    if term.endswith(("s", "x", "ch", "sh", "y", ".py", "_env")) or not term[-1].isalpha():
+        return escaped
+    return escaped + "(?:s|es)?"
+
+
+def _compile(synonyms: Dict[str, List[str]]) -> "re.Pattern[str]":
+    # One named group per intent, longest phrases first so "install django" wins over "django"
+    alternatives = []
+    for intent, terms in synonyms.items():
+        ordered = sorted(terms, key=len, reverse=True)
+        alternatives.append(f"(?P<{intent}>" + "|".join(_plural(term) for term in ordered) + ")")
+    return re.compile(r"(?<![\w'])(?:" + "|".join(alternatives) + r")(?![\w'])", re.IGNORECASE)
+
+
+_PATTERN = _compile(INTENT_SYNONYMS)
+_KEYWORDS = _compile(INTENT_KEYWORDS)
+
+
+@dataclass
+class Route:
+    """Where a turn goes: `intent` is set unless the large model has to answer."""
+    tier: str
+    intent: Optional[str] = None
+    explanation: bool = False
+
+
+def classify(text: str) -> Route:
+    """Deterministic tier: the intent for `text`, or a LARGE route if it has none."""
+    if looks_like_error(text):
+        return Route(ROUTER, "help")
+
+    scores: Dict[str, float] = {}
+    length = max(len(text), 1)
+    patterns = [_PATTERN]
+    if len(text.split()) <= KEYWORD_MAX_WORDS or _CODE_REQUEST.search(text):
+        patterns.append(_KEYWORDS)
+    for pattern in patterns:
+        for match in pattern.finditer(text):
+            # Specific phrases beat short words, and earlier mentions weigh more
+            weight = 1.0 - 0.5 * (match.start() / length)
+            scores[match.lastgroup] = scores.get(match.lastgroup, 0.0) + len(match.group()) * weight
+    if "help" in scores or ("next" in scores and len(text) < 40):
+        return Route(ROUTER, "help" if "help" in scores else "next")
+    if _EXPLANATION.match(text):
+        return Route(LARGE, explanation=True)
+    scores.pop("next", None)
+    if not scores:
+        return Route(LARGE)
+
+    ranked = sorted(scores.values(), reverse=True)
+    if len(ranked) > 1 and ranked[0] < MIN_MARGIN * ranked[1]:
+        # Two steps named about equally: let the model decide
+        return Route(LARGE)
+    intent = max(scores, key=scores.get)
+    if _CODE_REQUEST.search(text):
+        match = _URL_OR_TEMPLATE.search(text) if intent == "views" else None
+        intent = match.lastgroup if match else _CODE_FOR.get(intent, intent)
+    return Route(ROUTER, intent)
+
+
+MODEL_DOWN_NOTE = "The AI model isn't responding right now, so here is the closest part of the tutorial."
+MODEL_SLOW_NOTE = "The AI model took too long to answer, so here is the closest part of the tutorial."
+
+
+def answer_without_model(user_text: str, tutorial) -> str:
+    """Best answer from the tutorial content alone, for when the model is down."""
+    from concept_matcher import explain_concept, match_concepts
+
+    if match_concepts(user_text):
+        return explain_concept(user_text)
+    section = tutorial.search(user_text)
+    if section:
+        return section
+    return ("I can't answer free-form questions until the model is back, but tutorial steps still work: "
+            "try \"next step\", \"install django\" or \"show me the models code\".")
+
+
+class ModelRouter:
+    """Picks the cheapest tier that can handle a turn and keeps per-tier figures.
+
+    Args:
+        small_llm: Optional small chat model used when the regex finds no intent.
+        window (int): Latencies kept per tier for the percentiles.
+    """
+
+    def __init__(self, small_llm=None, window: int = 500):
+        self.small_llm = small_llm
+        self._latencies: Dict[str, Deque[float]] = {tier: deque(maxlen=window) for tier in (ROUTER, SMALL, LARGE)}
+        self._counts = {ROUTER: 0, SMALL: 0, LARGE: 0}
+        self._small_misses = 0
+
+    async def route(self, text: str) -> Route:
+        start = time.perf_counter()
+        route = classify(text)
+        if route.tier == ROUTER:
+            self.record(ROUTER, time.perf_counter() - start)
+            return route
+        if route.explanation or self.small_llm is None:
+            return route
+
+        intent = await self._ask_small_model(text)
+        if intent is None:
+            self._small_misses += 1
+            return Route(LARGE)
+        self.record(SMALL, time.perf_counter() - start)
+        return Route(SMALL, intent)
+
+    def record(self, tier: str, seconds: float) -> None:
+        """Count a turn answered by `tier` (callers time the LARGE tier themselves)."""
+        self._counts[tier] += 1
+        self._latencies[tier].append(seconds)
+
+    def metrics(self) -> Dict[str, float]:
+        turns = sum(self._counts.values())
+        figures = {
+            "turns": turns,
+            "escalation_rate": self._counts[LARGE] / turns if turns else 0.0,
+            "small_model_misses": self._small_misses,
+        }
+        for tier in (ROUTER, SMALL, LARGE):
+            latencies = sorted(self._latencies[tier])
+            figures[f"{tier}_turns"] = self._counts[tier]
+            figures[f"{tier}_p50_ms"] = latencies[len(latencies) // 2] * 1000 if latencies else 0.0
+        return figures
+
+    async def _ask_small_model(self, text: str) -> Optional[str]:
+        from langchain_core.messages import HumanMessage, SystemMessage
+
+        try:
+            response = await self.small_llm.ainvoke(
+                [SystemMessage(content=SMALL_MODEL_PROMPT), HumanMessage(content=text)], max_tokens=8
+            )
+        except Exception:
+            return None
+        words = re.findall(r"[a-z_]+", response.content.lower())
+        return next((word for word in words if word in INTENTS), None)
+
+
+def create_router() -> ModelRouter:
+    """Router for the entry points, with the small model from DJANGO_GIRLS_ROUTER_MODEL if set."""
+    alias = os.environ.get("DJANGO_GIRLS_ROUTER_MODEL")
+    if not alias:
+        return ModelRouter()
+    from tutorial_session import create_llm
+
+    return ModelRouter(small_llm=create_llm(alias))
+
+
+# Learner turns with the intent a good tutor would pick (None: needs an explanation)
+REPLAY_CORPUS: List[Tuple[str, Optional[str]]] = [
+    ("hello", "welcome"),
+    ("hi there!", "welcome"),
+    ("let's get started", "welcome"),
+    ("teach me python basics", "python_basics"),
+    ("I want to learn python first", "python_basics"),
+    ("help me setup my environment", "setup"),
+    ("how do I make a virtual environment", "setup"),
+    ("install django", "django_install"),
+    ("how do I install django?", "django_install"),
+    ("create the project", "create_project"),
+    ("I want to start a new django project", "create_project"),
+    ("create the blog app", "create_app"),
+    ("run startapp", "create_app"),
+    ("show me the models", "models"),
+    ("let's make the post model", "models"),
+    ("show me the models code", "models_code"),
+    ("set up the admin", "admin"),
+    ("how do I create a superuser", "admin"),
+    ("give me the admin code", "admin_code"),
+    ("make the views", "views"),
+    ("show me the urls code", "urls_code"),
+    ("what code goes in the template", "template_code"),
+    ("let's test it", "test"),
+    ("how do I run the server", "test"),
+    ("next step", "next"),
+    ("ok done, what's next?", "next"),
+    ("continue", "next"),
+    ("I got an error", "help"),
+    ("python manage.py runserver says command not found", "help"),
+    ("Traceback (most recent call last):\n  File \"manage.py\", line 22\nImportError: No module named django", "help"),
+    ("why do we need migrations?", None),
+    ("what is a model in django?", None),
+    ("explain how views and urls work together", None),
+    ("what's the difference between a project and an app?", None),
+    ("tell me about the admin", None),
+    ("should I use sqlite or postgres?", None),
+]
+
+# Held out: written after the synonyms were settled and never used to tune them.
+# Many are free-form questions that mention a step word in passing.
+HELD_OUT_CORPUS: List[Tuple[str, Optional[str]]] = [
+    ("hey!", "welcome"),
+    ("good morning", "welcome"),
+    ("I'd like to get started please", "welcome"),
+    ("python", "python_basics"),
+    ("can you teach me python", "python_basics"),
+    ("I need a virtualenv", "setup"),
+    ("set up the environment", "setup"),
+    ("pip install django", "django_install"),
+    ("run startproject", "create_project"),
+    ("make a new app", "create_app"),
+    ("add the post model", "models"),
+    ("how do I migrate the database", "models"),
+    ("make me a superuser", "admin"),
+    ("write views.py", "views"),
+    ("give me the views code", "views_code"),
+    ("start the server", "test"),
+    ("let me run my blog", "test"),
+    ("what now?", "next"),
+    ("done", "next"),
+    ("keep going", "next"),
+    ("it's not working", "help"),
+    ("ModuleNotFoundError: No module named 'django'", "help"),
+    ("which python version do I need for this?", None),
+    ("can a page show more than one post", None),
+    ("is the url the same as the view", None),
+    ("could my model have an image field", None),
+    ("do I need to test everything I write", None),
+    ("I'm done for today, how do I save my work", None),
+    ("hi, my environment variables look weird on windows", None),
+    ("where do I start with the admin templates", None),
+]
+
+
+def routing_report(corpus: List[Tuple[str, Optional[str]]]) -> Dict[str, float]:
+    """How many turns the router places on its own, and how many of those it gets wrong."""
+    routed = [(expected, classify(text).intent) for text, expected in corpus if classify(text).intent is not None]
+    misrouted = sum(1 for expected, intent in routed if intent != expected)
+    return {
+        "turns": len(corpus),
+        "routed": len(routed),
+        "misrouted": misrouted,
+        "precision": (len(routed) - misrouted) / len(routed) if routed else 1.0,
+    }
+
+
+def benchmark(large_llm=None, small_llm=None, large_latency: float = 1.5, small_latency: float = 0.25,
+              corpus: Optional[List[Tuple[str, Optional[str]]]] = None) -> Dict[str, float]:
+    """Replay the corpus in single-model and two-tier mode.
+
+    With real models (`--live`) single-model accuracy is what the large
+    model actually answers. Without, the large model is an oracle that takes
+    `large_latency` seconds per turn (and the small model is not used), so the
+    figures show what routing costs in accuracy and saves in latency.
+    """
+    import asyncio
+
+    corpus = corpus or REPLAY_CORPUS
+
+    from tutorial_session import SYSTEM_PROMPT, extract_tutorial_call
+
+    async def ask_large(text: str, expected: Optional[str]) -> Optional[str]:
+        if large_llm is None:
+            await asyncio.sleep(large_latency)
+            return expected
+        from langchain_core.messages import HumanMessage, SystemMessage
+
+        response = await large_llm.ainvoke([SystemMessage(content=SYSTEM_PROMPT), HumanMessage(content=text)])
+        code = extract_tutorial_call(response.content) or ""
+        match = re.search(r"tutorial\.(?:show\(['\"](\w+)|(next_step)|(help))", code)
+        if not match:
+            return None
+        return match[1] or ("next" if match[2] else "help")
+
+    async def run(two_tier: bool) -> Tuple[float, float, ModelRouter]:
+        router = ModelRouter(small_llm=small_llm)
+        correct = 0
+        start = time.perf_counter()
+        for text, expected in corpus:
+            route = await router.route(text) if two_tier else Route(LARGE)
+            answer = route.intent
+            if answer is None:
+                turn_start = time.perf_counter()
+                answer = await ask_large(text, expected)
+                router.record(LARGE, time.perf_counter() - turn_start)
+            correct += answer == expected
+        return correct / len(corpus), (time.perf_counter() - start) / len(corpus), router
+
+    async def both():
+        return await run(two_tier=False), await run(two_tier=True)
+
+    (single_acc, single_s, _), (tiered_acc, tiered_s, router) = asyncio.run(both())
+    return {
+        "single_model_accuracy": single_acc,
+        "single_model_ms_per_turn": single_s * 1000,
+        "two_tier_accuracy": tiered_acc,
+        "two_tier_ms_per_turn": tiered_s * 1000,
+        **{f"two_tier_{name}": value for name, value in router.metrics().items()},
+    }
+
+
+if __name__ == "__main__":
+    import sys
+
+    for label, corpus in (("tuning corpus", REPLAY_CORPUS), ("held-out corpus", HELD_OUT_CORPUS)):
+        print(f"{label}:")
+        for text, expected in corpus:
+            got = classify(text).intent
+            if got is not None and got != expected:
+                print(f"  misrouted: {text!r}: expected {expected}, got {got}")
+        if "--live" in sys.argv:
+            from tutorial_session import create_llm
+
+            results = benchmark(large_llm=create_llm(), small_llm=create_router().small_llm, corpus=corpus)
+        else:
+            results = benchmark(large_latency=0.05, corpus=corpus)
+        results.update({f"router_{name}": value for name, value in routing_report(corpus).items()})
+        for name, value in results.items():
+            print(f"{name:>28}: {value:.3f}")
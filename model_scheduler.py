@@ -0,0 +1,389 @@
+"""
+Fair request scheduler in front of the shared local model.
+
+When several learners share one Foundry Local endpoint, firing every
+`ainvoke` at once makes the model thrash and the learner who typed last can
+wait behind everyone else. `ModelScheduler` queues model calls per session
+and hands them out round-robin, with:
+
+- a configurable number of requests in flight at the model,
+- a high-priority lane for short prompts (quick tool-selection turns),
+- a deadline per request: requests that wait too long fail with TimeoutError
+  instead of being sent to the model late,
+- coalescing of identical requests (e.g. thirty learners typing "hello" at
+  the start of a workshop get one model call), and
+- optional micro-batching: compatible requests are released together so
+  servers with parallel decoding slots can process them in one pass. Foundry
+  Local decodes one request at a time, so batching is off by default.
+
+`ScheduledChatModel` wraps any LangChain chat model so the code-generation
+agent, the MCP agent and the classroom server can use the scheduler without
+changing how they call the model. `metrics()` reports queue depth and wait
+times for the `/stats` command.
+"""
+import asyncio
+import json
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk, BaseMessageChunk
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+
+HIGH = 0
+NORMAL = 1
+
+_ANY = object()
+
+
+@dataclass
+class _Request:
+    session_id: str
+    factory: Callable[[], Awaitable[Any]]
+    key: Optional[Hashable]
+    batch_key: Hashable
+    priority: int
+    deadline: float
+    queue_only: bool = False  # the deadline stops applying once the request is dispatched
+    enqueued_at: float = field(default_factory=time.monotonic)
+    waiters: List[asyncio.Future] = field(default_factory=list)
+    task: Optional[asyncio.Task] = None
+    expiry: Optional[asyncio.TimerHandle] = None  # drops the request if it is still queued at its deadline
+    cancelled: bool = False
+
+
+class ModelScheduler:
+    """Per-session fair queue with bounded concurrency towards the model.
+
+    Args:
+        max_in_flight (int): Model calls allowed to run at the same time.
+        batch_size (int): Compatible requests released together (1 = no batching).
+        batch_window (float): Seconds to wait for more requests to fill a batch.
+        timeout (float): Default deadline, in seconds, from submission to answer.
+        short_prompt_chars (int): Prompts whose last message is at most this
+            long go to the high-priority lane.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 1,
+        batch_size: int = 1,
+        batch_window: float = 0.005,
+        timeout: float = 120.0,
+        short_prompt_chars: int = 200,
+        metrics_window: int = 1000,
+    ):
+        self.max_in_flight = max_in_flight
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.timeout = timeout
+        self.short_prompt_chars = short_prompt_chars
+
+        # priority -> session_id -> that session's pending requests; the
+        # OrderedDict order is the round-robin order between sessions
+        self._rings: Dict[int, "OrderedDict[str, Deque[_Request]]"] = {HIGH: OrderedDict(), NORMAL: OrderedDict()}
+        self._by_key: Dict[Hashable, _Request] = {}
+        self._queued = 0
+        self._in_flight = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+
+        self._wait_times: Deque[float] = deque(maxlen=metrics_window)
+        self._counters = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "expired": 0,
+            "cancelled": 0,
+            "coalesced": 0,
+            "dispatched": 0,
+            "batches": 0,
+            "max_queue_depth": 0,
+        }
+
+    def wrap(self, llm: BaseChatModel, session_id: str = "local", priority: Optional[int] = None) -> "ScheduledChatModel":
+        """Return a chat model that sends `llm` calls for `session_id` through this scheduler."""
+        return ScheduledChatModel(llm=llm, scheduler=self, session_id=session_id, priority=priority)
+
+    async def submit(
+        self,
+        session_id: str,
+        factory: Callable[[], Awaitable[Any]],
+        key: Optional[Hashable] = None,
+        batch_key: Hashable = None,
+        priority: int = NORMAL,
+        timeout: Optional[float] = None,
+        queue_only: bool = False,
+    ) -> Any:
+        """Queue a model call and wait for its result.
+
+        `factory` is called (once) when the request is dispatched. Requests
+        with the same non-None `key` that are queued or running at the same
+        time share one call. With `queue_only` the deadline only limits the
+        wait in the queue; once dispatched the call runs until it finishes.
+        """
+        self._ensure_dispatcher()
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self._counters["submitted"] += 1
+
+        request = self._by_key.get(key) if key is not None else None
+        if request is not None:
+            request.waiters.append(waiter)
+            self._counters["coalesced"] += 1
+        else:
+            timeout = timeout or self.timeout
+            request = _Request(
+                session_id=session_id,
+                factory=factory,
+                key=key,
+                batch_key=batch_key,
+                priority=priority,
+                deadline=time.monotonic() + timeout,
+                queue_only=queue_only,
+            )
+            request.waiters.append(waiter)
+            # Expire on time even while every slot is busy and nothing is popped
+            request.expiry = loop.call_later(timeout, self._expire, request)
+            if key is not None:
+                self._by_key[key] = request
+            self._rings[priority].setdefault(session_id, deque()).append(request)
+            self._queued += 1
+            self._counters["max_queue_depth"] = max(self._counters["max_queue_depth"], self._queued)
+            self._wakeup.set()
+
+        try:
+            return await waiter
+        except asyncio.CancelledError:
+            self._abandon(request, waiter)
+            raise
+
+    def metrics(self) -> Dict[str, float]:
+        """Queue depth, concurrency and wait-time figures for `/stats`."""
+        waits = sorted(self._wait_times)
+        batches = self._counters["batches"]
+        return {
+            "queue_depth": self._queued,
+            "in_flight": self._in_flight,
+            **self._counters,
+            "avg_batch_size": self._counters["dispatched"] / batches if batches else 0.0,
+            "wait_p50_ms": _percentile(waits, 0.50) * 1000,
+            "wait_p95_ms": _percentile(waits, 0.95) * 1000,
+            "wait_max_ms": (waits[-1] if waits else 0.0) * 1000,
+        }
+
+    # ----------------------------------------------------------------------------------
+    # Dispatching
+    # ----------------------------------------------------------------------------------
+
+    def _ensure_dispatcher(self) -> None:
+        if self._dispatcher is None or self._dispatcher.done():
+            self._wakeup = asyncio.Event()
+            self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch_loop())
+
+    async def _dispatch_loop(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._in_flight < self.max_in_flight:
+                first = self._pop()
+                if first is None:
+                    break
+                batch = [first]
+                if self.batch_size > 1:
+                    if self.batch_window:
+                        await asyncio.sleep(self.batch_window)
+                    room = min(self.batch_size, self.max_in_flight - self._in_flight)
+                    while len(batch) < room:
+                        request = self._pop(first.batch_key)
+                        if request is None:
+                            break
+                        batch.append(request)
+                self._counters["batches"] += 1
+                for request in batch:
+                    self._start(request)
+
+    def _pop(self, batch_key: Any = _ANY) -> Optional[_Request]:
+        """Take the next request, round-robin across sessions, high priority first."""
+        now = time.monotonic()
+        for priority in (HIGH, NORMAL):
+            ring = self._rings[priority]
+            for session_id in list(ring):
+                queue = ring[session_id]
+                while queue and (queue[0].cancelled or queue[0].deadline <= now):
+                    self._drop(queue.popleft())
+                if not queue:
+                    del ring[session_id]
+                    continue
+                if batch_key is not _ANY and queue[0].batch_key != batch_key:
+                    continue
+                request = queue.popleft()
+                # This session goes to the back of the line
+                del ring[session_id]
+                if queue:
+                    ring[session_id] = queue
+                self._queued -= 1
+                return request
+        return None
+
+    def _start(self, request: _Request) -> None:
+        if request.expiry is not None:
+            request.expiry.cancel()
+        self._in_flight += 1
+        self._counters["dispatched"] += 1
+        self._wait_times.append(time.monotonic() - request.enqueued_at)
+        request.task = asyncio.get_running_loop().create_task(self._run(request))
+
+    async def _run(self, request: _Request) -> None:
+        try:
+            if request.queue_only:
+                result = await request.factory()
+            else:
+                remaining = max(request.deadline - time.monotonic(), 0.0)
+                result = await asyncio.wait_for(request.factory(), timeout=remaining)
+        except asyncio.CancelledError:
+            # Every waiter gave up; nobody is left to notify
+            self._counters["cancelled"] += 1
+        except asyncio.TimeoutError:
+            self._counters["expired"] += 1
+            self._resolve(request, error=TimeoutError("Model request exceeded its deadline"))
+        except Exception as e:
+            self._counters["failed"] += 1
+            self._resolve(request, error=e)
+        else:
+            self._counters["completed"] += 1
+            self._resolve(request, result=result)
+        finally:
+            self._in_flight -= 1
+            self._forget(request)
+            self._wakeup.set()
+
+    def _expire(self, request: _Request) -> None:
+        """Deadline timer: take the request out of its queue if it is still waiting."""
+        queue = self._rings[request.priority].get(request.session_id)
+        if request.task is not None or request.cancelled or queue is None or request not in queue:
+            return
+        queue.remove(request)
+        if not queue:
+            del self._rings[request.priority][request.session_id]
+        self._drop(request)
+
+    def _drop(self, request: _Request) -> None:
+        """Discard a queued request that was cancelled or ran out of time."""
+        if request.expiry is not None:
+            request.expiry.cancel()
+        self._queued -= 1
+        self._forget(request)
+        if request.cancelled:
+            self._counters["cancelled"] += 1
+        else:
+            self._counters["expired"] += 1
+            self._resolve(request, error=TimeoutError("Model request expired while queued"))
+
+    def _abandon(self, request: _Request, waiter: asyncio.Future) -> None:
+        if waiter in request.waiters:
+            request.waiters.remove(waiter)
+        if request.waiters:
+            return
+        if request.task is not None:
+            request.task.cancel()
+        else:
+            request.cancelled = True
+            self._forget(request)
+
+    def _forget(self, request: _Request) -> None:
+        if request.key is not None and self._by_key.get(request.key) is request:
+            del self._by_key[request.key]
+
+    @staticmethod
+    def _resolve(request: _Request, result: Any = None, error: Optional[BaseException] = None) -> None:
+        for waiter in request.waiters:
+            if waiter.done():
+                continue
+            if error is not None:
+                waiter.set_exception(error)
+            else:
+                waiter.set_result(result)
+
+
+class ScheduledChatModel(BaseChatModel):
+    """LangChain chat model whose async calls go through a `ModelScheduler`.
+
+    Drop-in for the wrapped model: `ainvoke`, `bind_tools` and agents built
+    on top of it behave the same, they just wait for their turn.
+    """
+
+    llm: BaseChatModel
+    scheduler: Any
+    session_id: str = "local"
+    priority: Optional[int] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return f"scheduled-{self.llm._llm_type}"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        # Synchronous calls are not used by the tutorial and bypass the scheduler
+        result = self.llm.generate([messages], stop=stop, **kwargs)
+        return ChatResult(generations=result.generations[0], llm_output=result.llm_output)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        batch_key = json.dumps({"stop": stop, **kwargs}, sort_keys=True, default=str)
+        key = (batch_key, tuple((m.type, repr(m.content), repr(m.additional_kwargs)) for m in messages))
+        result = await self.scheduler.submit(
+            self.session_id,
+            lambda: self.llm.agenerate([messages], stop=stop, **kwargs),
+            key=key,
+            batch_key=batch_key,
+            priority=self._priority(messages),
+        )
+        return ChatResult(generations=result.generations[0], llm_output=result.llm_output)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        # A stream holds its model slot until it is read to the end or closed
+        # (closing early is how tool-call detection cancels the chatter);
+        # the deadline only limits the wait for the slot, not the stream
+        loop = asyncio.get_running_loop()
+        started, finished = loop.create_future(), loop.create_future()
+
+        async def hold_slot():
+            started.set_result(None)
+            await finished
+
+        slot = loop.create_task(self.scheduler.submit(
+            self.session_id, hold_slot, priority=self._priority(messages), queue_only=True,
+        ))
+        slot.add_done_callback(lambda task: task.cancelled() or task.exception())
+        try:
+            await asyncio.wait({started, slot}, return_when=asyncio.FIRST_COMPLETED)
+            if not started.done():
+                slot.result()  # expired or failed while queued
+            async for chunk in self.llm.astream(messages, stop=stop, **kwargs):
+                if not isinstance(chunk, BaseMessageChunk):
+                    # Models without native streaming hand back the whole message
+                    chunk = AIMessageChunk(content=chunk.content, additional_kwargs=chunk.additional_kwargs)
+                yield ChatGenerationChunk(message=chunk)
+        finally:
+            if started.done():
+                if not finished.done():
+                    finished.set_result(None)
+            else:
+                slot.cancel()
+
+    def _priority(self, messages) -> int:
+        if self.priority is not None:
+            return self.priority
+        short = messages and len(str(messages[-1].content)) <= self.scheduler.short_prompt_chars
+        return HIGH if short else NORMAL
+
+    def bind_tools(self, tools, **kwargs):
+        # Let the wrapped model format the tools, then bind them to ourselves
+        return self.bind(**self.llm.bind_tools(tools, **kwargs).kwargs)
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * fraction))]
@@ -0,0 +1,278 @@
+"""
+Hardware-aware choice of the local model.
+
+The tutorial used to ask Foundry Local for "Phi-4-generic-gpu" on every
+machine. Most learners have CPU-only laptops, where that variant is missing
+or far too slow to tutor with. On first start, `select_model()` calibrates
+instead:
+
+1. It lists the variants of the candidate models that this machine can run
+   (CPU, GPU and NPU builds of each alias in `CANDIDATE_ALIASES`) and are
+   already downloaded. Calibration never downloads gigabytes just to measure.
+2. It loads them one at a time, in `CANDIDATE_ALIASES` order, streams a
+   short fixed prompt, and measures time to first token and tokens per
+   second. Each model is unloaded right after its measurement, so only one
+   is ever resident, and calibration stops at the first one that meets the
+   latency target.
+3. It picks that model. If none meets the target, it picks the fastest one.
+
+The decision is cached per machine in `~/.django-girls-offline/model.json`
+(or DJANGO_GIRLS_MODEL_CACHE), so later starts skip straight to loading the
+chosen model. Environment variables override every step:
+
+- DJANGO_GIRLS_MODEL: model alias or id to use, no calibration.
+- DJANGO_GIRLS_ENDPOINT / DJANGO_GIRLS_API_KEY: an OpenAI-compatible server
+  that is already running (DJANGO_GIRLS_MODEL names the model on it).
+- DJANGO_GIRLS_ENDPOINTS: several such servers, comma-separated; model calls
+  are balanced across them (see endpoint_pool.py).
+- DJANGO_GIRLS_TARGET_TTFT / DJANGO_GIRLS_MIN_TPS: the latency target.
+
+When a keep-alive companion (`python model_keepalive.py start`) is running,
+the model it holds is used directly and none of this happens.
+
+`python model_selection.py` prints the current choice; `--recalibrate` runs
+the benchmark again (e.g. after installing a GPU driver).
+"""
+import hashlib
+import json
+import logging
+import os
+import platform
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Best tutor first; smaller models come later as fallbacks for slow machines
+CANDIDATE_ALIASES = ("phi-4", "phi-4-mini", "phi-3.5-mini", "qwen2.5-1.5b", "qwen2.5-0.5b")
+
+# Used when nothing suitable is downloaded yet: Foundry Local picks the variant
+DEFAULT_ALIAS = "phi-4-mini"
+
+# Good enough to tutor with: an answer starts within 2 s and streams at reading speed
+TARGET_TTFT = 2.0
+MIN_TOKENS_PER_S = 8.0
+
+CALIBRATION_PROMPT = [
+    {"role": "system", "content": "You are a Django Girls Tutorial Assistant."},
+    {"role": "user", "content": "In one sentence, what is a Django model?"},
+]
+CALIBRATION_TOKENS = 32
+
+DEFAULT_CACHE = Path.home() / ".django-girls-offline" / "model.json"
+
+
+@dataclass
+class ModelChoice:
+    """The model to use and how to reach it."""
+    alias: str
+    model_id: str
+    endpoint: str
+    api_key: str
+    ttft: Optional[float] = None
+    tokens_per_s: Optional[float] = None
+    # "calibrated", "cached", "env" (DJANGO_GIRLS_MODEL), "endpoint" (an external server), "default" or "keepalive"
+    source: str = "calibrated"
+
+
+@dataclass
+class Calibration:
+    alias: str
+    model_id: str
+    ttft: float
+    tokens_per_s: float
+
+    def meets(self, target_ttft: float, min_tokens_per_s: float) -> bool:
+        return self.ttft <= target_ttft and self.tokens_per_s >= min_tokens_per_s
+
+
+def cache_path() -> Path:
+    return Path(os.environ.get("DJANGO_GIRLS_MODEL_CACHE", DEFAULT_CACHE)).expanduser()
+
+
+def select_model(alias: Optional[str] = None, recalibrate: bool = False, keepalive: bool = True) -> ModelChoice:
+    """Return the model this machine should use, calibrating on first use.
+
+    Args:
+        alias (str): Use this model alias or id and skip calibration.
+        recalibrate (bool): Ignore the cached decision and measure again.
+        keepalive (bool): Use the model held by a running keep-alive companion
+            (see `model_keepalive`) instead of loading it.
+
+    Returns:
+        ModelChoice: alias, model id and the endpoint serving it.
+    """
+    alias = alias or os.environ.get("DJANGO_GIRLS_MODEL")
+    endpoint = os.environ.get("DJANGO_GIRLS_ENDPOINT")
+    if endpoint:
+        if not alias:
+            raise ValueError("DJANGO_GIRLS_ENDPOINT needs DJANGO_GIRLS_MODEL to name the model")
+        return ModelChoice(alias, alias, endpoint, os.environ.get("DJANGO_GIRLS_API_KEY", "not-needed"), source="endpoint")
+
+    if keepalive and not alias and not recalibrate:
+        from model_keepalive import attach
+
+        choice = attach()
+        if choice is not None:
+            return choice
+
+    from foundry_local import FoundryLocalManager
+
+    manager = FoundryLocalManager()
+    if alias:
+        return _load(manager, alias, source="env")
+
+    candidates = _downloaded_candidates(manager)
+    key = _machine_key(candidates)
+    if not recalibrate:
+        cached = _read_cache().get(key)
+        if cached:
+            logger.info("Using cached model choice %s", cached["model_id"])
+            return _load(manager, cached["model_id"], source="cached", ttft=cached["ttft"],
+                         tokens_per_s=cached["tokens_per_s"])
+
+    if not candidates:
+        # Nothing downloaded yet: let Foundry Local pick (and fetch) the variant for this hardware
+        logger.info("No candidate model downloaded, using %s", DEFAULT_ALIAS)
+        return _load(manager, DEFAULT_ALIAS, source="default")
+
+    target_ttft = float(os.environ.get("DJANGO_GIRLS_TARGET_TTFT", TARGET_TTFT))
+    min_tokens_per_s = float(os.environ.get("DJANGO_GIRLS_MIN_TPS", MIN_TOKENS_PER_S))
+    results = calibrate(manager, candidates, target_ttft, min_tokens_per_s)
+    best = choose(results, target_ttft, min_tokens_per_s)
+    if best is None:
+        return _load(manager, DEFAULT_ALIAS, source="default")
+
+    cache = _read_cache()
+    cache[key] = asdict(best)
+    _write_cache(cache)
+    return _load(manager, best.model_id, source="calibrated", ttft=best.ttft, tokens_per_s=best.tokens_per_s)
+
+
+def select_models(alias: Optional[str] = None) -> List[ModelChoice]:
+    """Every endpoint to send model calls to: DJANGO_GIRLS_ENDPOINTS, else `select_model()`."""
+    endpoints = [e.strip() for e in os.environ.get("DJANGO_GIRLS_ENDPOINTS", "").split(",") if e.strip()]
+    if not endpoints:
+        return [select_model(alias)]
+    alias = alias or os.environ.get("DJANGO_GIRLS_MODEL")
+    if not alias:
+        raise ValueError("DJANGO_GIRLS_ENDPOINTS needs DJANGO_GIRLS_MODEL to name the model")
+    api_key = os.environ.get("DJANGO_GIRLS_API_KEY", "not-needed")
+    return [ModelChoice(alias, alias, endpoint, api_key, source="endpoint") for endpoint in endpoints]
+
+
+def choose(results: Sequence[Calibration], target_ttft: float, min_tokens_per_s: float) -> Optional[Calibration]:
+    """Best-ranked model meeting the target, else the fastest one."""
+    for result in results:
+        if result.meets(target_ttft, min_tokens_per_s):
+            return result
+    return max(results, key=lambda r: r.tokens_per_s / max(r.ttft, 1e-3), default=None)
+
+
+def calibrate(
+    manager, model_ids: Sequence[str], target_ttft: float = TARGET_TTFT, min_tokens_per_s: float = MIN_TOKENS_PER_S,
+) -> List[Calibration]:
+    """Time the calibration prompt on each model, in candidate order, one model loaded at a time.
+
+    Stops at the first model that meets the target and leaves it loaded;
+    every other model is unloaded as soon as it has been measured, so
+    laptops never hold several multi-GB models at once.
+    """
+    import openai
+
+    client = openai.OpenAI(base_url=manager.endpoint, api_key=manager.api_key)
+    results = []
+    for model_id in model_ids:
+        try:
+            info = manager.load_model(model_id)
+            result = _measure(client, info.alias, info.id)
+        except Exception as e:
+            logger.warning("Calibrating %s failed: %s", model_id, e)
+            _unload(manager, model_id)
+            continue
+        logger.info("%s: TTFT %.2fs, %.1f tok/s", result.model_id, result.ttft, result.tokens_per_s)
+        results.append(result)
+        if result.meets(target_ttft, min_tokens_per_s):
+            break
+        _unload(manager, result.model_id)
+    return results
+
+
+def _measure(client, alias: str, model_id: str) -> Calibration:
+    # One warm-up call so the first measured token isn't paying for model load
+    client.chat.completions.create(model=model_id, messages=CALIBRATION_PROMPT, max_tokens=1)
+
+    start = time.perf_counter()
+    first = None
+    tokens = 0
+    stream = client.chat.completions.create(
+        model=model_id, messages=CALIBRATION_PROMPT, max_tokens=CALIBRATION_TOKENS, stream=True
+    )
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            tokens += 1
+            if first is None:
+                first = time.perf_counter()
+    end = time.perf_counter()
+    first = first or end
+    rate = (tokens - 1) / (end - first) if tokens > 1 and end > first else 0.0
+    return Calibration(alias=alias, model_id=model_id, ttft=first - start, tokens_per_s=rate)
+
+
+def _downloaded_candidates(manager) -> List[str]:
+    """Ids of the candidate variants this machine supports and already has."""
+    cached = {model.id for model in manager.list_cached_models()}
+    rank = {alias: i for i, alias in enumerate(CANDIDATE_ALIASES)}
+    variants = [m for m in manager.list_catalog_models() if m.alias in rank and m.id in cached]
+    variants.sort(key=lambda m: rank[m.alias])
+    return [m.id for m in variants]
+
+
+def _load(manager, alias_or_id: str, source: str, ttft=None, tokens_per_s=None) -> ModelChoice:
+    info = manager.get_model_info(alias_or_id)
+    if info is None:
+        raise ValueError(f"Foundry Local has no model called {alias_or_id!r}")
+    if info.id not in {model.id for model in manager.list_cached_models()}:
+        manager.download_model(info.id)
+    manager.load_model(info.id)
+    return ModelChoice(info.alias, info.id, manager.endpoint, manager.api_key, ttft, tokens_per_s, source)
+
+
+def _unload(manager, model_id: str) -> None:
+    try:
+        manager.unload_model(model_id)
+    except Exception as e:
+        logger.debug("Could not unload %s: %s", model_id, e)
+
+
+def _machine_key(candidates: Sequence[str]) -> str:
+    # A different machine or a newly downloaded candidate triggers a new calibration
+    parts = [platform.node(), platform.machine(), platform.processor(), str(os.cpu_count()), *candidates]
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()[:16]
+
+
+def _read_cache() -> dict:
+    try:
+        return json.loads(cache_path().read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_cache(cache: dict) -> None:
+    path = cache_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(cache, indent=2))
+    tmp.replace(path)
+
+
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    choice = select_model(recalibrate="--recalibrate" in sys.argv)
+    print(f"Model: {choice.model_id} ({choice.source}) at {choice.endpoint}")
+    if choice.ttft is not None:
+        print(f"TTFT {choice.ttft:.2f}s, {choice.tokens_per_s:.1f} tok/s")
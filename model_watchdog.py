@@ -0,0 +1,211 @@
+"""
+Watchdog for the local model: deadlines, stall detection, retries, circuit breaker.
+
+If Foundry Local stalls or the model process dies, an unguarded
+`await llm.ainvoke(history)` hangs the chat forever. `ModelWatchdog` wraps
+every model stream:
+
+- the first token must arrive within `first_token_timeout`, then no more
+  than `stall_timeout` may pass between tokens, and the whole request must
+  finish within `request_timeout`;
+- a request that fails before producing anything is retried up to
+  `retries` times with exponential backoff and jitter. Once tokens have been
+  shown, a failure can't be retried, because the reply would be repeated;
+- after `failure_threshold` failed requests in a row the circuit opens.
+  Calls then fail immediately with `ModelUnavailable`, and the session
+  answers from the router and a search of the tutorial content instead. A
+  background probe sends a tiny request every `probe_interval` seconds and
+  closes the circuit as soon as the model answers again.
+
+Callers that stop reading a stream on their own deadline (the generation
+budget timeouts) report it with `report_failure()`, so a model that is
+merely slow still counts towards opening the circuit.
+"""
+import asyncio
+import logging
+import random
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+
+# Default wait for the first token; generation budgets add their own time on top
+FIRST_TOKEN_TIMEOUT = 60.0
+
+
+class ModelUnavailable(Exception):
+    """The model failed, stalled or is known to be down; answer without it."""
+
+
+class ModelWatchdog:
+    """Guards model streams and tracks whether the model is healthy.
+
+    Args:
+        probe_llm: Chat model used for the background health probe.
+        first_token_timeout (float): Seconds to wait for the first token.
+        stall_timeout (float): Longest gap, in seconds, between two tokens.
+        request_timeout (float): Longest time, in seconds, for a whole request.
+        retries (int): Extra attempts for requests that fail before any token.
+        backoff (float): Base delay, in seconds, before the first retry.
+        failure_threshold (int): Consecutive failures that open the circuit.
+        probe_interval (float): Seconds between probes while the circuit is open.
+    """
+
+    def __init__(
+        self,
+        probe_llm=None,
+        first_token_timeout: float = FIRST_TOKEN_TIMEOUT,
+        stall_timeout: float = 15.0,
+        request_timeout: float = 180.0,
+        retries: int = 2,
+        backoff: float = 0.5,
+        failure_threshold: int = 3,
+        probe_interval: float = 10.0,
+    ):
+        self.probe_llm = probe_llm
+        self.first_token_timeout = first_token_timeout
+        self.stall_timeout = stall_timeout
+        self.request_timeout = request_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+
+        self.state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe: Optional[asyncio.Task] = None
+        self._counters = {
+            "requests": 0,
+            "failures": 0,
+            "stalls": 0,
+            "retries": 0,
+            "rejected": 0,
+            "circuit_opened": 0,
+            "probes": 0,
+        }
+
+    @property
+    def healthy(self) -> bool:
+        return self.state == CLOSED
+
+    def guard(self, source) -> "GuardedModel":
+        """Wrap anything with an `astream(messages)` method."""
+        return GuardedModel(source, self)
+
+    async def astream(self, source, messages):
+        """Stream `source.astream(messages)` under the deadlines, retrying early failures."""
+        if self.state == OPEN:
+            self._counters["rejected"] += 1
+            raise ModelUnavailable("The model is not responding")
+        self._counters["requests"] += 1
+        deadline = time.monotonic() + self.request_timeout
+
+        for attempt in range(self.retries + 1):
+            produced = False
+            try:
+                stream = source.astream(messages)
+                try:
+                    while True:
+                        wait = self.stall_timeout if produced else self.first_token_timeout
+                        wait = min(wait, deadline - time.monotonic())
+                        if wait <= 0:
+                            raise asyncio.TimeoutError
+                        try:
+                            chunk = await asyncio.wait_for(stream.__anext__(), wait)
+                        except StopAsyncIteration:
+                            break
+                        produced = True
+                        yield chunk
+                finally:
+                    await stream.aclose()
+            except GeneratorExit:
+                # The caller had what it needed (e.g. a complete tool call)
+                self._succeeded()
+                raise
+            except asyncio.TimeoutError as e:
+                self._counters["stalls"] += 1
+                error = e
+            except Exception as e:
+                error = e
+            else:
+                self._succeeded()
+                return
+
+            self._failed(error)
+            if produced or attempt == self.retries or self.state == OPEN:
+                raise ModelUnavailable(f"The model stopped responding: {error!r}") from error
+            self._counters["retries"] += 1
+            # Exponential backoff with jitter so a classroom doesn't retry in lockstep
+            await asyncio.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+    def report_failure(self, reason: str) -> None:
+        """Count a request the caller gave up on (e.g. its own deadline passed) as failed."""
+        self._counters["stalls"] += 1
+        self._failed(TimeoutError(reason))
+
+    def metrics(self) -> Dict[str, float]:
+        return {
+            "healthy": int(self.healthy),
+            "consecutive_failures": self._consecutive_failures,
+            **self._counters,
+            "open_for_s": time.monotonic() - self._opened_at if self._opened_at else 0.0,
+        }
+
+    # ----------------------------------------------------------------------------------
+    # Circuit breaker
+    # ----------------------------------------------------------------------------------
+
+    def _succeeded(self) -> None:
+        self._consecutive_failures = 0
+
+    def _failed(self, error: BaseException) -> None:
+        self._counters["failures"] += 1
+        self._consecutive_failures += 1
+        logger.warning("Model request failed (%d in a row): %r", self._consecutive_failures, error)
+        if self._consecutive_failures >= self.failure_threshold and self.state == CLOSED:
+            self._open()
+
+    def _open(self) -> None:
+        logger.warning("Model unhealthy, answering from the tutorial content until it recovers")
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._counters["circuit_opened"] += 1
+        if self.probe_llm is not None and (self._probe is None or self._probe.done()):
+            self._probe = asyncio.get_running_loop().create_task(self._probe_loop())
+
+    def _close(self) -> None:
+        logger.info("Model answering again")
+        self.state = CLOSED
+        self._opened_at = None
+        self._consecutive_failures = 0
+
+    async def _probe_loop(self) -> None:
+        from langchain_core.messages import HumanMessage
+
+        while self.state == OPEN:
+            await asyncio.sleep(self.probe_interval * random.uniform(0.8, 1.2))
+            self._counters["probes"] += 1
+            try:
+                await asyncio.wait_for(
+                    self.probe_llm.ainvoke([HumanMessage(content="ping")], max_tokens=1),
+                    self.first_token_timeout,
+                )
+            except Exception as e:
+                logger.debug("Probe failed: %r", e)
+                continue
+            self._close()
+
+
+class GuardedModel:
+    """`astream()` of the wrapped source, supervised by a `ModelWatchdog`."""
+
+    def __init__(self, source, watchdog: ModelWatchdog):
+        self.source = source
+        self.watchdog = watchdog
+
+    def astream(self, messages):
+        return self.watchdog.astream(self.source, messages)
@@ -0,0 +1,254 @@
+"""
+Durable session journal: resume the tutorial where you left off.
+
+Tutorial progress (`current_step`, `completed_steps`) and the chat history
+used to live only in memory, so a crash or a closed laptop lid meant starting
+over and re-asking the model for every step. The journal appends each change
+to a small SQLite database in WAL mode:
+
+- `record_*()` only puts the event on a queue; a background thread writes
+  batches of events in one transaction, so the chat loop never waits on disk
+  and fsyncs happen once per batch rather than once per message.
+- `load()` folds the latest snapshot plus the events after it back into the
+  tutorial state and the (already trimmed) history.
+- Compaction rewrites a session as a single snapshot row once it has
+  accumulated `compact_after` events, so the file stays small over a
+  multi-day course.
+
+The database lives in `~/.django-girls-offline/journal.sqlite3` unless
+DJANGO_GIRLS_JOURNAL points elsewhere.
+"""
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional
+
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+
+DEFAULT_JOURNAL = Path.home() / ".django-girls-offline" / "journal.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_by_session ON events (session_id, id);
+"""
+
+_CLOSE = object()
+
+
+@dataclass
+class SessionSnapshot:
+    """Everything needed to resume a session."""
+    current_step: str = "welcome"
+    completed_steps: set = field(default_factory=set)
+    messages: List[BaseMessage] = field(default_factory=list)
+
+
+def journal_path() -> Path:
+    return Path(os.environ.get("DJANGO_GIRLS_JOURNAL", DEFAULT_JOURNAL)).expanduser()
+
+
+class SessionJournal:
+    """Append-only, batched SQLite journal of tutorial sessions.
+
+    Args:
+        path: Database file (default: `journal_path()`).
+        flush_interval (float): Longest time, in seconds, an event waits in memory.
+        max_messages (int): Messages kept per session when compacting.
+        compact_after (int): Events per session that trigger compaction.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        flush_interval: float = 0.2,
+        max_messages: int = 8,
+        compact_after: int = 200,
+    ):
+        self.path = Path(path) if path else journal_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
+        self.max_messages = max_messages
+        self.compact_after = compact_after
+
+        self._conn = self._connect()
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.RLock()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="session-journal", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # In WAL mode FULL fsyncs the log on every commit; we commit once per batch
+        conn.execute("PRAGMA synchronous=FULL")
+        return conn
+
+    # ----------------------------------------------------------------------------------
+    # Hot path: enqueue only
+    # ----------------------------------------------------------------------------------
+
+    def record_message(self, session_id: str, message: BaseMessage) -> None:
+        self._queue.put((session_id, "message", json.dumps(message_to_dict(message)), time.time()))
+
+    def record_state(self, session_id: str, current_step: str, completed_steps) -> None:
+        payload = json.dumps({"current_step": current_step, "completed_steps": sorted(completed_steps)})
+        self._queue.put((session_id, "state", payload, time.time()))
+
+    def reset(self, session_id: str) -> None:
+        """Forget a session (the learner wants to start over)."""
+        self._queue.put((session_id, "reset", "{}", time.time()))
+
+    # ----------------------------------------------------------------------------------
+    # Restore / maintenance
+    # ----------------------------------------------------------------------------------
+
+    def load(self, session_id: str) -> Optional[SessionSnapshot]:
+        """Rebuild a session from its journal, or None if there is nothing to resume."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT kind, payload FROM events WHERE session_id = ? AND id >= COALESCE("
+                " (SELECT MAX(id) FROM events WHERE session_id = ? AND kind IN ('snapshot', 'reset')), 0)"
+                " ORDER BY id",
+                (session_id, session_id),
+            ).fetchall()
+        if all(kind == "reset" for kind, _ in rows):
+            return None
+
+        snapshot = SessionSnapshot()
+        messages = []
+        for kind, payload in rows:
+            data = json.loads(payload)
+            if kind == "snapshot":
+                snapshot.current_step = data["current_step"]
+                snapshot.completed_steps = set(data["completed_steps"])
+                messages = data["messages"]
+            elif kind == "state":
+                snapshot.current_step = data["current_step"]
+                snapshot.completed_steps = set(data["completed_steps"])
+            elif kind == "reset":
+                snapshot = SessionSnapshot()
+                messages = []
+            elif kind == "message":
+                messages.append(data)
+                # Only the trimmed tail is ever needed
+                if len(messages) > 2 * self.max_messages:
+                    messages = messages[-self.max_messages:]
+        snapshot.messages = messages_from_dict(messages[-self.max_messages:])
+        return snapshot
+
+    def compact(self, session_id: Optional[str] = None) -> None:
+        """Replace a session's events (or every session's) with one snapshot row."""
+        with self._lock:
+            if session_id is None:
+                sessions = [row[0] for row in self._conn.execute("SELECT DISTINCT session_id FROM events")]
+            else:
+                sessions = [session_id]
+        for sid in sessions:
+            self._compact_session(sid)
+        with self._lock:
+            # Rows deleted by automatic compaction are reused in place; a full
+            # compaction also hands the free pages back to the file system
+            self._conn.execute("VACUUM")
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self) -> None:
+        """Flush pending events and stop the writer thread."""
+        self._queue.put(_CLOSE)
+        self._writer.join()
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.close()
+
+    def _compact_session(self, session_id: str) -> None:
+        with self._lock:
+            snapshot = self.load(session_id)
+            last_id = self._conn.execute(
+                "SELECT MAX(id) FROM events WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+            if last_id is None:
+                return
+            self._conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM events WHERE session_id = ? AND id <= ?", (session_id, last_id))
+            if snapshot is not None:
+                payload = json.dumps({
+                    "current_step": snapshot.current_step,
+                    "completed_steps": sorted(snapshot.completed_steps),
+                    "messages": [message_to_dict(m) for m in snapshot.messages],
+                })
+                self._conn.execute(
+                    "INSERT INTO events (session_id, kind, payload, created_at) VALUES (?, 'snapshot', ?, ?)",
+                    (session_id, payload, time.time()),
+                )
+            self._conn.execute("COMMIT")
+
+    # ----------------------------------------------------------------------------------
+    # Writer thread
+    # ----------------------------------------------------------------------------------
+
+    def _write_loop(self) -> None:
+        closing = False
+        while not closing:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            # Gather whatever else arrives within the flush interval
+            while True:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            if _CLOSE in batch:
+                closing = True
+                batch = [event for event in batch if event is not _CLOSE]
+            if batch:
+                self._write_batch(batch)
+
+    def _write_batch(self, batch) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT INTO events (session_id, kind, payload, created_at) VALUES (?, ?, ?, ?)", batch
+            )
+            self._conn.execute("COMMIT")
+            counts = self._conn.execute(
+                "SELECT session_id, COUNT(*) FROM events WHERE session_id IN (%s) GROUP BY session_id"
+                % ",".join("?" * len({event[0] for event in batch})),
+                tuple({event[0] for event in batch}),
+            ).fetchall()
+        for session_id, count in counts:
+            if count >= self.compact_after:
+                self._compact_session(session_id)
+
+
+if __name__ == "__main__":
+    import sys
+
+    journal = SessionJournal()
+    if sys.argv[1:] == ["compact"]:
+        before = journal.path.stat().st_size
+        journal.compact()
+        print(f"Compacted {journal.path}: {before} -> {journal.path.stat().st_size} bytes")
+    else:
+        start = time.perf_counter()
+        snapshot = journal.load(sys.argv[1] if len(sys.argv) > 1 else "local")
+        elapsed = (time.perf_counter() - start) * 1000
+        if snapshot is None:
+            print("Nothing to resume.")
+        else:
+            print(f"Step: {snapshot.current_step}, completed: {sorted(snapshot.completed_steps)}, "
+                  f"{len(snapshot.messages)} messages (loaded in {elapsed:.1f} ms)")
+    journal.close()
@@ -0,0 +1,280 @@
+"""
+Tolerant parser for the tool calls small models write as text.
+
+The MCP agent asks the model for a JSON tool object, and Phi-class models
+mostly comply, but not always in valid JSON. Common shapes:
+
+    ```json {"action": "welcome_tutorial", "parameters": {}} ```
+    {'function': {'name': 'install_django', 'arguments': '{}'}}
+    {"name": "explain_concept", "arguments": {"concept": "loops",}}  // loops!
+    {"action": "setup_environment"} {"action": "verify_environment"}
+    Sure! Let me call explain_programming_concept(concept="variables").
+
+Rather than failing the turn or asking the model again (a second inference
+costs seconds), `parse_tool_calls()` repairs these locally. It finds every
+balanced object in the text and reads it as JSON, then as a Python literal
+after fixing comments, unquoted keys and JSON keywords. It also accepts
+Python call syntax. Tool and argument names are checked against the tool
+registry, and near misses are corrected with difflib.
+"""
+import ast
+import difflib
+import inspect
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional
+
+# Keys models use for the tool name and for its arguments, in order of preference
+NAME_KEYS = ("action", "name", "tool", "tool_name", "function", "function_call", "tool_call")
+ARGUMENT_KEYS = ("parameters", "arguments", "args", "action_input", "input", "kwargs")
+
+_UNQUOTED_KEY = re.compile(r"([{,]\s*)([A-Za-z_]\w*)(\s*:)")
+_JSON_KEYWORDS = re.compile(r"\b(true|false|null)\b")
+_CALL = re.compile(r"\b([A-Za-z_]\w*)\s*\(")
+_KEYWORD_VALUES = {"true": "True", "false": "False", "null": "None"}
+
+
+@dataclass
+class ToolCall:
+    name: str
+    arguments: Dict[str, Any] = field(default_factory=dict)
+    repaired: bool = False  # the name or an argument had to be corrected
+
+
+def parse_tool_calls(text: str, registry: Mapping[str, Callable]) -> List[ToolCall]:
+    """Return every tool call in `text` that names (or nearly names) a registered tool."""
+    calls = []
+    for data in _objects(text):
+        call = _from_object(data, registry)
+        if call is not None:
+            calls.append(call)
+    if not calls:
+        calls = list(_python_calls(text, registry))
+    return calls
+
+
+def parse_tool_object(span: str, registry: Optional[Mapping[str, Callable]] = None) -> List[ToolCall]:
+    """The tool calls in one balanced span (an object or a list of them); [] if it names no tool.
+
+    Without a registry any object with a tool-name key counts, its name unchecked.
+    """
+    data = _load(span)
+    objects = [item for item in (data if isinstance(data, list) else [data]) if isinstance(item, dict)]
+    if registry is None:
+        return [ToolCall(name=name) for name, _ in map(_name_and_arguments, objects) if isinstance(name, str) and name]
+    calls = (_from_object(item, registry) for item in objects)
+    return [call for call in calls if call is not None]
+
+
+# --------------------------------------------------------------------------------------
+# Finding and reading objects
+# --------------------------------------------------------------------------------------
+
+def _objects(text: str) -> Iterator[Any]:
+    """Yield each top-level object (or list of objects) found in the text."""
+    for span in _balanced_spans(text, "{["):
+        data = _load(span)
+        if isinstance(data, list):
+            yield from (item for item in data if isinstance(item, dict))
+        elif isinstance(data, dict):
+            yield data
+
+
+def _balanced_spans(text: str, openers: str) -> Iterator[str]:
+    closers = {"{": "}", "[": "]", "(": ")"}
+    i = 0
+    while i < len(text):
+        if text[i] not in openers:
+            i += 1
+            continue
+        stack = []
+        quote = None
+        escaped = False
+        for j in range(i, len(text)):
+            char = text[j]
+            if quote is not None:
+                if escaped:
+                    escaped = False
+                elif char == "\\":
+                    escaped = True
+                elif char == quote:
+                    quote = None
+            elif char in "\"'":
+                quote = char
+            elif char in closers:
+                stack.append(closers[char])
+            elif stack and char == stack[-1]:
+                stack.pop()
+                if not stack:
+                    yield text[i:j + 1]
+                    i = j + 1
+                    break
+        else:
+            # Unterminated (the stream was cut off): close what is open and stop
+            if stack and quote is None:
+                yield text[i:] + "".join(reversed(stack))
+            return
+
+
+def _load(span: str) -> Any:
+    try:
+        return json.loads(span)
+    except ValueError:
+        pass
+    cleaned = _strip_comments(span)
+    cleaned = _UNQUOTED_KEY.sub(r'\1"\2"\3', cleaned)
+    cleaned = _outside_strings(cleaned, lambda part: _JSON_KEYWORDS.sub(lambda m: _KEYWORD_VALUES[m[1]], part))
+    try:
+        # Handles single quotes, trailing commas and Python literals
+        return ast.literal_eval(cleaned)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return None
+
+
+def _strip_comments(text: str) -> str:
+    return _outside_strings(text, lambda part: re.sub(r"//[^\n]*|/\*.*?\*/|#[^\n]*", "", part, flags=re.DOTALL))
+
+
+def _outside_strings(text: str, transform: Callable[[str], str]) -> str:
+    """Apply `transform` to the parts of `text` that are not inside quotes."""
+    parts = re.split(r"""("(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')""", text)
+    return "".join(part if i % 2 else transform(part) for i, part in enumerate(parts))
+
+
+def _python_calls(text: str, registry: Mapping[str, Callable]) -> Iterator[ToolCall]:
+    """`tool_name(arg="value")` written as code rather than JSON."""
+    for match in _CALL.finditer(text):
+        name = _resolve(match[1], registry)
+        if name is None:
+            continue
+        span = next(_balanced_spans(text[match.end() - 1:], "("), None)
+        if span is None:
+            continue
+        try:
+            node = ast.parse(f"f{span}", mode="eval").body
+            args = [ast.literal_eval(arg) for arg in node.args]
+            kwargs = {kw.arg: ast.literal_eval(kw.value) for kw in node.keywords if kw.arg}
+        except (ValueError, SyntaxError):
+            continue
+        params = list(inspect.signature(registry[name]).parameters)
+        kwargs.update(zip(params, args))
+        yield _call(match[1], name, kwargs, registry)
+
+
+# --------------------------------------------------------------------------------------
+# Validating against the registry
+# --------------------------------------------------------------------------------------
+
+def _name_and_arguments(data: dict):
+    raw_name, arguments = None, None
+    for key in NAME_KEYS:
+        value = data.get(key)
+        if isinstance(value, dict):
+            # OpenAI style: {"function": {"name": ..., "arguments": ...}}
+            raw_name = value.get("name")
+            arguments = _first(value, ARGUMENT_KEYS)
+        elif isinstance(value, str):
+            raw_name = value
+        if raw_name:
+            break
+    return raw_name, arguments
+
+
+def _from_object(data: dict, registry: Mapping[str, Callable]) -> Optional[ToolCall]:
+    raw_name, arguments = _name_and_arguments(data)
+    if not raw_name or not isinstance(raw_name, str):
+        return None
+    name = _resolve(raw_name, registry)
+    if name is None:
+        return None
+
+    if arguments is None:
+        arguments = _first(data, ARGUMENT_KEYS)
+    if isinstance(arguments, str):
+        arguments = _load(arguments) if arguments.strip() else {}
+    if not isinstance(arguments, dict):
+        arguments = {}
+    return _call(raw_name, name, arguments, registry)
+
+
+def _call(raw_name: str, name: str, arguments: Dict[str, Any], registry: Mapping[str, Callable]) -> ToolCall:
+    params = inspect.signature(registry[name]).parameters
+    fixed = {}
+    repaired = raw_name != name
+    for key, value in arguments.items():
+        param = key if key in params else _closest(key, params)
+        if param is None:
+            # The tool would reject it; dropping it is the cheaper repair
+            repaired = True
+            continue
+        repaired = repaired or param != key
+        fixed[param] = value
+    return ToolCall(name=name, arguments=fixed, repaired=repaired)
+
+
+def _resolve(raw_name: str, registry: Mapping[str, Callable]) -> Optional[str]:
+    if raw_name in registry:
+        return raw_name
+    normalized = re.sub(r"[\s\-.]+", "_", raw_name.strip().lower()).removeprefix("functions_")
+    if normalized in registry:
+        return normalized
+    return _closest(normalized, registry)
+
+
+def _closest(name: str, candidates) -> Optional[str]:
+    matches = difflib.get_close_matches(name, list(candidates), n=1, cutoff=0.75)
+    if not matches and "_" in name:
+        # "explain_concept" for "explain_programming_concept"
+        matches = [c for c in candidates if set(name.split("_")) <= set(c.split("_"))]
+    return matches[0] if len(matches) == 1 else None
+
+
+def _first(data: dict, keys) -> Any:
+    for key in keys:
+        if key in data:
+            return data[key]
+    return None
+
+
+if __name__ == "__main__":
+    import time
+
+    from django_girls_mcp_server import explain_programming_concept, install_django, welcome_tutorial
+
+    registry = {
+        "welcome_tutorial": welcome_tutorial,
+        "install_django": install_django,
+        "explain_programming_concept": explain_programming_concept,
+    }
+    samples = [
+        ('{"action": "welcome_tutorial", "parameters": {}}', ["welcome_tutorial"]),
+        ('```json\n{"action": "welcome_tutorial"}\n```', ["welcome_tutorial"]),
+        ("{'function': {'name': 'install_django', 'arguments': '{}'}}", ["install_django"]),
+        ('{"name": "explain_concept", "arguments": {"concept": "loops",}}  // loops!', ["explain_programming_concept"]),
+        ('{action: "welcome_tutorial", parameters: {}} {"action": "install_django"}', ["welcome_tutorial", "install_django"]),
+        ('Sure! Let me call explain_programming_concept(concept="variables").', ["explain_programming_concept"]),
+        ('[{"tool": "Welcome-Tutorial"}, {"tool_call": {"name": "instal_django"}}]', ["welcome_tutorial", "install_django"]),
+        ('{"function_call": {"name": "explain_programming_concept", "parameters": {"concpt": "html"}}}',
+         ["explain_programming_concept"]),
+        ('{"action": "welcome_tutorial", "parameters": {"verbose": true}', ["welcome_tutorial"]),
+        ("explain_programming_concept('functions')", ["explain_programming_concept"]),
+    ]
+    def strict(text):
+        # What the agent did before: strip the fence and hope for valid JSON
+        try:
+            json.loads(re.sub(r"^```json\n|\n```$", "", text))
+            return True
+        except ValueError:
+            return False
+
+    print(f"json.loads: {sum(strict(text) for text, _ in samples)}/{len(samples)} answers readable")
+    ok = 0
+    start = time.perf_counter()
+    rounds = 200
+    for _ in range(rounds):
+        for text, expected in samples:
+            ok += [call.name for call in parse_tool_calls(text, registry)] == expected
+    elapsed = time.perf_counter() - start
+    print(f"parsed {ok // rounds}/{len(samples)} malformed answers, "
+          f"{elapsed / (rounds * len(samples)) * 1e6:.0f} µs per answer")
@@ -0,0 +1,357 @@
+"""
+Incremental tool-call detection on the model's token stream.
+
+The tutorial agents only act on one thing in a model answer: the
+`tutorial.<method>(...)` call (code-generation agent) or the JSON tool
+object (MCP agent). Small models like to keep talking after it ("This will
+show you...", a second example, a closing fence), and waiting for that
+chatter before running the call adds seconds to every turn.
+
+`ToolCallDetector` is fed the streamed text and reports the call as soon as
+its closing `)` or `}` arrives. A JSON span only counts when it is an
+object (or a list of them) naming a registered tool, so brackets in prose
+("a list looks like [1, 2, 3]") don't end the answer. `stream_tool_call()` then stops reading the
+stream, which closes the HTTP response so the server stops generating, and
+records in `ToolCallStats` how long the learner would otherwise have waited.
+
+With `on_text`, the text before a call is passed on as it arrives, so a
+free-form answer can be shown while it streams. Text that could still turn
+out to be the start of a call (a partial `tutorial.` prefix, a code fence
+opening) is held back until the next chunk settles it.
+"""
+import asyncio
+import re
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, List, Mapping, Optional, Tuple
+
+from tool_call_parser import parse_tool_object
+
+TUTORIAL_CALL = "tutorial"
+JSON_OBJECT = "json"
+
+_TUTORIAL_START = re.compile(r"tutorial\.\w+\s*\(")
+_JSON_START = re.compile(r"[{\[]")
+_OPEN = {"(": ")", "{": "}", "[": "]"}
+# How far back a call start split across chunks can begin
+_START_WINDOW = len("tutorial.") + 32
+# A fence opening at the end of the text may be wrapping the call that follows
+_FENCE_TAIL = re.compile(r"(?:^|\n)[ \t]*`{1,3}\w*[ \t]*\n?$")
+
+# Chunks a model keeps streaming after the call, assumed until a turn that
+# ran to completion has been observed (Phi-4 typically adds a sentence or two)
+TAIL_CHUNKS_PRIOR = 40
+
+
+class ToolCallDetector:
+    """Spot the first complete tool call in text that arrives in pieces.
+
+    Args:
+        kind: `TUTORIAL_CALL` for `tutorial.show('...')` style calls or
+            `JSON_OBJECT` for a JSON tool object (or a list of them).
+        registry: Tools a JSON call may name (default: any object with a name key).
+    """
+
+    def __init__(self, kind: str = TUTORIAL_CALL, registry: Optional[Mapping[str, Callable]] = None):
+        self.kind = kind
+        self.registry = registry
+        self._start_pattern = _TUTORIAL_START if kind == TUTORIAL_CALL else _JSON_START
+        self._parts: List[str] = []
+        self._text = ""
+        self._scan = 0          # where the next search for a call start begins
+        self._start: Optional[int] = None
+        self._pos = 0           # next character to scan inside the call
+        self._closers: List[str] = []
+        self._quote: Optional[str] = None
+        self._escaped = False
+        self.call: Optional[str] = None
+
+    @property
+    def prose_end(self) -> int:
+        """End of the text that can't be part of a call (whatever arrives next)."""
+        text = self.text
+        if self._start is not None:
+            end = self._start
+        elif self.kind == TUTORIAL_CALL:
+            end = max(0, len(text) - _START_WINDOW)
+        else:
+            end = len(text)
+        # The fence may end the text, or precede a line that is still arriving
+        for stop in (end, text.rfind("\n", 0, end) + 1):
+            fence = _FENCE_TAIL.search(text, max(0, stop - _START_WINDOW), stop)
+            if fence:
+                return fence.start()
+        return end
+
+    @property
+    def text(self) -> str:
+        """Everything received so far."""
+        if self._parts:
+            self._text += "".join(self._parts)
+            self._parts = []
+        return self._text
+
+    def feed(self, chunk: str) -> Optional[str]:
+        """Add streamed text; return the call once it is complete."""
+        if self.call is not None or not chunk:
+            return self.call
+        self._parts.append(chunk)
+        text = self.text
+
+        while True:
+            if self._start is None:
+                match = self._start_pattern.search(text, self._scan)
+                if match is None:
+                    # A call start may be split across chunks: rescan the tail next time
+                    self._scan = max(self._scan, len(text) - _START_WINDOW)
+                    return None
+                self._start = match.start()
+                self._pos = match.start() if self.kind == JSON_OBJECT else match.end() - 1
+
+            end = self._close(text)
+            if end is None:
+                return None
+            span = text[self._start:end]
+            if self.kind == TUTORIAL_CALL or parse_tool_object(span, self.registry):
+                self.call = span
+                return self.call
+            # Brackets in prose: keep reading, a call may still follow
+            self._start = None
+            self._scan = end
+
+    def _close(self, text: str) -> Optional[int]:
+        """End of the span opened at `_start`, once its last bracket has arrived."""
+        for i in range(self._pos, len(text)):
+            char = text[i]
+            if self._quote is not None:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == self._quote:
+                    self._quote = None
+            elif char in "\"'":
+                self._quote = char
+            elif char in _OPEN:
+                self._closers.append(_OPEN[char])
+            elif self._closers and char == self._closers[-1]:
+                self._closers.pop()
+                if not self._closers:
+                    return i + 1
+        self._pos = len(text)
+        return None
+
+
+@dataclass
+class StreamedAnswer:
+    content: str
+    call: Optional[str]
+    ttft: float
+    elapsed: float
+    chunks: int
+    cancelled: bool
+    finish_reason: Optional[str] = None  # "length" when max_tokens cut the reply short
+    timed_out: bool = False
+    shown: int = 0  # characters of `content` already passed to `on_text`
+
+    @property
+    def tokens(self) -> int:
+        """Generated tokens: a chunk per token when streamed, ~4 characters each otherwise."""
+        return max(self.chunks, len(self.content) // 4)
+
+
+class ToolCallStats:
+    """Running figures for `/stats`: how often and how early calls are cut off."""
+
+    def __init__(self, window: int = 200):
+        self.turns = 0
+        self.early_stops = 0
+        self.saved_seconds = 0.0
+        self._time_to_call: Deque[float] = deque(maxlen=window)
+        self._chunk_interval: Optional[float] = None
+        self._tail_chunks: Optional[float] = None
+
+    def record(self, answer: StreamedAnswer, tail_chunks: Optional[int] = None) -> float:
+        """Account for one turn and return the estimated seconds saved."""
+        self.turns += 1
+        if answer.chunks > 1:
+            interval = (answer.elapsed - answer.ttft) / (answer.chunks - 1)
+            self._chunk_interval = _ewma(self._chunk_interval, interval)
+        if tail_chunks is not None:
+            self._tail_chunks = _ewma(self._tail_chunks, tail_chunks)
+        if answer.call is not None:
+            self._time_to_call.append(answer.elapsed)
+        if not answer.cancelled:
+            return 0.0
+
+        self.early_stops += 1
+        tail = self._tail_chunks if self._tail_chunks is not None else TAIL_CHUNKS_PRIOR
+        saved = tail * (self._chunk_interval or 0.0)
+        self.saved_seconds += saved
+        return saved
+
+    def metrics(self) -> Dict[str, float]:
+        times = sorted(self._time_to_call)
+        return {
+            "turns": self.turns,
+            "early_stops": self.early_stops,
+            "time_to_call_p50_ms": times[len(times) // 2] * 1000 if times else 0.0,
+            "saved_per_turn_ms": self.saved_seconds / self.turns * 1000 if self.turns else 0.0,
+            "saved_total_s": self.saved_seconds,
+        }
+
+
+async def stream_tool_call(
+    llm,
+    messages,
+    kind: str = TUTORIAL_CALL,
+    stats: Optional[ToolCallStats] = None,
+    cancel: bool = True,
+    timeout: Optional[float] = None,
+    on_text: Optional[Callable[[str], None]] = None,
+    registry: Optional[Mapping[str, Callable]] = None,
+) -> StreamedAnswer:
+    """Stream an answer from `llm`, stopping as soon as a complete tool call arrives.
+
+    With `cancel=False` the stream is read to the end (the call is still
+    detected), which is how the length of the chatter after calls is measured.
+    After `timeout` seconds the stream is closed and what arrived so far is
+    returned with `timed_out` set. `on_text(text)` receives the answer's
+    text up to the call (or all of it when there is none, except a tail
+    that might still start one); `shown` says how much it got. `registry`
+    holds the tools a `JSON_OBJECT` call may name.
+    """
+    detector = ToolCallDetector(kind, registry)
+    start = time.perf_counter()
+    ttft = None
+    chunks = 0
+    tail = None
+    cancelled = False
+    timed_out = False
+    finish_reason = None
+    shown = 0
+    deadline = start + timeout if timeout else None
+
+    stream = llm.astream(messages)
+    try:
+        while True:
+            try:
+                if deadline is None:
+                    chunk = await stream.__anext__()
+                else:
+                    chunk = await asyncio.wait_for(stream.__anext__(), max(deadline - time.perf_counter(), 0))
+            except StopAsyncIteration:
+                break
+            except asyncio.TimeoutError:
+                timed_out = True
+                break
+            chunks += 1
+            finish_reason = getattr(chunk, "response_metadata", {}).get("finish_reason") or finish_reason
+            if ttft is None:
+                ttft = time.perf_counter() - start
+            if detector.call is not None:
+                tail += 1
+                detector.feed(chunk.content)
+                continue
+            found = detector.feed(chunk.content)
+            if on_text is not None and detector.prose_end > shown:
+                on_text(detector.text[shown:detector.prose_end])
+                shown = detector.prose_end
+            if found is not None:
+                if cancel:
+                    # Closing the stream drops the connection; the server stops decoding
+                    cancelled = True
+                    break
+                tail = 0
+    finally:
+        await stream.aclose()
+
+    elapsed = time.perf_counter() - start
+    answer = StreamedAnswer(
+        content=detector.text,
+        call=detector.call,
+        ttft=ttft if ttft is not None else elapsed,
+        elapsed=elapsed,
+        chunks=chunks,
+        cancelled=cancelled,
+        finish_reason=finish_reason,
+        timed_out=timed_out,
+        shown=shown,
+    )
+    if stats is not None:
+        stats.record(answer, tail_chunks=tail)
+    return answer
+
+
+def _ewma(previous: Optional[float], value: float, alpha: float = 0.2) -> float:
+    return value if previous is None else previous + alpha * (value - previous)
+
+
+# (kind, answer, call the detector must report); JSON cases use DETECTOR_TOOLS
+DETECTOR_TOOLS = {"welcome_tutorial": print, "install_django": print}
+DETECTOR_CASES = [
+    (TUTORIAL_CALL, "```python\ntutorial.show('setup')\n```\nThis shows the setup step.", "tutorial.show('setup')"),
+    (JSON_OBJECT, '```json\n{"action": "install_django", "parameters": {}}\n```\nDone!',
+     '{"action": "install_django", "parameters": {}}'),
+    (JSON_OBJECT, '[{"tool": "welcome_tutorial"}]', '[{"tool": "welcome_tutorial"}]'),
+    (JSON_OBJECT, "A list in Python looks like [1, 2, 3]. You can add to it with append, "
+                  "and a dictionary looks like {'name': 'Ola'}.", None),
+    (JSON_OBJECT, 'Lists look like [1, 2]. Let me show you: {"action": "welcome_tutorial"}',
+     '{"action": "welcome_tutorial"}'),
+    (JSON_OBJECT, '{"action": "delete_everything"}', None),
+]
+
+
+def check_detector() -> int:
+    """Feed each case in 3-character chunks; returns how many cases passed."""
+    passed = 0
+    for kind, answer, expected in DETECTOR_CASES:
+        detector = ToolCallDetector(kind, DETECTOR_TOOLS)
+        for i in range(0, len(answer), 3):
+            if detector.feed(answer[i:i + 3]) is not None:
+                break
+        if detector.call == expected:
+            passed += 1
+        else:
+            print(f"detector: {answer[:40]!r}... gave {detector.call!r}, expected {expected!r}")
+    return passed
+
+
+def benchmark(turns: int = 20, token_delay: float = 0.01) -> Tuple[float, float]:
+    """Replay a chatty answer through a fake streaming model, with and without early cancel."""
+    import asyncio
+
+    from langchain_core.messages import AIMessageChunk
+
+    answer = (
+        "```python\ntutorial.show('setup')\n```\n\n"
+        "This will show you how to set up your environment, including creating a "
+        "virtual environment and installing Django. Let me know if you have questions!"
+    )
+    tokens = re.findall(r"\s*\S+", answer)
+
+    class FakeStream:
+        async def astream(self, messages):
+            for token in tokens:
+                await asyncio.sleep(token_delay)
+                yield AIMessageChunk(content=token)
+
+    async def run(cancel: bool) -> float:
+        stats = ToolCallStats()
+        start = time.perf_counter()
+        for _ in range(turns):
+            result = await stream_tool_call(FakeStream(), [], stats=stats, cancel=cancel)
+            assert result.call == "tutorial.show('setup')"
+        return (time.perf_counter() - start) / turns
+
+    full = asyncio.run(run(cancel=False))
+    early = asyncio.run(run(cancel=True))
+    return full, early
+
+
+if __name__ == "__main__":
+    print(f"detector: {check_detector()}/{len(DETECTOR_CASES)} cases")
+    full, early = benchmark()
+    print(f"full completion: {full * 1000:.0f} ms/turn")
+    print(f"early cancel:    {early * 1000:.0f} ms/turn ({(full - early) * 1000:.0f} ms saved)")
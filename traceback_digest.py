@@ -0,0 +1,211 @@
+"""
+Streaming traceback parser for large pasted errors.
+
+Learners paste whole Django debug pages and multi-KB tracebacks. Only three
+things matter for helping them: the final exception type and message, the
+innermost frame in *their* code (`blog/...`, `mysite/...`, `<stdin>`) and the
+source line it points at. `TracebackParser` extracts those in a single pass
+over the text, line by line, keeping only a few lines of state, so memory
+stays bounded however much is pasted.
+
+The resulting `TracebackDigest.summary()` is what goes to the error
+knowledge base and to the model, instead of the full paste: a 5 KB debug
+page becomes a ~200 byte digest, which cuts prefill for error turns by an
+order of magnitude. Run `python traceback_digest.py` to see the reduction on
+the traceback corpus.
+"""
+import re
+from collections import deque
+from dataclasses import dataclass
+from typing import Iterable, Optional, Union
+
+# Paths that belong to the learner's own project rather than Python or Django
+LEARNER_CODE = re.compile(r"(?:^|[/\\])(?:blog|mysite)[/\\]|<stdin>|<string>|<console>")
+
+FRAME_LINE = re.compile(r'^\s*File "(?P<file>[^"]+)", line (?P<line>\d+)(?:, in (?P<function>.+))?')
+EXCEPTION_LINE = re.compile(r"^(?:[\w.]+\.)?(?P<type>[A-Z]\w*)(?::\s?(?P<message>.*))?$")
+# Names that look like exception classes (Django's don't all end in "Error")
+EXCEPTION_NAME = re.compile(
+    r"(?:Error|Exception|Warning|Exit|Interrupt|DoesNotExist|NoReverseMatch|Registered|Configured|Ready"
+    r"|Host|History|Returned)$"
+)
+DEBUG_PAGE_TYPE = re.compile(r"^\s*Exception Type:\s*(?P<type>\S+)")
+DEBUG_PAGE_VALUE = re.compile(r"^\s*Exception Value:\s*(?P<message>.*)")
+DEBUG_PAGE_LOCATION = re.compile(r"^\s*Exception Location:\s*(?P<file>\S+?), line (?P<line>\d+), in (?P<function>\S+)")
+
+# Longest line we keep; anything beyond is noise (minified HTML, base64...)
+MAX_LINE = 500
+
+# Pastes shorter than this are sent to the model as they are
+COMPACT_THRESHOLD = 400
+
+
+@dataclass
+class TracebackDigest:
+    exception: Optional[str] = None
+    message: str = ""
+    file: Optional[str] = None
+    line: Optional[int] = None
+    function: Optional[str] = None
+    source: Optional[str] = None
+    chars_read: int = 0
+
+    @property
+    def found(self) -> bool:
+        return self.exception is not None or bool(self.message)
+
+    def summary(self) -> str:
+        """Compact text for the knowledge base and the model."""
+        parts = []
+        if self.exception:
+            parts.append(f"{self.exception}: {self.message}" if self.message else self.exception)
+        elif self.message:
+            parts.append(self.message)
+        if self.file:
+            where = f"at {_short_path(self.file)}:{self.line}"
+            if self.function:
+                where += f" in {self.function}"
+            parts.append(where)
+        if self.source:
+            parts.append(f"    {self.source}")
+        return "\n".join(parts)
+
+
+class TracebackParser:
+    """Incremental parser: `feed()` text in any chunk sizes, then `close()`."""
+
+    def __init__(self):
+        self._digest = TracebackDigest()
+        self._partial = ""
+        self._pending_frame = None   # frame whose source line may come next
+        self._frame = None           # innermost frame seen so far
+        self._learner_frame = None   # innermost frame in the learner's code
+        self._tail = deque(maxlen=3)  # last non-empty lines, for non-traceback errors
+        self._in_value = False       # inside a multi-line "Exception Value:"
+
+    def feed(self, chunk: str) -> None:
+        self._digest.chars_read += len(chunk)
+        text = self._partial + chunk
+        lines = text.split("\n")
+        self._partial = lines.pop()[:MAX_LINE * 4]
+        for line in lines:
+            self._line(line[:MAX_LINE].rstrip("\r"))
+
+    def close(self) -> TracebackDigest:
+        if self._partial:
+            self._line(self._partial[:MAX_LINE])
+            self._partial = ""
+        digest = self._digest
+        frame = self._learner_frame or self._frame
+        if frame is not None:
+            digest.file, digest.line, digest.function, digest.source = frame
+        if not digest.found and self._tail:
+            # Not a Python traceback (shell or pip output): keep its last lines
+            digest.message = " ".join(self._tail)
+        return digest
+
+    def _line(self, line: str) -> None:
+        stripped = line.strip()
+        if not stripped:
+            self._in_value = False
+            return
+
+        if self._pending_frame is not None:
+            frame = self._pending_frame
+            self._pending_frame = None
+            if not FRAME_LINE.match(line) and line[:1].isspace():
+                frame = (frame[0], frame[1], frame[2], stripped)
+                self._remember_frame(frame)
+                return
+            self._remember_frame(frame)
+
+        match = FRAME_LINE.match(line)
+        if match:
+            self._pending_frame = (match["file"], int(match["line"]), match["function"], None)
+            return
+
+        match = DEBUG_PAGE_TYPE.match(line)
+        if match:
+            self._digest.exception = match["type"]
+            return
+        match = DEBUG_PAGE_VALUE.match(line)
+        if match:
+            self._digest.message = match["message"].strip()
+            self._in_value = True
+            return
+        match = DEBUG_PAGE_LOCATION.match(line)
+        if match:
+            self._remember_frame((match["file"], int(match["line"]), match["function"], None))
+            return
+        if self._in_value and line[:1].isspace():
+            self._digest.message = (self._digest.message + " " + stripped)[:MAX_LINE]
+            return
+
+        if not line[:1].isspace():
+            match = EXCEPTION_LINE.match(stripped)
+            if match and EXCEPTION_NAME.search(match["type"]):
+                # Chained exceptions: the last one is what the learner saw
+                self._digest.exception = match["type"]
+                self._digest.message = (match["message"] or "").strip()
+                self._in_value = False
+                return
+        self._tail.append(stripped)
+
+    def _remember_frame(self, frame) -> None:
+        self._frame = frame
+        if LEARNER_CODE.search(frame[0]):
+            self._learner_frame = frame
+
+
+def parse_traceback(text: Union[str, Iterable[str]]) -> TracebackDigest:
+    """Parse a whole paste (a string, or an iterable of chunks such as a file)."""
+    parser = TracebackParser()
+    if isinstance(text, str):
+        parser.feed(text)
+    else:
+        for chunk in text:
+            parser.feed(chunk)
+    return parser.close()
+
+
+def looks_like_error(text: str) -> bool:
+    return (
+        "Traceback (most recent call last)" in text
+        or "Exception Type:" in text
+        or bool(re.search(r"^(?:[\w.]+\.)?[A-Z]\w*(?:Error|Exception):", text, re.MULTILINE))
+    )
+
+
+def compact_error_message(text: str) -> str:
+    """Replace a long pasted error with its digest; leave everything else alone."""
+    if len(text) < COMPACT_THRESHOLD or not looks_like_error(text):
+        return text
+    digest = parse_traceback(text)
+    if not digest.found:
+        return text
+    return f"I got this error:\n{digest.summary()}"
+
+
+def _short_path(path: str) -> str:
+    """Trim a path to the part that starts at the learner's project."""
+    match = LEARNER_CODE.search(path)
+    if match and match.start() > 0:
+        return path[match.start():].lstrip("/\\")
+    return path
+
+
+if __name__ == "__main__":
+    from error_kb import TRACEBACK_CORPUS
+
+    # A realistic Django debug page: the error buried in ~20 KB of settings and request data
+    debug_page = TRACEBACK_CORPUS[2][0] + "\n" + "\n".join(
+        f"{name}\t'{value}'" for name, value in (("SETTING_%d" % i, "x" * 60) for i in range(300))
+    )
+    samples = [text for text, _ in TRACEBACK_CORPUS] + [debug_page]
+    before = sum(len(text) for text in samples)
+    after = sum(len(compact_error_message(text)) for text in samples)
+    print(f"pasted: {before:,} chars (~{before // 4:,} tokens)")
+    print(f"sent:   {after:,} chars (~{after // 4:,} tokens)")
+    print(f"reduction: {before / after:.1f}x")
+    print()
+    print(parse_traceback(TRACEBACK_CORPUS[1][0]).summary())
@@ -0,0 +1,200 @@
+"""
+Bounded transcript of the chat, with older messages spilled to disk.
+
+A workshop session runs for hours. If every message is kept in memory (and
+in the terminal's scrollback), memory grows with the session. `Transcript`
+keeps only the last `max_messages` in memory:
+
+- older messages are collected into pages of `page_size` and appended to a
+  gzip log, one gzip member per page. Only the byte offset of each page is
+  remembered (8 bytes per page), so any page can be read back without
+  decompressing the rest;
+- `page(n)` returns the n-th page counting back from the newest message. It
+  reads from memory or decompresses a single page from the log, and keeps
+  the last couple of decoded pages around for paging back and forth;
+- the log lives in `~/.django-girls-offline/transcripts/` (or
+  DJANGO_GIRLS_TRANSCRIPTS). Only the most recent `keep_logs` logs are kept.
+
+`RichChatUI` records everything it prints here and pages through it with
+`/history`. `python transcript.py` runs a 5,000-turn soak and prints
+memory use along the way, which should stay flat.
+"""
+import gzip
+import json
+import os
+import time
+from array import array
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Deque, List, NamedTuple
+
+DEFAULT_DIR = Path.home() / ".django-girls-offline" / "transcripts"
+
+
+class Entry(NamedTuple):
+    role: str        # "user", "agent" or "system"
+    markdown: str
+    at: float
+
+
+def transcript_dir() -> Path:
+    return Path(os.environ.get("DJANGO_GIRLS_TRANSCRIPTS", DEFAULT_DIR)).expanduser()
+
+
+class Transcript:
+    """The last `max_messages` messages in memory, the rest in a gzip log.
+
+    Args:
+        path: Log file (default: a new file in `transcript_dir()`).
+        max_messages (int): Messages kept in memory.
+        page_size (int): Messages per `/history` page and per log member.
+        keep_logs (int): Logs kept in the transcript directory.
+    """
+
+    def __init__(self, path=None, max_messages: int = 200, page_size: int = 20, keep_logs: int = 20):
+        if path is None:
+            directory = transcript_dir()
+            directory.mkdir(parents=True, exist_ok=True)
+            _prune(directory, keep_logs - 1)
+            path = directory / time.strftime(f"%Y%m%d-%H%M%S-{os.getpid()}.jsonl.gz")
+        self.path = Path(path)
+        self.max_messages = max(max_messages, page_size)
+        self.page_size = page_size
+
+        self._recent: Deque[Entry] = deque()
+        self._pending: List[Entry] = []              # evicted, waiting for a full page
+        self._offsets = array("q", [0])              # where each page starts in the log, and its end
+        self._decoded: "OrderedDict[int, List[Entry]]" = OrderedDict()
+        self._file = None
+
+    def __len__(self) -> int:
+        return self._spilled_pages * self.page_size + len(self._pending) + len(self._recent)
+
+    @property
+    def _spilled_pages(self) -> int:
+        return len(self._offsets) - 1
+
+    @property
+    def pages(self) -> int:
+        return max(1, -(-len(self) // self.page_size))
+
+    def append(self, role: str, markdown: str) -> None:
+        self._recent.append(Entry(role, markdown, time.time()))
+        if len(self._recent) > self.max_messages:
+            self._pending.append(self._recent.popleft())
+            if len(self._pending) == self.page_size:
+                self._spill()
+
+    def recent(self, count: int) -> List[Entry]:
+        """The last `count` messages (at most `max_messages`)."""
+        return list(self._recent)[-count:]
+
+    def page(self, number: int = 1) -> List[Entry]:
+        """Messages of page `number`, 1 being the newest, oldest message first."""
+        number = min(max(1, number), self.pages)
+        stop = len(self) - (number - 1) * self.page_size
+        return self._slice(max(0, stop - self.page_size), stop)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _slice(self, start: int, stop: int) -> List[Entry]:
+        entries = []
+        spilled = self._spilled_pages * self.page_size
+        memory_start = spilled + len(self._pending)
+        index = start
+        while index < stop:
+            if index < spilled:
+                member = index // self.page_size
+                offset = index - member * self.page_size
+                page = self._load(member)
+                take = min(stop - index, len(page) - offset)
+                entries.extend(page[offset:offset + take])
+            elif index < memory_start:
+                take = min(stop, memory_start) - index
+                entries.extend(self._pending[index - spilled:index - spilled + take])
+            else:
+                take = stop - index
+                recent = self._recent
+                entries.extend(recent[i] for i in range(index - memory_start, index - memory_start + take))
+            index += take
+        return entries
+
+    def _spill(self) -> None:
+        if self._file is None:
+            self._file = open(self.path, "ab")
+            if not self._spilled_pages:
+                self._offsets[0] = self._file.seek(0, os.SEEK_END)
+        data = "\n".join(json.dumps(entry, ensure_ascii=False) for entry in self._pending).encode()
+        blob = gzip.compress(data, compresslevel=6)
+        self._file.write(blob)
+        self._file.flush()
+        self._offsets.append(self._offsets[-1] + len(blob))
+        self._pending = []
+
+    def _load(self, member: int) -> List[Entry]:
+        if member in self._decoded:
+            self._decoded.move_to_end(member)
+            return self._decoded[member]
+        start, end = self._offsets[member], self._offsets[member + 1]
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            data = gzip.decompress(f.read(end - start))
+        page = [Entry(*json.loads(line)) for line in data.decode().split("\n")]
+        self._decoded[member] = page
+        if len(self._decoded) > 2:
+            self._decoded.popitem(last=False)
+        return page
+
+
+def _prune(directory: Path, keep: int) -> None:
+    logs = sorted(directory.glob("*.jsonl.gz"), key=lambda p: p.stat().st_mtime)
+    for old in logs[:max(0, len(logs) - keep)]:
+        try:
+            old.unlink()
+        except OSError:
+            pass
+
+
+def soak(turns: int = 5000, report_every: int = 500) -> dict:
+    """Record `turns` learner/agent exchanges, sampling memory in use along the way."""
+    import random
+    import tempfile
+    import tracemalloc
+
+    rng = random.Random(5)
+    answer = (
+        "A **view** is where the logic of the application goes.\n\n"
+        "```python\ndef post_list(request):\n    return render(request, 'blog/post_list.html', {})\n```\n\n"
+    )
+    memory = []
+    with tempfile.TemporaryDirectory() as directory:
+        transcript = Transcript(Path(directory) / "soak.jsonl.gz")
+        tracemalloc.start()
+        for turn in range(1, turns + 1):
+            transcript.append("user", f"question {turn}: how do I write view number {rng.randint(1, 99)}?")
+            transcript.append("agent", answer * rng.randint(1, 6))
+            if turn % report_every == 0:
+                # Page back through the log too, as a learner using /history would
+                transcript.page(rng.randint(1, transcript.pages))
+                memory.append((turn, tracemalloc.get_traced_memory()[0] / 1024))
+        tracemalloc.stop()
+
+        oldest = transcript.page(transcript.pages)
+        assert oldest[0].markdown.startswith("question 1:"), oldest[0]
+        assert len(transcript) == 2 * turns
+        start = time.perf_counter()
+        transcript.page(transcript.pages // 2)
+        page_ms = (time.perf_counter() - start) * 1000
+        log_kib = transcript.path.stat().st_size / 1024
+        transcript.close()
+    return {"memory_kib": memory, "log_kib": log_kib, "page_ms": page_ms}
+
+
+if __name__ == "__main__":
+    results = soak()
+    for turn, kib in results["memory_kib"]:
+        print(f"turn {turn:>5}: {kib:8.1f} KiB in use")
+    print(f"log on disk: {results['log_kib']:.0f} KiB, reading an uncached page: {results['page_ms']:.2f} ms")
@@ -0,0 +1,834 @@
+"""
+The tutorial's content, in one place.
+
+The code-generation agent (`TutorialAPI`, tutorial_api.py) and the MCP tools
+(django_girls_mcp_server.py) used to carry their own copies of every page
+and code snippet, and the copies had drifted apart: different welcome texts,
+a template without the publish date, next-step prompts that no longer
+matched the router. Both are now thin views over one `ContentStore`:
+
+- `PAGES` holds each tutorial step's markdown, in tutorial order (`STEPS`);
+- code snippets (`models`, `views`, `urls`, `template`, `admin`) aren't
+  written twice: they are the code blocks of the pages that teach them
+  (`SNIPPETS`);
+- `content_store()` renders the parts that depend on this machine (a
+  wheelhouse for offline installs) once and returns the process-wide store,
+  with precomputed metadata per topic (`TopicInfo`: length, token estimate,
+  code blocks, next step, content version).
+
+The MCP server also publishes every page and snippet as a resource at a
+stable URI (`topic_uri()`, `snippet_uri()`), and the whole store as one
+JSON document at `CURRICULUM_URI` (`to_dict()` / `from_dict()`), so a
+client can fetch everything in one round-trip (see mcp_curriculum.py).
+
+`python tutorial_content.py` prints the metadata and runs `check()`, which
+fails (exit status 1) when the views or the router have drifted from the
+content.
+"""
+import hashlib
+import re
+import sys
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from wheelhouse import find_wheelhouse, install_command, install_instructions
+
+# Tutorial steps in order
+STEPS = ["welcome", "python_basics", "setup", "django_install", "create_project",
+         "create_app", "models", "admin", "views", "test"]
+
+# MCP tool serving each step
+STEP_TOOLS = {
+    "welcome": "welcome_tutorial",
+    "python_basics": "python_introduction",
+    "setup": "setup_environment",
+    "django_install": "install_django",
+    "create_project": "create_django_project",
+    "create_app": "create_blog_app",
+    "models": "create_post_model",
+    "admin": "setup_admin",
+    "views": "create_blog_views",
+    "test": "test_blog",
+}
+
+# Tool name -> the page it returns
+TOOL_TOPICS: Dict[str, str] = {tool: topic for topic, tool in STEP_TOOLS.items()}
+
+# Snippet name -> (page, language, which code block of that language on the page)
+SNIPPETS: Dict[str, Tuple[str, str, int]] = {
+    "models": ("models", "python", 0),
+    "views": ("views", "python", 0),
+    "urls": ("views", "python", 1),
+    "template": ("views", "html", 0),
+    "admin": ("admin", "python", 0),
+}
+
+# Stable resource addresses; what they point to changes with its version, never the URI
+CURRICULUM_URI = "tutorial://curriculum"
+
+
+def topic_uri(topic: str) -> str:
+    return f"tutorial://topics/{topic}"
+
+
+def snippet_uri(name: str) -> str:
+    return f"tutorial://snippets/{name}"
+
+
+_CODE_BLOCK = re.compile(r"^```(\w*)\n(.*?)\n```", re.DOTALL | re.MULTILINE)
+# "say **"create blog app"**", "type in **"learn Python"**": what the page tells the learner to send next
+_PROMPT = re.compile(r"""(?:\bsay|\btype(?: in)?)\s+\*{0,2}"([^"*]+)"\*{0,2}""", re.IGNORECASE)
+
+# --------------------------------------------------------------------------------------
+# PAGES
+# ({pip_upgrade} and {install_step} are filled in for this machine by content_store())
+# --------------------------------------------------------------------------------------
+
+PAGES: Dict[str, str] = {
+    "welcome": """
+🎉 **Welcome to the Django Girls Tutorial!** 🎉
+
+We are happy to see you here! :) In this tutorial, we will take you on a journey under the hood of web technologies, offering you a glimpse of all the bits and pieces that need to come together to make the web work as we know it.
+
+As with all unknown things, this is going to be an adventure - but no worries, since you already worked up the courage to be here, you'll be just fine! :)
+
+**What we'll build together:**
+A personal blog! By the end, you'll have your very own blog running on your computer where you can write posts, edit them, and share your thoughts with the world.
+
+**Our journey:**
+1. 🐍 **Python Introduction** - Let's write some code! (No programming experience needed)
+2. 🛠️ **Environment Setup** - Prepare your computer for coding
+3. 📦 **Install Django** - Get the Django web framework
+4. 🏗️ **Start Your Project** - Create the foundation
+5. 📝 **Build Your Blog** - Create the blog application
+6. 🎨 **Make It Beautiful** - Add HTML templates
+7. 🚀 **See It Live** - Run your blog locally!
+
+**Ready to start?**
+
+• If you're completely new to programming, type in **"learn Python"** to start with Python basics.
+• If you're ready to jump into Django setup, say **"setup"** to get started right away with setting up Django.
+
+Let's create something amazing together! 
+""",
+    "python_basics": """
+🐍 **Let's write some code!**
+
+Programming might seem scary, but it's really just giving instructions to your computer. Think of it like writing a recipe - you tell the computer step by step what to do!
+
+**First, in Python we write and 'run' code in a code interpreter. To test out writing your first lines of code we'll start by opening a new terminal.**
+
+- In VS Code we will do this by clicking the split terminal button (looks like two rectangles joined) in the top right of your current terminal. 
+- `(TIP: Ask the assitant to explain what a terminal is if you're not sure!)`
+- In the new terminal type **python3**. This will open a **code interpreter**.
+- Or skip the second terminal and run code right here in the chat: type `/run` and the code, like `/run 2 + 3`. Mistakes are fine, I'll explain the error!
+
+
+**🧮 Python as a Calculator**
+
+Try typing these into the interpreter one at a time(press Enter after each):
+```python
+>>> 2 + 3
+>>> 4 * 5  
+>>> 10 / 2
+>>> 2 ** 3  # This means 2 to the power of 3
+```
+
+See? Python knows math! The computer calculated the answers for you.
+
+**📝 Text (Strings)**
+
+Now try typing your name in quotes:
+```python
+>>> "Your Name Here"
+>>> "Hello " + "World"
+>>> "Python" * 3  # This repeats the text 3 times!
+```
+
+Quotes tell Python "this is text, not math." We call text in programming a "string" - like a string of letters!
+
+**💾 Variables (Storing Things)**
+
+Variables are like labeled boxes where you store information:
+```python
+>>> name = "Django Girl"
+>>> print(name)
+>>> age = 25
+>>> print(age)
+```
+
+The `=` sign doesn't mean "equals" here - it means "put this value in this box."
+
+**📋 Lists (Multiple Things)**
+
+Lists hold multiple items, like a shopping list:
+```python
+>>> favorite_colors = ["blue", "green", "purple"]
+>>> print(favorite_colors[0])  # This gets the first item (we start counting at 0!)
+>>> favorite_colors.append("red")  # This adds "red" to the end
+>>> print(favorite_colors)
+```
+
+**🔄 Doing Things Automatically (Loops)**
+
+Instead of greeting each friend one by one, let's use a loop:
+```python
+>>> friends = ["Alice", "Bob", "Carol"]
+>>> for friend in friends:
+...     print("Hello " + friend + "!")
+```
+
+This tells Python: "For each friend in my friends list, print hello to them."
+
+**Try these yourself!** Play around in the Code Runner for a few minutes. Make mistakes - that's how we learn!
+
+**When you're ready for the next step, say "I'm ready for Django setup"**
+
+**Need help?** Ask me anything like "What's a variable?" or "How do loops work?"
+""",
+    "setup": """
+🛠️ **Let's prepare your computer for Django!**
+
+Think of this like getting your kitchen ready before cooking - we need the right tools in the right places.
+
+You can use the Code Runner for quick experiments, but for Django setup you'll run a few commands in your regular terminal.
+
+**Step 1: Check if Python is installed**
+```bash
+python3 --version
+```
+You should see something like "Python 3.8.5" or higher. If not, visit python.org to install Python first!
+
+**Step 2: Create your project folder**
+```bash
+mkdir djangogirls-blog
+cd djangogirls-blog
+```
+This creates a new folder called "djangogirls-blog" and enters it. Think of it as creating your project workspace!
+
+**Step 3: Create a virtual environment**
+```bash
+python3 -m venv blog_env
+```
+
+**🤔 What's a virtual environment?**
+Imagine you're working on different art projects - you don't want your watercolors mixing with your oil paints! A virtual environment keeps your Django project's tools separate from other projects.
+
+**Step 4: Activate your virtual environment**
+
+**On Mac/Linux:**
+```bash
+source blog_env/bin/activate
+```
+
+**On Windows:**
+```bash
+blog_env\\Scripts\\activate
+```
+
+**Success!** You should see `(blog_env)` at the beginning of your command line. This means you're now working inside your project's virtual environment!
+
+**Step 5: Upgrade pip (Python's package installer)**
+```bash
+{pip_upgrade}
+```
+
+**When you're done with these steps, say "environment is ready"** and we'll install Django next!
+
+**Stuck on something?** Just ask! Common issues: "python3 not found", "permission denied", or "virtual environment not activating"
+""",
+    "django_install": """
+📦 **Let's install Django!**
+
+Django is like a powerful toolkit for building websites. Instead of building everything from scratch, Django gives you pre-made components that work together beautifully!
+
+{install_step}
+
+**Verify Django is installed:**
+```bash
+python -m django --version
+```
+
+You should see something like "5.0.1" or similar. This is Django's version number.
+
+**🎉 Success!** Django is now installed in your virtual environment!
+
+**What just happened?**
+- `pip` is Python's package installer (like an app store for Python tools)
+- We downloaded Django and all its dependencies
+- Django is now available for your project, but won't interfere with other Python projects on your computer (thanks to our virtual environment!)
+
+**Ready for the next step?** Say **"create Django project"** and we'll start building your blog!
+
+**Having issues?** Common problems:
+- "pip not found" → Make sure your virtual environment is activated
+- "permission denied" → Virtual environment should fix this
+- Takes forever → This is normal for the first Django install!
+""",
+    "create_project": """
+🏗️ **Let's create your Django project!**
+
+**Create the project:**
+```bash
+django-admin startproject mysite .
+```
+
+**⚠️ Important:** Don't forget the dot (.) at the end! It tells Django "create the project files right here in my current folder."
+
+**What just happened?**
+Django just created the skeleton of your web application! Let's see what it built:
+
+```bash
+ls  # (or 'dir' on Windows)
+```
+
+You should see:
+- `manage.py` - Your project's command center (like a remote control)
+- `mysite/` folder with:
+  - `settings.py` - Your project's configuration file
+  - `urls.py` - Your website's navigation map  
+  - `wsgi.py` - Helps your site talk to web servers
+
+**Test that it works:**
+```bash
+python manage.py runserver
+```
+
+**🎉 If you see "Starting development server at http://127.0.0.1:8000/"**, it's working!
+
+Open your web browser and go to: `http://127.0.0.1:8000`
+
+You should see a "Congratulations!" page with a rocket! 🚀
+
+**Stop the server:** Press `Ctrl+C` in your terminal when you want to stop it.
+
+**🤔 What's happening here?**
+- `manage.py` is your project manager - it can start servers, create database tables, and more
+- `runserver` starts a mini web server on your computer
+- `127.0.0.1:8000` means "your own computer, port 8000" 
+
+**Ready for the next step?** Say **"create blog app"** and we'll start building your actual blog!
+""",
+    "create_app": """
+📝 **Let's create your blog application!**
+
+**🤔 Project vs App - What's the difference?**
+- **Project (mysite)**: Your whole website - like the entire building
+- **App (blog)**: One feature of your website - like one room in the building
+
+A website can have many apps: blog, user accounts, photo gallery, etc. Today we're building the blog room!
+
+**Create the blog app:**
+```bash
+python manage.py startapp blog
+```
+
+**See what was created:**
+```bash
+ls blog/  # (or 'dir blog' on Windows)
+```
+
+You should see files like:
+- `models.py` - Where we define what our blog posts look like
+- `views.py` - The logic that decides what to show users
+- `admin.py` - For managing your blog from Django's admin panel
+
+**Tell Django about your new app:**
+
+Open `mysite/settings.py` in your code editor and find the `INSTALLED_APPS` section. It looks like:
+
+```python
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+]
+```
+
+Add `'blog',` to the end (don't forget the comma!):
+
+```python
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'blog',
+]
+```
+
+**💾 Save the file!**
+
+**Why this step matters:**
+This tells Django "Hey, I have a new app called 'blog' that you need to know about!" Now Django will look for models, views, and templates in your blog app.
+
+**Ready for the next step?** Say **"create post model"** and we'll define what a blog post looks like!
+""",
+    "models": """
+📋 **Let's define what a blog post looks like!**
+
+**🤔 What's a model?**
+A model is like a blueprint that tells Django "here's the information I want to store about each blog post." Think of it like a form with different fields: title, content, author, date, etc.
+
+**Open `blog/models.py` and replace everything with:**
+
+```python
+from django.db import models
+from django.utils import timezone
+from django.contrib.auth.models import User
+
+class Post(models.Model):
+    author = models.ForeignKey(User, on_delete=models.CASCADE)
+    title = models.CharField(max_length=200)
+    text = models.TextField()
+    created_date = models.DateTimeField(default=timezone.now)
+    published_date = models.DateTimeField(blank=True, null=True)
+
+    def publish(self):
+        self.published_date = timezone.now()
+        self.save()
+
+    def __str__(self):
+        return self.title
+```
+
+**Let's understand each line:**
+
+- `author = models.ForeignKey(User...)` - Links each post to a user (who wrote it)
+- `title = models.CharField(max_length=200)` - Post title (up to 200 characters)
+- `text = models.TextField()` - The main content (unlimited length)
+- `created_date = models.DateTimeField(...)` - When the post was created
+- `published_date = models.DateTimeField(...)` - When it was published (can be empty)
+
+**The special methods:**
+- `publish(self)` - A function to publish a post (sets the published date)
+- `__str__(self)` - Tells Python how to display a Post (just show the title)
+
+**💾 Save the file!**
+
+**Create the database table:**
+```bash
+python manage.py makemigrations blog
+```
+
+This creates a "migration file" - like a blueprint for creating the database table.
+
+```bash
+python manage.py migrate
+```
+
+This actually creates the table in your database!
+
+**🎉 Success!** Your database now has a table ready to store blog posts!
+
+**Ready for the next step?** Say **"setup admin"** and we'll create a way to add blog posts through Django's admin panel!
+""",
+    "admin": """
+👤 **Let's create Django's admin panel!**
+
+**🤔 What's the admin panel?**
+Django comes with a built-in admin interface - like a control panel for your website! You can add, edit, and delete blog posts without touching any code.
+
+**Step 1: Register your Post model**
+
+Open `blog/admin.py` and replace everything with:
+
+```python
+from django.contrib import admin
+from .models import Post
+
+admin.site.register(Post)
+```
+
+This tells Django "show the Post model in the admin panel."
+
+**💾 Save the file!**
+
+**Step 2: Create an admin user**
+```bash
+python manage.py createsuperuser
+```
+
+You'll be asked for:
+- **Username**: Choose anything (like "admin" or your name)
+- **Email**: Can be fake for learning (like "me@example.com")  
+- **Password**: Choose something secure (you won't see the letters as you type - that's normal!)
+- **Password (again)**: Type the same password
+
+**Step 3: Test the admin panel**
+
+Start your server:
+```bash
+python manage.py runserver
+```
+
+**Visit the admin panel:**
+Open your browser and go to: `http://127.0.0.1:8000/admin/`
+
+**Log in** with the username and password you just created!
+
+**🎉 You should see:**
+- A "Blog" section with "Posts"
+- Click "Posts" to see your (empty) list of blog posts
+- Click "Add Post" to create your first blog post!
+
+**Create a test post:**
+1. Click "Add Post"
+2. Fill in a title (like "My First Post!")
+3. Write some text (like "Hello, Django world!")
+4. Select yourself as the author
+5. Click "Save"
+
+**🎊 Congratulations!** You just created your first blog post through Django's admin!
+
+**Ready for the next step?** Say **"create blog views"** and we'll make these posts show up on your website!
+""",
+    "views": """
+🎨 **Let's make your blog posts visible on your website!**
+
+**🤔 How Django shows web pages:**
+1. **URLs** - Map web addresses to views (like a phone book)
+2. **Views** - Get data and decide what to show (like a waiter taking your order)
+3. **Templates** - The HTML that users actually see (like the menu design)
+
+**Step 1: Create the view function**
+
+Open `blog/views.py` and replace everything with:
+
+```python
+from django.shortcuts import render
+from django.utils import timezone
+from .models import Post
+
+def post_list(request):
+    posts = Post.objects.filter(published_date__lte=timezone.now()).order_by('published_date')
+    return render(request, 'blog/post_list.html', {'posts': posts})
+```
+
+**What this code does:**
+- Gets all published posts from the database
+- Puts them in chronological order  
+- Sends them to a template called 'post_list.html'
+
+**💾 Save the file!**
+
+**Step 2: Create template folders**
+```bash
+mkdir -p blog/templates/blog
+```
+
+This creates nested folders: `blog/templates/blog/`
+
+**Step 3: Create the HTML template**
+
+Create a new file `blog/templates/blog/post_list.html` with:
+
+```html
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Django Girls Blog</title>
+    <style>
+        body {
+            font-family: 'Georgia', serif;
+            margin: 40px;
+            background-color: #fafafa;
+        }
+        .header {
+            background-color: #ff9400;
+            margin-top: 0;
+            padding: 20px 40px;
+            color: white;
+        }
+        .post {
+            margin-bottom: 30px;
+            padding: 20px;
+            background: white;
+            border-left: 5px solid #ff9400;
+        }
+        .date {
+            color: #828282;
+        }
+    </style>
+</head>
+<body>
+    <header class="header">
+        <h1>Django Girls Blog</h1>
+    </header>
+
+    <main>
+        {% for post in posts %}
+            <article class="post">
+                <h2>{{ post.title }}</h2>
+                <p class="date">Published: {{ post.published_date }}</p>
+                <p>{{ post.text|linebreaksbr }}</p>
+            </article>
+        {% empty %}
+            <p>No blog posts yet. <a href="/admin/">Add some posts in the admin!</a></p>
+        {% endfor %}
+    </main>
+</body>
+</html>
+```
+
+**💾 Save the file!**
+
+**Step 4: Connect URLs**
+
+Create `blog/urls.py` with:
+
+```python
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.post_list, name='post_list'),
+]
+```
+
+**Step 5: Connect to main URLs**
+
+Edit `mysite/urls.py` to look like:
+
+```python
+from django.contrib import admin
+from django.urls import path, include
+
+urlpatterns = [
+    path('admin/', admin.site.urls),
+    path('', include('blog.urls')),
+]
+```
+
+**Ready for the next step?** Say **"test my blog"** and we'll see your blog in action!
+""",
+    "test": """
+🚀 **Let's see your blog in action!**
+
+**Start your server:**
+```bash
+python manage.py runserver
+```
+
+**Visit your blog:**
+Open your browser and go to: `http://127.0.0.1:8000`
+
+**🎉 What you should see:**
+- Your beautiful blog homepage!
+- Any posts you created in the admin should appear here
+- If you haven't created posts yet, you'll see a helpful message with a link to the admin
+
+**🎊 CONGRATULATIONS! 🎊**
+
+You've just built a complete Django blog from scratch! Here's what you accomplished:
+
+✅ **Learned Python basics** - Variables, functions, loops
+✅ **Set up your development environment** - Virtual environment, Django installation  
+✅ **Created a Django project** - Your website's foundation
+✅ **Built a blog app** - A specific feature of your site
+✅ **Designed database models** - How your data is structured
+✅ **Set up admin interface** - Easy way to manage content
+✅ **Created views and templates** - What visitors see
+✅ **Connected everything with URLs** - How pages are found
+
+**🎯 What you can do now:**
+- Add more blog posts through `/admin/`
+- Customize the design by editing the CSS in your template
+- Add more features like comments, categories, or user profiles
+- Deploy your blog online so the world can see it!
+
+**Want to keep learning?** Django has tons more features:
+- User authentication (login/logout)
+- Image uploads
+- Search functionality  
+- RSS feeds
+- And much more!
+
+**🏆 You're officially a Django developer!** 
+
+**Need help with anything?** Ask me about:
+- "How do I customize the design?"
+- "How do I add more features?"
+- "What should I learn next?"
+- "How do I put this online?"
+""",
+}
+
+
+def _pip_upgrade() -> str:
+    wheelhouse = find_wheelhouse()
+    if wheelhouse:
+        return " ".join(install_command(wheelhouse, ["--upgrade", "pip"]))
+    return "python -m pip install --upgrade pip"
+
+
+def _install_step() -> str:
+    offline = install_instructions()
+    if offline:
+        return f"""{offline}
+
+This uses the copy of Django saved on this computer, so it's quick and works without Wi-Fi."""
+    return """**Install Django:**
+```bash
+pip install django
+```
+
+This might take a minute - Django is downloading along with everything it needs to work."""
+
+
+# --------------------------------------------------------------------------------------
+# STORE
+# --------------------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class TopicInfo:
+    topic: str
+    title: str                               # first line of the page, without markup
+    chars: int
+    tokens: int                              # estimate, ~4 characters per token
+    code_blocks: Tuple[Tuple[str, str], ...]  # (language, code)
+    next: Optional[str]                      # following step, None for the last one
+    version: str                             # changes whenever the text does
+
+
+def content_version(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()[:12]
+
+
+def code_blocks(markdown: str) -> Tuple[Tuple[str, str], ...]:
+    return tuple((lang or "text", code) for lang, code in _CODE_BLOCK.findall(markdown))
+
+
+def next_step_prompts(markdown: str) -> List[str]:
+    """What the page tells the learner to say to move on."""
+    return [prompt.strip() for prompt in _PROMPT.findall(markdown)]
+
+
+def _title(markdown: str) -> str:
+    first = next((line for line in markdown.strip().split("\n") if line.strip()), "")
+    return first.replace("*", "").strip()
+
+
+class ContentStore:
+    """Rendered pages, the snippets cut from them and per-topic metadata.
+
+    Args:
+        pages: Step name -> rendered markdown, in tutorial order.
+    """
+
+    def __init__(self, pages: Dict[str, str]):
+        self.pages = pages
+        self.snippets: Dict[str, str] = {}
+        for name, (topic, language, index) in SNIPPETS.items():
+            blocks = [code for lang, code in code_blocks(pages[topic]) if lang == language]
+            self.snippets[name] = blocks[index]
+        order = list(pages)
+        self.info: Dict[str, TopicInfo] = {}
+        for position, (topic, text) in enumerate(pages.items()):
+            self.info[topic] = TopicInfo(
+                topic=topic,
+                title=_title(text),
+                chars=len(text),
+                tokens=len(text) // 4,
+                code_blocks=code_blocks(text),
+                next=order[position + 1] if position + 1 < len(order) else None,
+                version=content_version(text),
+            )
+        self.snippet_versions = {name: content_version(code) for name, code in self.snippets.items()}
+        # Changes whenever any page does (snippets are cut from the pages)
+        self.version = content_version("".join(info.version for info in self.info.values()))
+
+    def page(self, topic: str) -> str:
+        return self.pages[topic]
+
+    def snippet(self, name: str) -> str:
+        return self.snippets[name]
+
+    def to_dict(self) -> dict:
+        """The whole store as plain data; snippets and metadata are derived again on load."""
+        return {
+            "version": self.version,
+            "topics": [{"topic": topic, "version": self.info[topic].version, "text": text}
+                       for topic, text in self.pages.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ContentStore":
+        """Rebuild a store from `to_dict()` output, checking it arrived intact."""
+        store = cls({entry["topic"]: entry["text"] for entry in data["topics"]})
+        if store.version != data["version"]:
+            raise ValueError(f"curriculum {data['version']} arrived as {store.version}")
+        return store
+
+
+@lru_cache(maxsize=None)
+def content_store() -> ContentStore:
+    """The store shared by every front-end and session in this process."""
+    values = {"pip_upgrade": _pip_upgrade(), "install_step": _install_step()}
+    pages = {}
+    for topic in STEPS:
+        text = PAGES[topic]
+        for key, value in values.items():
+            text = text.replace("{" + key + "}", value)
+        pages[topic] = text
+    return ContentStore(pages)
+
+
+# --------------------------------------------------------------------------------------
+# CONSISTENCY CHECK
+# --------------------------------------------------------------------------------------
+
+def check(store: Optional[ContentStore] = None) -> List[str]:
+    """Ways the front-ends or the router disagree with the content (empty when consistent)."""
+    import django_girls_mcp_server as server
+    from model_router import classify
+    from tutorial_api import TutorialAPI
+
+    store = store or content_store()
+    problems = []
+    if list(store.pages) != STEPS:
+        problems.append(f"pages are not in tutorial order: {list(store.pages)}")
+    api = TutorialAPI(store)
+    for topic in STEPS:
+        text = store.page(topic)
+        if "{pip_upgrade}" in text or "{install_step}" in text:
+            problems.append(f"{topic}: placeholder left unrendered")
+        if api.show(topic) != text:
+            problems.append(f"{topic}: TutorialAPI.show() differs from the store")
+        if getattr(server, STEP_TOOLS[topic])() != text:
+            problems.append(f"{topic}: MCP tool {STEP_TOOLS[topic]}() differs from the store")
+        # Every "say ..." prompt has to take the learner forward, not back
+        later = set(STEPS[STEPS.index(topic) + 1:]) | {"next"}
+        for prompt in next_step_prompts(text):
+            intent = classify(prompt).intent
+            if intent not in later:
+                problems.append(f"{topic}: the prompt {prompt!r} routes to {intent!r}, not to a later step")
+    for name in SNIPPETS:
+        code = store.snippet(name)
+        if api.show(f"{name}_code") != f"```{SNIPPETS[name][1]}\n{code}\n```":
+            problems.append(f"{name}_code: TutorialAPI.show() differs from the snippet")
+        if SNIPPETS[name][1] == "python":
+            try:
+                compile(code, f"<{name} snippet>", "exec")
+            except SyntaxError as e:
+                problems.append(f"{name} snippet doesn't compile: {e}")
+    return problems
+
+
+if __name__ == "__main__":
+    store = content_store()
+    print(f"{'topic':<16}{'chars':>7}{'tokens':>8}{'code':>6}  {'next':<16}version")
+    for info in store.info.values():
+        print(f"{info.topic:<16}{info.chars:>7}{info.tokens:>8}{len(info.code_blocks):>6}  "
+              f"{info.next or '-':<16}{info.version}")
+    problems = check(store)
+    for problem in problems:
+        print("DRIFT:", problem)
+    print("content is consistent" if not problems else f"{len(problems)} problem(s)")
+    sys.exit(1 if problems else 0)
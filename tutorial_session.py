@@ -0,0 +1,301 @@
+"""
+One learner's conversation with the code-generation tutorial agent.
+
+The agent asks the model to answer with a `tutorial.<method>(...)` call, runs
+that call against the learner's own `TutorialAPI` and returns what should be
+shown. The model's text is never executed: `parse_tutorial_call()` reads it
+with `ast` and only `show`, `next_step` and `help` with string literal
+arguments are dispatched; anything else is shown as text.
+
+Keeping this out of the entry point lets the single-user terminal app
+(django-girls-offline.py) and the classroom server (classroom_server.py)
+share the exact same turn logic, while every session keeps its own tutorial
+state and history.
+
+Answers are streamed and the turn acts as soon as the tutorial call is
+complete, without waiting for whatever the model adds after it
+(see tool_call_stream.py).
+
+With a `ModelRouter` attached, turns that only pick a tutorial step are
+answered without the model (see model_router.py).
+
+With a `SessionJournal` attached, every new message and every change of
+tutorial step is journaled so the session can be resumed after a restart.
+
+With a `CodeRunner` attached, `/run <code>` runs a Python snippet for the
+learner (see code_runner.py); the learner's earlier snippets are kept so
+their variables carry over.
+"""
+import ast
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+
+from code_runner import MAX_SNIPPETS, RUN_USAGE, parse_run_command
+from traceback_digest import compact_error_message
+from generation_budget import BudgetController, response_kind
+from model_router import LARGE, MODEL_DOWN_NOTE, MODEL_SLOW_NOTE, ModelRouter, answer_without_model
+from model_watchdog import ModelUnavailable, ModelWatchdog
+from tool_call_stream import ToolCallStats, stream_tool_call
+from tutorial_api import TutorialAPI
+
+# Keep the system message plus the last 8 exchanges for the SLM
+MAX_HISTORY = 10
+KEEP_HISTORY = 8
+
+# Simpler system message focused on code generation
+SYSTEM_PROMPT = """You are a Django Girls Tutorial Assistant. You help users learn Django by guiding them through building a blog.
+
+You have access to a tutorial API object. Instead of explaining things yourself, generate Python code to call the tutorial API:
+
+Available methods:
+- tutorial.show('topic') - Show tutorial content for: welcome, python_basics, setup, django_install, create_project, create_app, models, admin, views, test
+- tutorial.show('code_type') - Show code for: models_code, views_code, urls_code, template_code, admin_code
+- tutorial.next_step() - Get the next step suggestion
+- tutorial.help('error message') - Get help with errors
+
+When users greet you, generate: tutorial.show('welcome')
+When they ask about Python, generate: tutorial.show('python_basics')
+When they have errors, generate: tutorial.help('their error description')
+If they ask about any topic look for the topic in the available methods above and generate the appropriate tutorial.show('topic') call.
+
+Always respond with simple Python code calling the tutorial API. Keep responses short."""
+
+
+def create_llm(alias: Optional[str] = None):
+    """Start (or attach to) Foundry Local and return a chat model pointing at it.
+
+    Without an alias the model is picked for this machine (see model_selection.py).
+    With several endpoints (DJANGO_GIRLS_ENDPOINTS) the returned model balances
+    calls across them (see endpoint_pool.py).
+    """
+    from langchain_openai import ChatOpenAI
+
+    from model_selection import select_models
+
+    def chat_model(choice):
+        # LLM pointing to Foundry Local
+        return ChatOpenAI(
+            base_url=choice.endpoint,
+            api_key=choice.api_key,
+            model=choice.model_id,
+            temperature=0.1  # Lower temperature for more consistent code generation
+        )
+
+    choices = select_models(alias)
+    if len(choices) == 1:
+        return chat_model(choices[0])
+
+    from endpoint_pool import BalancedChatModel, EndpointPool, LEAST_OUTSTANDING
+
+    policy = os.environ.get("DJANGO_GIRLS_BALANCE", LEAST_OUTSTANDING)
+    return BalancedChatModel(pool=EndpointPool.from_choices(choices, chat_model, policy=policy))
+
+
+def extract_tutorial_call(content: str) -> Optional[str]:
+    """Pull the tutorial API call out of a model response, if there is one."""
+    code_match = re.search(r'```python\n(.*?)\n```', content, re.DOTALL)
+    if not code_match:
+        # Try to find any line that looks like a tutorial call
+        code_match = re.search(r'(tutorial\.\w+\([^)]*\))', content)
+    return code_match.group(1) if code_match else None
+
+
+# The TutorialAPI methods a reply may call, with how many (string) arguments each takes
+TUTORIAL_METHODS = {"show": (1, 1), "next_step": (0, 0), "help": (0, 1)}
+
+
+def parse_tutorial_call(code: str) -> Optional[Tuple[str, List[str]]]:
+    """The first `tutorial.<method>('literal', ...)` call in `code` as (method, args).
+
+    Only calls to TUTORIAL_METHODS with string literal arguments count;
+    anything else in the code is ignored, never run.
+    """
+    try:
+        statements = ast.parse(code.strip()).body
+    except SyntaxError:
+        match = re.search(r"tutorial\.\w+\([^)]*\)", code)
+        if match is None or match.group(0) == code.strip():
+            return None
+        return parse_tutorial_call(match.group(0))
+    for statement in statements:
+        node = statement.value if isinstance(statement, ast.Expr) else None
+        if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+                and isinstance(node.func.value, ast.Name) and node.func.value.id == "tutorial"
+                and node.func.attr in TUTORIAL_METHODS and not node.keywords):
+            continue
+        low, high = TUTORIAL_METHODS[node.func.attr]
+        if not low <= len(node.args) <= high:
+            continue
+        if all(isinstance(arg, ast.Constant) and isinstance(arg.value, str) for arg in node.args):
+            return node.func.attr, [arg.value for arg in node.args]
+    return None
+
+
+def tutorial_call(intent: str, user_text: str) -> str:
+    """The tutorial API call for a routed intent."""
+    if intent == "next":
+        return "tutorial.next_step()"
+    if intent == "help":
+        return f"tutorial.help({user_text!r})"
+    return f"tutorial.show({intent!r})"
+
+
+@dataclass
+class Reply:
+    """A message to show the learner: `kind` is "agent" or "system"."""
+    kind: str
+    markdown: str
+
+
+@dataclass
+class TutorialSession:
+    """Tutorial state and chat history for a single learner.
+
+    `llm` only needs an async `astream(messages)` yielding chunks with
+    `.content` (any LangChain chat model has one), so sessions can share one
+    model client (or a stub in tests). Sessions may also share `router`,
+    `budgets`, `watchdog`, `tool_call_stats` and `runner`.
+    """
+    llm: object
+    tutorial: TutorialAPI = field(default_factory=TutorialAPI)
+    session_id: str = "local"
+    history: list = field(default_factory=lambda: [SystemMessage(content=SYSTEM_PROMPT)])
+    journal: Optional[object] = None
+    tool_call_stats: ToolCallStats = field(default_factory=ToolCallStats)
+    router: Optional[ModelRouter] = None
+    budgets: Optional[BudgetController] = None
+    watchdog: Optional[ModelWatchdog] = None
+    runner: Optional[object] = None
+
+    def __post_init__(self):
+        # The learner's /run snippets that worked, replayed before the next one
+        self.snippets: List[str] = []
+
+    def restore(self) -> bool:
+        """Resume tutorial progress and history from the journal, if any."""
+        if self.journal is None:
+            return False
+        snapshot = self.journal.load(self.session_id)
+        if snapshot is None:
+            return False
+        self.tutorial.current_step = snapshot.current_step
+        self.tutorial.completed_steps = snapshot.completed_steps
+        self.history = [self.history[0]] + snapshot.messages
+        return True
+
+    def reset(self) -> None:
+        """Start the tutorial over and forget the journaled session."""
+        self.tutorial.current_step = "welcome"
+        self.tutorial.completed_steps = set()
+        self.history = [self.history[0]]
+        self.snippets = []
+        if self.journal is not None:
+            self.journal.reset(self.session_id)
+
+    def _remember(self, message) -> None:
+        self.history.append(message)
+        if self.journal is not None:
+            self.journal.record_message(self.session_id, message)
+
+    async def run_code(self, code: str) -> List[Reply]:
+        """Run a `/run` snippet; errors come with the tutorial's help for them."""
+        if not code:
+            return [Reply("system", RUN_USAGE)]
+        result = await self.runner.run(code, self.snippets)
+        replies = [Reply("agent", result.markdown())]
+        if result.ok:
+            self.snippets.append(code)
+            del self.snippets[:-MAX_SNIPPETS]
+        elif result.status == "error":
+            replies.append(Reply("agent", self.tutorial.help(result.error)))
+        return replies
+
+    async def handle(self, user_text: str) -> List[Reply]:
+        """Run one turn for the learner's message and return what to display."""
+        code = parse_run_command(user_text) if self.runner is not None else None
+        if code is not None:
+            return await self.run_code(code)
+        replies = []
+        step = (self.tutorial.current_step, len(self.tutorial.completed_steps))
+
+        # Add user message to history (long pasted errors as their digest)
+        self._remember(HumanMessage(content=compact_error_message(user_text)))
+
+        route = await self.router.route(user_text) if self.router is not None else None
+        if route is not None and route.intent is not None:
+            # Tool selection only: no need to ask the model
+            code = tutorial_call(route.intent, user_text)
+        else:
+            # Get LLM response, cut off as soon as the tutorial call is complete
+            llm, kind, timeout = self.llm, None, None
+            if self.budgets is not None:
+                kind = response_kind(route, user_text)
+                llm, timeout = self.budgets.bind(self.llm, kind), self.budgets.budget(kind).timeout
+            if self.watchdog is not None:
+                llm = self.watchdog.guard(llm)
+            start = time.perf_counter()
+            try:
+                answer = await stream_tool_call(llm, self.history, stats=self.tool_call_stats, timeout=timeout)
+            except ModelUnavailable:
+                # Answer from the tutorial content until the model is back
+                replies.append(Reply("system", MODEL_DOWN_NOTE))
+                replies.append(Reply("agent", answer_without_model(user_text, self.tutorial)))
+                self._trim_history()
+                return replies
+            if answer.timed_out:
+                # A partial reply is not an answer, and its length says nothing about the budget
+                if self.watchdog is not None:
+                    self.watchdog.report_failure(f"no answer within {timeout:.0f}s")
+                replies.append(Reply("system", MODEL_SLOW_NOTE))
+                replies.append(Reply("agent", answer_without_model(user_text, self.tutorial)))
+                self._trim_history()
+                return replies
+            if self.router is not None:
+                self.router.record(LARGE, time.perf_counter() - start)
+            if kind is not None:
+                self.budgets.observe(kind, answer.tokens, truncated=answer.finish_reason == "length")
+            response = AIMessage(content=answer.content)
+            code = answer.call or extract_tutorial_call(response.content)
+
+        call = parse_tutorial_call(code) if code else None
+        if call is not None:
+            method, args = call
+            try:
+                # Dispatch the call on the learner's tutorial
+                result = getattr(self.tutorial, method)(*args)
+
+                # Display the result
+                if result:
+                    replies.append(Reply("agent", str(result)))
+
+                    # Add to history for context
+                    self._remember(AIMessage(content=f"I called: {code}\n\nResult shown above."))
+
+            except Exception as e:
+                replies.append(Reply("system", f"Error calling the tutorial: {e}"))
+                # Try to help with the error
+                try:
+                    replies.append(Reply("agent", self.tutorial.help(str(e))))
+                except Exception:
+                    pass
+        else:
+            # No tutorial call found, show the raw response
+            replies.append(Reply("agent", response.content))
+            self._remember(response)
+
+        if self.journal is not None and step != (self.tutorial.current_step, len(self.tutorial.completed_steps)):
+            self.journal.record_state(self.session_id, self.tutorial.current_step, self.tutorial.completed_steps)
+
+        self._trim_history()
+        return replies
+
+    def _trim_history(self) -> None:
+        # Keep history size manageable for SLM
+        if len(self.history) > MAX_HISTORY:
+            # Keep system message and last 8 exchanges
+            self.history = [self.history[0]] + self.history[-KEEP_HISTORY:]
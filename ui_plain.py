@@ -0,0 +1,251 @@
+"""
+Plain-text chat UI for slow terminals, SSH sessions and pipes.
+
+Over a high-latency SSH link every byte counts. Rich panels cost box-drawing
+characters on every line, colour escapes and cursor movement, and the
+banner in `visuals.py` alone is several KiB. `PlainChatUI` has the same
+surface as `RichChatUI` but writes minimal text, wrapped to the terminal
+width, with one write and one flush per message. It never imports Rich.
+
+`create_chat_ui()` picks the UI:
+
+- `--plain` / `--rich` on the command line, or DJANGO_GIRLS_UI=plain|rich;
+- otherwise plain when stdout isn't a terminal (pipes, logs, `TERM=dumb`)
+  or the session runs over SSH, where bandwidth is the bottleneck.
+
+`python ui_plain.py` renders the tutorial content both ways and compares
+the bytes sent per message.
+"""
+import os
+import re
+import shutil
+import sys
+import textwrap
+from typing import List, Optional
+
+from transcript import Transcript
+
+_FENCE = re.compile(r"^\s*(```|~~~)")
+_LIST_ITEM = re.compile(r"^(\s*(?:[-*+]|\d+[.)])\s+)")
+_EMPHASIS = re.compile(r"(\*\*|__)(.+?)\1")
+
+
+def wants_plain(argv: Optional[List[str]] = None) -> bool:
+    """Whether this process should use the plain UI."""
+    argv = sys.argv if argv is None else argv
+    if "--plain" in argv:
+        return True
+    if "--rich" in argv:
+        return False
+    choice = os.environ.get("DJANGO_GIRLS_UI", "").lower()
+    if choice in ("plain", "rich"):
+        return choice == "plain"
+    if not sys.stdout.isatty() or os.environ.get("TERM") == "dumb":
+        return True
+    # Over SSH every byte crosses the network
+    return bool(os.environ.get("SSH_CONNECTION") or os.environ.get("SSH_TTY"))
+
+
+def create_chat_ui(plain: Optional[bool] = None):
+    """The chat UI for this terminal (see `wants_plain()`)."""
+    if plain is None:
+        plain = wants_plain()
+    if plain:
+        return PlainChatUI()
+    from ui_rich import RichChatUI
+
+    return RichChatUI()
+
+
+def format_plain(md: str, width: int) -> str:
+    """Markdown as wrapped plain text: code blocks indented, bold markers dropped."""
+    out: List[str] = []
+    in_code = False
+    paragraph: List[str] = []
+
+    def flush():
+        if not paragraph:
+            return
+        text = _EMPHASIS.sub(r"\2", " ".join(line.strip() for line in paragraph))
+        marker = _LIST_ITEM.match(paragraph[0])
+        indent = " " * len(marker.group(1)) if marker else ""
+        out.extend(textwrap.wrap(text, width, subsequent_indent=indent, break_on_hyphens=False) or [""])
+        paragraph.clear()
+
+    for line in md.strip("\n").split("\n"):
+        if _FENCE.match(line):
+            flush()
+            in_code = not in_code
+            continue
+        if in_code:
+            # Code is never re-wrapped; the terminal soft-wraps long lines
+            out.append("    " + line)
+        elif not line.strip():
+            flush()
+            if out and out[-1]:
+                out.append("")
+        elif _LIST_ITEM.match(line) or line.lstrip().startswith("#"):
+            flush()
+            paragraph.append(line)
+            if line.lstrip().startswith("#"):
+                flush()
+        else:
+            paragraph.append(line)
+    flush()
+    return "\n".join(out).rstrip("\n")
+
+
+class PlainStream:
+    """Streamed answer written as it arrives; same `feed()`/`close()` as `MarkdownStream`."""
+
+    def __init__(self, file, on_close=None):
+        self.file = file
+        self.on_close = on_close
+        self._parts: List[str] = []
+
+    def start(self) -> None:
+        self.file.write("\nAI: ")
+        self.file.flush()
+
+    def feed(self, chunk: str) -> None:
+        if chunk:
+            self._parts.append(chunk)
+            self.file.write(chunk)
+            self.file.flush()
+
+    def close(self) -> None:
+        self.file.write("\n")
+        self.file.flush()
+        if self.on_close is not None:
+            self.on_close("".join(self._parts))
+
+    def __enter__(self) -> "PlainStream":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class PlainChatUI:
+    """`RichChatUI` look-alike that writes plain, wrapped text.
+
+    Args:
+        file: Where output goes (default: stdout).
+        transcript: Message store for `/history` (default: a new `Transcript`).
+    """
+
+    def __init__(self, file=None, transcript: Optional[Transcript] = None):
+        self.file = file or sys.stdout
+        self.transcript = transcript
+        self._running = False
+
+    @property
+    def width(self) -> int:
+        return max(20, min(shutil.get_terminal_size().columns, 100) - 1)
+
+    async def start(self) -> None:
+        if self._running:
+            return
+        self._running = True
+        if self.transcript is None:
+            self.transcript = Transcript()
+
+    async def get_user_input(self) -> str:
+        try:
+            text = input("\nYou> ")
+        except (EOFError, KeyboardInterrupt):
+            return ""
+        if text:
+            self._record("user", text)
+        return text
+
+    async def add_agent_markdown(self, md: str) -> None:
+        self._record("agent", md)
+        self._write("AI", md)
+
+    async def add_system_markdown(self, md: str) -> None:
+        self._record("system", md)
+        self._write("--", md)
+
+    def stream_agent_markdown(self) -> PlainStream:
+        stream = PlainStream(self.file, on_close=lambda md: self._record("agent", md))
+        stream.start()
+        return stream
+
+    async def show_history(self, page: int = 1) -> None:
+        if self.transcript is None:
+            return
+        labels = {"agent": "AI", "system": "--", "user": "You"}
+        for entry in self.transcript.page(page):
+            self._write(labels.get(entry.role, entry.role), entry.markdown)
+        page = min(max(1, page), self.transcript.pages)
+        older = f" (/history {page + 1} for older messages)" if page < self.transcript.pages else ""
+        self.file.write(f"\n[history page {page} of {self.transcript.pages}]{older}\n")
+        self.file.flush()
+
+    def show_loading(self, text: str = "Loading tools") -> None:
+        return
+
+    def hide_loading(self) -> None:
+        return
+
+    def _write(self, label: str, md: str) -> None:
+        self.file.write(f"\n{label}: {format_plain(md, self.width)}\n")
+        self.file.flush()
+
+    def _record(self, role: str, md: str) -> None:
+        if self.transcript is not None:
+            self.transcript.append(role, md)
+
+
+def compare_bytes(width: int = 80) -> dict:
+    """Bytes written per tutorial message by the Rich panels and by the plain UI."""
+    import asyncio
+    import contextlib
+    import io
+
+    from rich.console import Console
+
+    from tutorial_api import TutorialAPI
+    from ui_rich import RichChatUI, default_layout
+    from visuals import print_plain_welcome, print_welcome_message
+
+    api = TutorialAPI()
+    messages = list(api.content.values()) + [api.show(topic) for topic in api.code_snippets]
+    layout = default_layout(width)
+
+    rich_out = io.StringIO()
+    console = Console(file=rich_out, width=width, force_terminal=True, color_system="256")
+    for md in messages:
+        console.print()
+        console.print(RichChatUI._panel(md, layout.agent_title, "orange1", layout))
+
+    plain_out = io.StringIO()
+    os.environ.setdefault("COLUMNS", str(width))
+    ui = PlainChatUI(file=plain_out, transcript=Transcript(os.devnull, max_messages=len(messages)))
+    for md in messages:
+        asyncio.run(ui.add_agent_markdown(md))
+
+    banners = []
+    for banner in (print_welcome_message, print_plain_welcome):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            banner()
+        banners.append(len(out.getvalue().encode()))
+
+    rich_bytes = len(rich_out.getvalue().encode())
+    plain_bytes = len(plain_out.getvalue().encode())
+    return {
+        "messages": len(messages),
+        "rich_bytes_per_message": rich_bytes / len(messages),
+        "plain_bytes_per_message": plain_bytes / len(messages),
+        "saving": 1 - plain_bytes / rich_bytes,
+        "rich_banner_bytes": banners[0],
+        "plain_banner_bytes": banners[1],
+    }
+
+
+if __name__ == "__main__":
+    for name, value in compare_bytes().items():
+        print(f"{name:>24}: {value:.2f}" if isinstance(value, float) else f"{name:>24}: {value}")
@@ -12,31 +12,359 @@ Public surface (used by test.py):
     - async get_user_input() -> str
     - async add_agent_markdown(md: str)
     - async add_system_markdown(md: str)
+    - stream_agent_markdown() -> MarkdownStream (feed(chunk) / close())
+    - async show_history(page: int)
     - show_loading(text: str)
     - hide_loading()
 
 Notes:
 - This UI runs in the main terminal and adapts to terminal size changes.
+  The size is tracked by `terminal` (a `TerminalSize`), which re-reads it
+  only on SIGWINCH, and the panel layout is chosen by a `layout_policy`
+  once per size.
 - It's designed to work well in split terminals for side-by-side usage.
 - Uses Rich Panels and Markdown with responsive sizing.
+- Every message goes into a bounded `Transcript` (older messages spill to a
+  gzip log). After `scrollback_messages` messages the terminal scrollback
+  is cleared, so a day-long workshop doesn't pile up in the terminal, and
+  `/history` pages back through the transcript.
+- Streamed answers go through `MarkdownStream`, which lays out only the
+  block still being written: finished paragraphs and closed code fences are
+  rendered once and printed for good, and the open block is redrawn at most
+  `fps` times a second. Re-rendering `Markdown(everything)` per token is
+  O(n²) and flickers in narrow splits. `python ui_rich.py` streams a
+  4k-token answer both ways and reports the CPU time spent rendering.
+- Long messages (over `offload_chars`) are laid out on a single render
+  thread; the loop only writes the finished text. Laying out a tutorial
+  step with several code blocks takes tens of milliseconds, which would
+  otherwise stall model streams and health probes. Every message is
+  printed under one output lock, in the order it was sent, so messages
+  never interleave. `python ui_rich.py offload` renders the big tutorial
+  steps both ways while a `LoopLatencyProbe` measures the loop's lag.
 """
 from __future__ import annotations
 
 import asyncio
+import io
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Optional
+from typing import Callable, List, Optional, Tuple
 
-from rich.console import Console
+from rich.cells import cell_len
+from rich.console import Console, RenderableType
+from rich.live import Live
 from rich.panel import Panel
 from rich.markdown import Markdown
+from rich.segment import Segment
+from rich.style import Style
 from rich.text import Text
 from rich.prompt import Prompt
 
+from transcript import Entry, Transcript
+
 # Create console that adapts to current terminal size
 console = Console(force_terminal=True, legacy_windows=False)
 
 
+class _Framed:
+    """Pre-rendered lines between the side borders of a panel."""
+
+    def __init__(self, lines: List[List[Segment]], style: Style, padding: int, bottom: Optional[int] = None):
+        self.lines = lines
+        self.style = style
+        self.padding = padding
+        self.bottom = bottom  # panel width, to close the frame
+
+    def __rich_console__(self, console, options):
+        side = Segment("│", self.style)
+        pad = Segment(" " * self.padding)
+        for line in self.lines:
+            yield side
+            yield pad
+            yield from line
+            yield pad
+            yield side
+            yield Segment.line()
+        if self.bottom is not None:
+            yield Segment("╰" + "─" * (self.bottom - 2) + "╯", self.style)
+            yield Segment.line()
+
+
+class MarkdownStream:
+    """Render a streamed markdown answer in a panel, one block at a time.
+
+    Args:
+        console: Console to print to.
+        title (str): Panel title.
+        border_style (str): Style of the frame.
+        width (int): Panel width (default: the full console width).
+        padding (tuple): (vertical, horizontal) padding, like `Panel`.
+        fps (float): Most redraws of the open block per second.
+        clock: Time source for the frame budget (replays pass a simulated one).
+        on_close: Called with the whole answer once the stream is closed.
+    """
+
+    def __init__(
+        self,
+        console: Console,
+        title: str = "🤖 Assistant",
+        border_style: str = "orange1",
+        width: Optional[int] = None,
+        padding: Tuple[int, int] = (0, 1),
+        fps: float = 15.0,
+        clock: Callable[[], float] = time.perf_counter,
+        on_close: Optional[Callable[[str], None]] = None,
+    ):
+        self.console = console
+        self.clock = clock
+        self.on_close = on_close
+        self.title = title
+        self.style = console.get_style(border_style)
+        self.width = width or console.width
+        self.pad_y, self.pad_x = padding
+        self.frame_budget = 1.0 / fps
+        self.inner_width = max(1, self.width - 2 - 2 * self.pad_x)
+        self.frozen_blocks = 0
+        self.redraws = 0
+        self.blocks: List[str] = []
+
+        self._open = ""         # text of the block still being written
+        self._scan = 0          # start of the first line of `_open` not yet scanned
+        self._fence: Optional[str] = None
+        self._last_draw = 0.0
+        self._live: Optional[Live] = None
+
+    def __enter__(self) -> "MarkdownStream":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def start(self) -> None:
+        title = f" {self.title} "
+        top = "╭─" + title + "─" * max(0, self.width - 3 - cell_len(title)) + "╮"
+        self.console.print()
+        self.console.print(Text(top, style=self.style), crop=True)
+        if self.pad_y:
+            self.console.print(_Framed([[Segment(" " * self.inner_width)]] * self.pad_y, self.style, self.pad_x))
+        self._live = Live(console=self.console, auto_refresh=False, transient=False)
+        self._live.start()
+
+    def feed(self, chunk: str) -> None:
+        """Add streamed text; redraws the open block when the frame budget allows."""
+        if not chunk:
+            return
+        self._open += chunk
+        froze = self._freeze_finished_blocks()
+        now = self.clock()
+        # After a freeze the live region is empty and must be redrawn now
+        if froze or now - self._last_draw >= self.frame_budget:
+            self._draw_open_block()
+            self._last_draw = now
+
+    def close(self) -> None:
+        if self._live is None:
+            return
+        if self._open.strip():
+            self._freeze(self._open)
+        self._open = ""
+        pad = [[Segment(" " * self.inner_width)]] * self.pad_y
+        self._live.update(_Framed(pad, self.style, self.pad_x, bottom=self.width), refresh=True)
+        self._live.stop()
+        self._live = None
+        if self.on_close is not None:
+            self.on_close("\n\n".join(self.blocks))
+
+    def _freeze_finished_blocks(self) -> bool:
+        """Print every block of `_open` that can no longer change."""
+        text = self._open
+        start = 0
+        pos = self._scan
+        while True:
+            end = text.find("\n", pos)
+            if end == -1:
+                break
+            stripped = text[pos:end].strip()
+            boundary = None
+            if self._fence is None and stripped.startswith(("```", "~~~")):
+                self._fence = stripped[:3]
+            elif self._fence is not None:
+                if stripped.startswith(self._fence) and not stripped.strip(self._fence[0]):
+                    # Closing fence: the code block is complete
+                    self._fence = None
+                    boundary = end + 1
+            elif not stripped:
+                # Blank line outside code: the paragraph (or list, table...) is complete
+                boundary = end + 1
+            pos = end + 1
+            if boundary is not None:
+                if text[start:boundary].strip():
+                    self._freeze(text[start:boundary])
+                start = boundary
+        self._open = text[start:]
+        self._scan = pos - start
+        return start > 0
+
+    def _freeze(self, block: str) -> None:
+        self.blocks.append(block.strip("\n"))
+        lines = self._render(block)
+        if self.frozen_blocks:
+            lines.insert(0, [Segment(" " * self.inner_width)])
+        self.frozen_blocks += 1
+        # Clear the live region first, or printing redraws the stale open block under the frozen one
+        self._live.update(_Framed([], self.style, self.pad_x, bottom=self.width), refresh=True)
+        # Printed above the live region, never laid out again
+        self._live.console.print(_Framed(lines, self.style, self.pad_x))
+
+    def _draw_open_block(self) -> None:
+        lines = self._render(self._open) if self._open.strip() else []
+        self._live.update(_Framed(lines, self.style, self.pad_x, bottom=self.width), refresh=True)
+        self.redraws += 1
+
+    def _render(self, markdown: str) -> List[List[Segment]]:
+        options = self.console.options.update_width(self.inner_width)
+        lines = self.console.render_lines(Markdown(markdown.strip("\n")), options, pad=True)
+        # Blocks rendered on their own carry their own blank margins; a single
+        # blank line between frozen blocks replaces them
+        filled = [i for i, line in enumerate(lines) if any(seg.text.strip() for seg in line)]
+        return lines[filled[0]:filled[-1] + 1] if filled else []
+
+
+class TerminalSize:
+    """Terminal size, read again only after the terminal has been resized.
+
+    Rich asks the OS for the size (an ioctl) whenever it isn't fixed. This
+    keeps it fixed through the public `Console.size` setter and updates it
+    from SIGWINCH. Where there is no SIGWINCH (Windows), it re-reads the size
+    at most every `poll_interval` seconds. `generation` goes up on every
+    change, and `on_resize()` callbacks run, so cached layouts and renders
+    know when to drop what they hold.
+
+    Args:
+        console: Console whose size is kept up to date.
+        poll_interval (float): Seconds between size checks without SIGWINCH.
+    """
+
+    def __init__(self, console: Console, poll_interval: float = 1.0):
+        self.console = console
+        self.poll_interval = poll_interval
+        self.generation = 0
+        self._listeners: List[Callable[[int, int], None]] = []
+        self._stale = True
+        self._signalled = False
+        self._checked_at = 0.0
+        self._size: Optional[Tuple[int, int]] = None
+
+    def install(self) -> None:
+        """Listen for SIGWINCH (main thread only; otherwise falls back to polling)."""
+        import signal
+
+        if self._signalled or not hasattr(signal, "SIGWINCH"):
+            return
+        previous = signal.getsignal(signal.SIGWINCH)
+
+        def resized(signum, frame):
+            self._stale = True
+            if callable(previous):
+                previous(signum, frame)
+
+        try:
+            signal.signal(signal.SIGWINCH, resized)
+        except ValueError:
+            return  # not the main thread
+        self._signalled = True
+
+    def on_resize(self, callback: Callable[[int, int], None]) -> None:
+        self._listeners.append(callback)
+
+    @property
+    def width(self) -> int:
+        return self.size[0]
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        if not self._signalled and time.monotonic() - self._checked_at >= self.poll_interval:
+            self._stale = True
+        if self._stale:
+            self._stale = False
+            self._checked_at = time.monotonic()
+            self._update(self._read())
+        return self._size
+
+    def _read(self) -> Tuple[int, int]:
+        import shutil
+
+        size = shutil.get_terminal_size()
+        return size.columns, size.lines
+
+    def _update(self, size: Tuple[int, int]) -> None:
+        if size == self._size:
+            return
+        self._size = size
+        self.console.size = size
+        self.generation += 1
+        for callback in self._listeners:
+            callback(*size)
+
+
+terminal = TerminalSize(console)
+
+
+def render_ansi(renderable: RenderableType, width: int, color_system: Optional[str], gap: bool = True) -> str:
+    """Lay out `renderable` (preceded by a blank line if `gap`) as terminal text.
+
+    Uses its own console, so it can run on the render thread while the
+    loop keeps using `console`.
+    """
+    capture = Console(
+        file=io.StringIO(), width=width, force_terminal=True,
+        color_system=color_system, legacy_windows=False,
+    )
+    if gap:
+        capture.print()
+    capture.print(renderable)
+    return capture.file.getvalue()
+
+
+@dataclass(frozen=True)
+class PanelLayout:
+    """How messages are laid out at one terminal width."""
+
+    width: Optional[int]        # panel width, None for the full terminal width
+    expand: bool
+    padding: Tuple[int, int]
+    agent_title: str
+    system_title: str
+    prompt: str
+
+
+def default_layout(terminal_width: int) -> PanelLayout:
+    """Compact panels for narrow splits, roomier capped-width panels on wide terminals."""
+    # For narrow terminals (split view), use full width with minimal padding;
+    # for medium terminals, 90% of the width; for wide ones, cap for readability
+    if terminal_width <= 60:
+        width = None
+    elif terminal_width <= 100:
+        width = max(40, int(terminal_width * 0.9))
+    else:
+        width = 90
+
+    # Ultra-narrow terminals (less than 30 chars) - minimal UI
+    if terminal_width <= 30:
+        return PanelLayout(width, True, (0, 0), "🤖", "ℹ️", ">")
+    # Very narrow terminals (30-50 chars) - compact styling
+    if terminal_width <= 50:
+        return PanelLayout(width, True, (0, 1), "🤖", "ℹ️", "You>")
+    # Medium terminals (50-80 chars) - balanced styling
+    if terminal_width <= 80:
+        return PanelLayout(width, False, (0, 1), "🤖 AI", "ℹ️ Sys", "You")
+    # Wide terminals - full styling
+    return PanelLayout(width, False, (1, 2), "🤖 Assistant", "ℹ️ System", "You")
+
+
 @dataclass
 class RichChatUI:
     """Simple Rich-based chat UI that adapts to terminal size and splits.
@@ -44,58 +372,46 @@ class RichChatUI:
     This class provides the minimal async-friendly API required by
     `test.py`. It renders messages using Rich panels that adapt to
     the current terminal width, making it suitable for split terminals.
+    `layout_policy` maps a terminal width to a `PanelLayout`; it is
+    evaluated once per terminal size, not per message. Messages longer
+    than `offload_chars` are laid out on the render thread.
     """
 
     _input_queue: asyncio.Queue[str] = None
     _running: bool = False
+    layout_policy: Callable[[int], PanelLayout] = default_layout
+    transcript: Optional[Transcript] = None
+    # Messages printed before the terminal scrollback is cleared (0 = never)
+    scrollback_messages: int = 200
+    # Longer messages are laid out off the event loop (None = never)
+    offload_chars: Optional[int] = 1500
 
     def __post_init__(self):
         if self._input_queue is None:
             self._input_queue = asyncio.Queue()
+        # One render thread, and one lock held from layout to write, keep messages in order
+        self._renderer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ui-render")
+        self._output = asyncio.Lock()
+        self._layout: Optional[PanelLayout] = None
+        self._layout_generation = -1
+        self._on_screen = 0
 
-    def _refresh_console_size(self) -> None:
-        """Force console to refresh its size information."""
-        try:
-            # Force Rich to re-detect terminal size
-            console._width = None
-            console._height = None
-            # This will cause Rich to re-detect size on next access
-        except:
-            pass  # Fallback gracefully if this internal API changes
-
-    def _get_panel_width(self) -> Optional[int]:
-        """Calculate appropriate panel width based on terminal size."""
-        try:
-            # Refresh console size information
-            self._refresh_console_size()
-            
-            # Get current terminal size
-            terminal_width = console.size.width
-            
-            # For very narrow terminals (less than 40 chars), use full width
-            if terminal_width <= 40:
-                return None  # Use full available width
-            
-            # For narrow terminals (split view), use full width with minimal padding
-            elif terminal_width <= 60:
-                return None  # Use full available width
-            
-            # For medium terminals, use 90% of width to maximize space usage
-            elif terminal_width <= 100:
-                return max(40, int(terminal_width * 0.9))
-            
-            # For wide terminals, cap at reasonable width for readability
-            else:
-                return 90
-                
-        except (AttributeError, OSError):
-            # Fallback if we can't determine terminal size
-            return None  # Use full width as safest fallback
+    @property
+    def layout(self) -> PanelLayout:
+        """Layout for the current terminal width, shared by every panel."""
+        width = terminal.width
+        if self._layout_generation != terminal.generation:
+            self._layout = self.layout_policy(width)
+            self._layout_generation = terminal.generation
+        return self._layout
 
     async def start(self) -> None:
         if self._running:
             return
         self._running = True
+        terminal.install()
+        if self.transcript is None:
+            self.transcript = Transcript()
         
         # Clear screen and show a compact header
         console.clear()
@@ -104,126 +420,115 @@ class RichChatUI:
     async def get_user_input(self) -> str:
         # Use synchronous input with responsive prompt
         try:
-            # Refresh console size and get terminal width for prompt formatting
-            self._refresh_console_size()
-            terminal_width = console.size.width
-            
-            if terminal_width <= 30:
-                # Ultra-compact prompt for very narrow terminals
-                text = Prompt.ask("[bold purple]>[/]")
-            elif terminal_width <= 50:
-                # Compact prompt for narrow terminals
-                text = Prompt.ask("[bold purple]You>[/]")
-            else:
-                # Full prompt for wider terminals
-                text = Prompt.ask("[bold purple]You[/]")
+            text = Prompt.ask(f"[bold purple]{self.layout.prompt}[/]")
+            if text:
+                self._record("user", text)
             return text if text else ""
         except (EOFError, KeyboardInterrupt):
             return ""
 
     async def add_agent_markdown(self, md: str) -> None:
-        # Responsive panel design based on current terminal width
-        width = self._get_panel_width()
-        terminal_width = console.size.width
-        
-        console.print()
-        
-        # Ultra-narrow terminals (less than 30 chars) - minimal UI
-        if terminal_width <= 30:
-            console.print(Panel(
-                Markdown(md),
-                title="🤖",
-                title_align="left",
-                border_style="orange1",
-                padding=(0, 0),
-                width=width,
-                expand=True
-            ))
-        # Very narrow terminals (30-50 chars) - compact styling
-        elif terminal_width <= 50:
-            console.print(Panel(
-                Markdown(md),
-                title="🤖",
-                title_align="left",
-                border_style="orange1",
-                padding=(0, 1),
-                width=width,
-                expand=True
-            ))
-        # Medium terminals (50-80 chars) - balanced styling
-        elif terminal_width <= 80:
-            console.print(Panel(
-                Markdown(md),
-                title="🤖 AI",
-                title_align="left",
-                border_style="orange1",
-                padding=(0, 1),
-                width=width,
-                expand=False
-            ))
-        # Wide terminals - full styling
-        else:
-            console.print(Panel(
-                Markdown(md),
-                title="🤖 Assistant",
-                title_align="left",
-                border_style="orange1",
-                padding=(1, 2),
-                width=width,
-                expand=False
-            ))
+        await self._show("agent", md)
 
     async def add_system_markdown(self, md: str) -> None:
-        # Responsive panel design based on current terminal width
-        width = self._get_panel_width()
-        terminal_width = console.size.width
-        
-        console.print()
-        
-        # Ultra-narrow terminals (less than 30 chars) - minimal UI
-        if terminal_width <= 30:
-            console.print(Panel(
-                Markdown(md),
-                title="ℹ️",
-                title_align="left", 
-                border_style="blue",
-                padding=(0, 0),
-                width=width,
-                expand=True
-            ))
-        # Very narrow terminals (30-50 chars) - compact styling
-        elif terminal_width <= 50:
-            console.print(Panel(
-                Markdown(md),
-                title="ℹ️",
-                title_align="left", 
-                border_style="blue",
-                padding=(0, 1),
-                width=width,
-                expand=True
-            ))
-        # Medium terminals (50-80 chars) - balanced styling
-        elif terminal_width <= 80:
-            console.print(Panel(
-                Markdown(md),
-                title="ℹ️ Sys",
-                title_align="left", 
-                border_style="blue",
-                padding=(0, 1),
-                width=width,
-                expand=False
-            ))
-        # Wide terminals - full styling
-        else:
-            console.print(Panel(
-                Markdown(md),
-                title="ℹ️ System",
-                title_align="left", 
-                border_style="blue",
-                padding=(1, 2),
-                width=width,
-                expand=False
-            ))
+        await self._show("system", md)
+
+    async def show_history(self, page: int = 1) -> None:
+        """Print one page of earlier messages (1 = the most recent), loaded on demand."""
+        if self.transcript is None:
+            return
+        async with self._output:
+            layout = self.layout
+            entries = self.transcript.page(page)
+            if self.offload_chars is not None and sum(len(e.markdown) for e in entries) > self.offload_chars:
+                text = await self._render_off_loop(entries, layout, gap=False)
+                console.file.write(text)
+                console.file.flush()
+            else:
+                for entry in entries:
+                    console.print(self._entry_panel(entry, layout))
+            page = min(max(1, page), self.transcript.pages)
+            older = f" · `/history {page + 1}` for older messages" if page < self.transcript.pages else ""
+            console.print(Markdown(f"*History page {page} of {self.transcript.pages}*{older}"))
+
+    def stream_agent_markdown(self) -> MarkdownStream:
+        """Start an agent message that arrives in pieces: `feed(chunk)` then `close()`.
+
+        Await earlier `add_*_markdown()` calls first; the stream writes
+        straight to the terminal.
+        """
+        layout = self.layout
+        stream = MarkdownStream(
+            console, title=layout.agent_title, width=layout.width, padding=layout.padding,
+            on_close=lambda md: self._record("agent", md),
+        )
+        stream.start()
+        return stream
+
+    async def _show(self, role: str, md: str) -> None:
+        async with self._output:
+            self._record(role, md)
+            entry = Entry(role, md, 0.0)
+            if self.offload_chars is None or len(md) <= self.offload_chars:
+                # Short messages lay out faster than a trip to the render thread
+                console.print()
+                console.print(self._entry_panel(entry, self.layout))
+                return
+            text = await self._render_off_loop([entry], self.layout)
+            console.file.write(text)
+            console.file.flush()
+
+    async def _render_off_loop(self, entries: List[Entry], layout: PanelLayout, gap: bool = True) -> str:
+        """Parse and lay out `entries` as panels on the render thread."""
+        loop = asyncio.get_running_loop()
+        # The size is read here: the signal-driven state lives on the loop's thread
+        width, color_system = console.width, console.color_system
+
+        def render() -> str:
+            return "".join(
+                render_ansi(self._entry_panel(entry, layout), width, color_system, gap) for entry in entries
+            )
+
+        return await loop.run_in_executor(self._renderer, render)
+
+    def _record(self, role: str, md: str) -> None:
+        if self.transcript is not None:
+            self.transcript.append(role, md)
+        self._on_screen += 1
+        if self.scrollback_messages and self._on_screen >= self.scrollback_messages and console.is_terminal:
+            self._trim_scrollback()
+
+    def _trim_scrollback(self, keep: int = 3) -> None:
+        """Clear the screen and the terminal's scrollback, then reprint the last few messages."""
+        self._on_screen = 0
+        console.clear()
+        console.file.write("\x1b[3J")  # erase scrollback (xterm and most emulators)
+        console.print(Markdown("*Earlier messages: `/history`*"))
+        if self.transcript is None:
+            return
+        layout = self.layout
+        # The message being printed right now follows, so reprint the ones before it
+        for entry in self.transcript.recent(keep + 1)[:-1]:
+            console.print(self._entry_panel(entry, layout))
+
+    def _entry_panel(self, entry, layout: PanelLayout) -> Panel:
+        if entry.role == "agent":
+            return self._panel(entry.markdown, layout.agent_title, "orange1", layout)
+        if entry.role == "system":
+            return self._panel(entry.markdown, layout.system_title, "blue", layout)
+        return self._panel(entry.markdown, layout.prompt, "purple", layout)
+
+    @staticmethod
+    def _panel(md: str, title: str, border_style: str, layout: PanelLayout) -> Panel:
+        return Panel(
+            Markdown(md),
+            title=title,
+            title_align="left",
+            border_style=border_style,
+            padding=layout.padding,
+            width=layout.width,
+            expand=layout.expand,
+        )
 
     def show_loading(self, text: str = "Loading tools") -> None:
         # Loading indicator removed per request (no-op)
@@ -236,3 +541,135 @@ class RichChatUI:
 
 # Provide the same name the rest of the code expects
 TextualChatUI = RichChatUI
+
+
+def benchmark_streaming(tokens: int = 4000, width: int = 80, tokens_per_s: float = 20.0,
+                        fps: float = 15.0, samples: int = 40) -> dict:
+    """CPU seconds spent rendering a streamed `tokens`-token answer.
+
+    Tokens arrive on a simulated clock at `tokens_per_s`, so the frame
+    budget behaves as in a real session. Re-rendering the whole panel gets
+    slower with every token, so its total is estimated from `samples`
+    evenly spaced frames: per token, and rate-limited to the same `fps`.
+    """
+    import io
+    import re
+
+    section = (
+        "## Step {n}: views\n\n"
+        "A **view** is where the logic of the application goes. It asks the *model* for "
+        "information and passes it to a `template`. Views are just Python functions.\n\n"
+        "```python\n"
+        "from django.shortcuts import render\n\n"
+        "def post_list(request):\n"
+        "    posts = Post.objects.filter(published_date__lte=timezone.now())\n"
+        "    return render(request, 'blog/post_list.html', {{'posts': posts}})\n"
+        "```\n\n"
+        "- open `blog/views.py`\n- add the function above\n- save and reload the page\n\n"
+    )
+    text = ""
+    n = 1
+    while len(re.findall(r"\s*\S+", text)) < tokens:
+        text += section.format(n=n)
+        n += 1
+    pieces = re.findall(r"\s*\S+", text)[:tokens]
+
+    def fresh_console() -> Console:
+        return Console(file=io.StringIO(), width=width, force_terminal=True, color_system="truecolor")
+
+    now = 0.0
+    out = fresh_console()
+    start = time.process_time()
+    with MarkdownStream(out, width=width, fps=fps, clock=lambda: now) as stream:
+        for piece in pieces:
+            now += 1.0 / tokens_per_s
+            stream.feed(piece)
+    incremental = time.process_time() - start
+
+    # Whole-panel re-render cost at evenly spaced points of the answer
+    out = fresh_console()
+    frame_costs = []
+    with Live(console=out, auto_refresh=False) as live:
+        for k in range(1, samples + 1):
+            so_far = "".join(pieces[:len(pieces) * k // samples])
+            start = time.process_time()
+            live.update(Panel(Markdown(so_far), border_style="orange1"), refresh=True)
+            frame_costs.append(time.process_time() - start)
+    mean_frame = sum(frame_costs) / len(frame_costs)
+    frames = min(len(pieces), int(len(pieces) / tokens_per_s * fps))
+
+    return {
+        "tokens": len(pieces),
+        "whole_panel_per_token_cpu_s": mean_frame * len(pieces),
+        "whole_panel_at_fps_cpu_s": mean_frame * frames,
+        "incremental_cpu_s": incremental,
+        "frozen_blocks": stream.frozen_blocks,
+        "open_block_redraws": stream.redraws,
+    }
+
+
+def benchmark_offload(rounds: int = 5, width: int = 80, probe_interval: float = 0.002) -> dict:
+    """Event-loop lag while the long tutorial steps are printed, laid out on and off the loop.
+
+    Every message gets a marker and all of them are sent at once, to check
+    they come out whole and in order.
+    """
+    import re
+
+    import django_girls_mcp_server as server
+    from loop_latency import LoopLatencyProbe
+
+    steps = [
+        server.python_introduction, server.create_post_model, server.setup_admin,
+        server.create_blog_views, server.test_blog,
+    ]
+    long_messages = [step() for step in steps]
+
+    async def run(offload_chars: Optional[int]) -> dict:
+        ui = RichChatUI(scrollback_messages=0, offload_chars=offload_chars)
+        probe = LoopLatencyProbe(interval=probe_interval, window=100_000)
+        probe.start()
+        await asyncio.sleep(probe_interval * 5)
+        probe.reset()
+        sends = []
+        for n in range(rounds * len(long_messages)):
+            md = f"message-{n:04d}\n\n{long_messages[n % len(long_messages)]}"
+            # Short system notes in between, as the watchdog or /stats would send
+            sends.append(ui.add_agent_markdown(md) if n % 2 == 0 else ui.add_system_markdown(f"message-{n:04d} note"))
+        start = time.perf_counter()
+        await asyncio.gather(*sends)
+        elapsed = time.perf_counter() - start
+        # Let the probe record the wake-up that was held up last
+        await asyncio.sleep(probe_interval * 2)
+        probe.stop()
+        ui._renderer.shutdown()
+        order = [int(m) for m in re.findall(r"message-(\d{4})", console.file.getvalue())]
+        console.file = io.StringIO()
+        return {
+            **probe.metrics(),
+            "wall_s": elapsed,
+            "in_order": order == sorted(order) and len(order) == len(sends),
+        }
+
+    terminal.width  # read the real size once, then pin the benchmark width
+    console.size = (width, 25)
+    saved, console.file = console.file, io.StringIO()
+    try:
+        results = {"on_loop": asyncio.run(run(None)), "render_thread": asyncio.run(run(1500))}
+    finally:
+        console.file = saved
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:2] == ["offload"]:
+        for mode, values in benchmark_offload().items():
+            print(mode)
+            for name, value in values.items():
+                print(f"{name:>28}: {value:.2f}" if isinstance(value, float) else f"{name:>28}: {value}")
+        sys.exit()
+    tokens = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    for name, value in benchmark_streaming(tokens).items():
+        print(f"{name:>28}: {value:.2f}" if isinstance(value, float) else f"{name:>28}: {value}")
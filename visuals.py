@@ -44,6 +44,11 @@ def print_welcome_message():
     # print(f"{ORANGE}  {sys_info}{RESET}")
     # print(f"{ORANGE}{'═' * 65}{RESET}\n")
 
+def print_plain_welcome():
+    """Welcome message without colour or block characters, for the plain UI"""
+    print("Welcome to Django Girls Offline!")
+    print("Type 'hello' to get started with your Django Girls Assistant.")
+
 def print_compact_version():
     """Print a more compact block version"""
     print(f"""
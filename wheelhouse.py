@@ -0,0 +1,206 @@
+"""
+Offline wheelhouse for workshop installs of Django.
+
+At a workshop, forty learners running `pip install django` at the same time
+saturate the venue Wi-Fi, and air-gapped classroom machines cannot reach PyPI
+at all. Instead, a coach builds a local "wheelhouse" (a folder of wheels for
+Django, its dependencies and pip itself) once, on a machine with internet:
+
+    python wheelhouse.py build
+
+The folder can then be copied to every classroom machine (or shared from a
+USB stick / network drive). The tutorial content detects it and tells learners
+to install with `pip install --no-index --find-links ...`, or they can run:
+
+    python wheelhouse.py install     # inside their activated virtual environment
+    python wheelhouse.py bench       # compare online vs offline install time
+
+The wheelhouse location defaults to `wheelhouse/` next to this file and can be
+overridden with the DJANGO_GIRLS_WHEELHOUSE environment variable.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import venv
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DEFAULT_WHEELHOUSE = Path(__file__).resolve().parent / "wheelhouse"
+MANIFEST_NAME = "MANIFEST.json"
+
+# Packages the tutorial installs into the learner's virtual environment
+PACKAGES = ["django", "pip"]
+
+# Python versions we expect on learner machines. Django is pure Python, but its
+# dependencies (and the Django version pip resolves) depend on the interpreter.
+SUPPORTED_PYTHONS = ["3.10", "3.11", "3.12", "3.13"]
+
+# Platform tags used only to evaluate environment markers while resolving
+# (e.g. `tzdata` is only required on Windows).
+PLATFORMS = ["manylinux2014_x86_64", "macosx_11_0_arm64", "win_amd64"]
+
+
+def wheelhouse_dir() -> Path:
+    """Return the configured wheelhouse location (it may not exist yet)."""
+    return Path(os.environ.get("DJANGO_GIRLS_WHEELHOUSE", DEFAULT_WHEELHOUSE)).expanduser().resolve()
+
+
+def find_wheelhouse(path: Optional[Path] = None) -> Optional[Path]:
+    """Return the wheelhouse folder if it exists and contains a Django wheel."""
+    path = Path(path) if path else wheelhouse_dir()
+    if not path.is_dir():
+        return None
+    if not any(path.glob("[Dd]jango-*.whl")):
+        return None
+    return path
+
+
+def install_command(path: Path, packages: Optional[List[str]] = None, python: str = "python") -> List[str]:
+    """Build the `pip install` command that installs from the wheelhouse only."""
+    return [python, "-m", "pip", "install", "--no-index", "--find-links", str(path)] + (packages or ["django"])
+
+
+def install_instructions(path: Optional[Path] = None) -> Optional[str]:
+    """Markdown instructions for installing Django from the local wheelhouse.
+
+    Returns None when no wheelhouse is available so callers can fall back to
+    the regular `pip install django` instructions.
+    """
+    path = find_wheelhouse(path)
+    if path is None:
+        return None
+
+    command = " ".join(_quote(part) for part in install_command(path))
+    runner = " ".join(_quote(part) for part in ["python", str(Path(__file__).resolve()), "install"])
+    return f"""**📴 Offline install available!**
+Your coach prepared a local copy of Django on this machine, so you don't need the internet:
+```bash
+{command}
+```
+(or let the tutorial do it for you: `{runner}`)"""
+
+
+def build_wheelhouse(
+    path: Optional[Path] = None,
+    pythons: Optional[List[str]] = None,
+    platforms: Optional[List[str]] = None,
+    packages: Optional[List[str]] = None,
+) -> Dict[str, object]:
+    """Download wheels for every supported Python/platform into the wheelhouse.
+
+    pip skips files that are already present, so re-running only fetches what
+    is missing (for example after adding a new Python version).
+
+    Returns:
+        dict: The manifest written next to the wheels.
+    """
+    path = Path(path) if path else wheelhouse_dir()
+    path.mkdir(parents=True, exist_ok=True)
+    pythons = pythons or SUPPORTED_PYTHONS
+    platforms = platforms or PLATFORMS
+    packages = packages or PACKAGES
+
+    for python_version in pythons:
+        for platform in platforms:
+            cmd = [
+                sys.executable, "-m", "pip", "download",
+                "--dest", str(path),
+                "--only-binary=:all:",
+                "--python-version", python_version,
+                "--platform", platform,
+                *packages,
+            ]
+            print(f"Downloading wheels for Python {python_version} ({platform})...")
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            if result.returncode != 0:
+                # An old Python may have no wheel for the newest release; keep going
+                print(f"  skipped: {result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'pip failed'}")
+
+    manifest = {
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "pythons": pythons,
+        "platforms": platforms,
+        "packages": packages,
+        "files": sorted(p.name for p in path.glob("*.whl")),
+    }
+    (path / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+def install_from_wheelhouse(path: Optional[Path] = None, python: Optional[str] = None) -> subprocess.CompletedProcess:
+    """Install Django (and upgrade pip) from the wheelhouse without network access."""
+    path = find_wheelhouse(path)
+    if path is None:
+        raise FileNotFoundError(
+            f"No wheelhouse found at {wheelhouse_dir()}. Build one with: python wheelhouse.py build"
+        )
+    python = python or sys.executable
+    subprocess.run(install_command(path, ["--upgrade", "pip"], python=python), check=False)
+    return subprocess.run(install_command(path, python=python), check=True)
+
+
+def benchmark_install(path: Optional[Path] = None) -> Dict[str, float]:
+    """Time `pip install django` online versus from the wheelhouse.
+
+    Each install goes into a fresh throwaway virtual environment with the pip
+    cache disabled, so both numbers reflect a learner's first install.
+    """
+    path = find_wheelhouse(path)
+    if path is None:
+        raise FileNotFoundError(f"No wheelhouse found at {wheelhouse_dir()}")
+
+    timings = {}
+    with tempfile.TemporaryDirectory(prefix="dg-wheelhouse-bench-") as tmp:
+        for label, extra in (
+            ("online", ["django"]),
+            ("offline", ["--no-index", "--find-links", str(path), "django"]),
+        ):
+            env_dir = Path(tmp) / label
+            venv.create(env_dir, with_pip=True)
+            python = env_dir / ("Scripts" if os.name == "nt" else "bin") / "python"
+            start = time.perf_counter()
+            result = subprocess.run(
+                [str(python), "-m", "pip", "install", "--no-cache-dir", "--disable-pip-version-check", *extra],
+                capture_output=True,
+                text=True,
+            )
+            elapsed = time.perf_counter() - start
+            timings[label] = elapsed if result.returncode == 0 else float("nan")
+    return timings
+
+
+def _quote(part: str) -> str:
+    return f'"{part}"' if " " in part else part
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline Django wheelhouse for Django Girls workshops")
+    parser.add_argument("command", choices=["build", "install", "bench", "where"])
+    parser.add_argument("--path", type=Path, default=None, help="wheelhouse folder (default: %(default)s)")
+    parser.add_argument("--python-version", action="append", dest="pythons", help="target Python version (repeatable)")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        manifest = build_wheelhouse(args.path, pythons=args.pythons)
+        print(f"Wheelhouse ready: {len(manifest['files'])} wheels in {args.path or wheelhouse_dir()}")
+    elif args.command == "install":
+        install_from_wheelhouse(args.path)
+    elif args.command == "bench":
+        timings = benchmark_install(args.path)
+        print(f"online install:  {timings['online']:.1f}s")
+        print(f"offline install: {timings['offline']:.1f}s")
+        if timings["offline"] > 0:
+            print(f"speedup:         {timings['online'] / timings['offline']:.1f}x")
+    else:
+        found = find_wheelhouse(args.path)
+        print(found if found else f"No wheelhouse at {args.path or wheelhouse_dir()}")
+        return 0 if found else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())